@@ -6,4 +6,4 @@ import sys
 from relatorios.producaoPrimaria.producaoPrimariaContadorAutomatico import main
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
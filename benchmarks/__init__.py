@@ -0,0 +1,3 @@
+"""
+Benchmarks dos construtores do relatório com dados sintéticos (sem banco).
+"""
@@ -0,0 +1,102 @@
+"""
+Gerador de viagens sintéticas com as mesmas colunas da consulta principal
+(QUERY_VIAGENS): time, prefixo_veiculo, nome, volume_descarregado, desc_obra.
+
+Determinístico pela semente. Tudo vetorizado em numpy para chegar a dezenas de
+milhões de linhas em poucos segundos.
+"""
+import numpy as np
+import pandas as pd
+
+NOMES_OBRAS = ("SÃO JOÃO", "PINHAL", "SANTA RITA", "BOA VISTA", "MONTE ALEGRE")
+
+_PRENOMES = (
+    "joão", "josé", "antônio", "francisco", "carlos", "paulo", "pedro", "lucas",
+    "luiz", "marcos", "luís", "gabriel", "rafael", "daniel", "marcelo", "bruno",
+    "eduardo", "felipe", "raimundo", "rodrigo", "sebastião", "maria", "ana", "adriana",
+)
+_SOBRENOMES = (
+    "da silva", "dos santos", "de oliveira", "de souza", "rodrigues", "ferreira",
+    "alves", "pereira", "lima", "gomes", "costa", "ribeiro", "martins", "carvalho",
+    "de almeida", "lopes", "soares", "fernandes", "vieira", "barbosa",
+)
+
+# peso relativo das descargas por hora do dia (turno 6h–22h, pico de manhã)
+_PESO_HORAS = np.array(
+    [0, 0, 0, 0, 0, 1, 4, 8, 10, 10, 9, 7, 5, 8, 9, 9, 8, 7, 5, 3, 2, 1, 0, 0], dtype=float
+)
+
+
+def _nomes_motoristas(n: int, rng) -> np.ndarray:
+    nomes = {f"{p} {s}" for p in _PRENOMES for s in _SOBRENOMES}
+    nomes = sorted(nomes)
+    if n > len(nomes):
+        nomes += [f"motorista {i:04d}" for i in range(n - len(nomes))]
+    return np.array(rng.permutation(nomes)[:n], dtype=object)
+
+
+def gerar_viagens(
+        linhas: int,
+        obras: int = 1,
+        caminhoes: int = 40,
+        motoristas: int = 60,
+        dias: int = 30,
+        inicio: str = "2025-09-01",
+        nulos_volume: float = 0.02,
+        nulos_motorista: float = 0.05,
+        semente: int = 0,
+        incluir_codigo_planta: bool = False,
+) -> pd.DataFrame:
+    """
+    DataFrame de viagens ordenado por time.
+
+    - Cada caminhão tem capacidade própria (14–30 m³) e produtividade desigual.
+    - Cada caminhão tem um motorista principal (80% das viagens); no resto do
+      tempo qualquer motorista pode dirigi-lo.
+    - nulos_volume / nulos_motorista: fração de linhas com volume nulo (pesagem
+      faltando) e sem motorista (LEFT JOIN sem correspondência).
+    - incluir_codigo_planta: acrescenta codigo_planta, como na consulta do lote.
+    """
+    rng = np.random.default_rng(semente)
+
+    # tempo: dia uniforme, hora pelo perfil do turno, segundos uniformes
+    dia = rng.integers(0, dias, linhas)
+    hora = rng.choice(24, size=linhas, p=_PESO_HORAS / _PESO_HORAS.sum())
+    segundos = (dia * 86_400 + hora * 3_600 + rng.integers(0, 3_600, linhas)).astype("int64")
+    segundos.sort()
+    time = pd.Timestamp(inicio) + pd.to_timedelta(segundos, unit="s")
+
+    # caminhões com produtividade desigual
+    prefixos = np.array([f"CB-{i:03d}" for i in range(1, caminhoes + 1)], dtype=object)
+    peso_caminhao = rng.gamma(4.0, size=caminhoes)
+    caminhao = rng.choice(caminhoes, size=linhas, p=peso_caminhao / peso_caminhao.sum())
+
+    # volume: capacidade do caminhão com variação de carga
+    capacidade = rng.uniform(14, 30, caminhoes)
+    volume = capacidade[caminhao] * rng.normal(0.95, 0.05, linhas)
+    volume = np.round(np.clip(volume, 1, None), 2)
+    volume[rng.random(linhas) < nulos_volume] = np.nan
+
+    # motorista principal por caminhão, com trocas eventuais
+    nomes = _nomes_motoristas(motoristas, rng)
+    principal = rng.integers(0, motoristas, caminhoes)
+    motorista = np.where(rng.random(linhas) < 0.8, principal[caminhao], rng.integers(0, motoristas, linhas))
+    nome = nomes[motorista]
+    nome[rng.random(linhas) < nulos_motorista] = None
+
+    # obras
+    nomes_obras = np.array(
+        [NOMES_OBRAS[i] if i < len(NOMES_OBRAS) else f"OBRA {i + 1}" for i in range(obras)], dtype=object
+    )
+    obra = rng.integers(0, obras, linhas) if obras > 1 else np.zeros(linhas, dtype=int)
+
+    df = pd.DataFrame({
+        "time": time,
+        "prefixo_veiculo": prefixos[caminhao],
+        "nome": nome,
+        "volume_descarregado": volume,
+        "desc_obra": nomes_obras[obra],
+    })
+    if incluir_codigo_planta:
+        df["codigo_planta"] = 41 + obra
+    return df
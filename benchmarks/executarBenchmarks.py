@@ -0,0 +1,246 @@
+"""
+Benchmarks dos construtores do relatório de produção primária.
+
+Gera viagens sintéticas (benchmarks.dadosSinteticos), mede cada construtor e a
+montagem completa do PDF em vários tamanhos e compara com a baseline gravada.
+Roda sem banco e sem rede.
+
+Uso:
+    python -m benchmarks.executarBenchmarks                       # 10k, 100k, 1M
+    python -m benchmarks.executarBenchmarks --tamanhos 10k,10M --casos build_relatorio
+    python -m benchmarks.executarBenchmarks --salvar-baseline     # grava nova baseline
+
+Código de saída 1 quando algum caso fica mais lento que baseline x limite.
+"""
+import argparse
+import json
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+BASELINE_PADRAO = Path(__file__).resolve().parent / "baseline.json"
+TAMANHOS_PADRAO = "10k,100k,1M"
+LIMITE_PADRAO = 1.25      # mais de 25% acima da baseline = regressão
+MAX_LINHAS_TABELA = 38
+
+
+def interpretar_tamanho(texto: str) -> int:
+    """"10k" -> 10_000, "1M" -> 1_000_000, "2500" -> 2500."""
+    texto = texto.strip().lower()
+    multiplicador = {"k": 1_000, "m": 1_000_000}.get(texto[-1:], 1)
+    if multiplicador != 1:
+        texto = texto[:-1]
+    return int(float(texto) * multiplicador)
+
+
+def rotulo_tamanho(n: int) -> str:
+    if n >= 1_000_000 and n % 1_000_000 == 0:
+        return f"{n // 1_000_000}M"
+    if n >= 1_000 and n % 1_000 == 0:
+        return f"{n // 1_000}k"
+    return str(n)
+
+
+# ---------------------------------------------------------------------
+# Casos
+# ---------------------------------------------------------------------
+
+def _casos():
+    """{nome: função(df, pasta)}; importados aqui para não pesar no --help."""
+    from relatorios.producaoPrimaria.cardsIndicadores import calcular_indicadores
+    from relatorios.producaoPrimaria.criarPdfRelatorio import build_relatorio, estilos_relatorio
+    from relatorios.producaoPrimaria.cuboProducao import CuboProducao
+    from relatorios.producaoPrimaria.graficoMapaCalorHorario import graficoMapaCalorHorario
+    from relatorios.producaoPrimaria.graficoProducaoDiaria import graficoLinhaProducaoDiaria
+    from relatorios.producaoPrimaria.graficoProducaoPorCaminhao import graficoProducaoCaminhao
+    from relatorios.producaoPrimaria.graficoProducaoPorMotorista import graficoProducaoMotorista
+    from relatorios.producaoPrimaria.leiturasDuplicadas import colapsar_leituras
+    from relatorios.producaoPrimaria.tabelaDistribuicaoCarga import criarTabelaDistribuicaoCarga
+    from relatorios.producaoPrimaria.tabelaProducaoCaminhao import criarTabelaProducaoPorCaminhao
+    from relatorios.producaoPrimaria.tabelaProducaoDiaria import criarTabelaProducaoDiaria
+    from relatorios.producaoPrimaria.tabelaProducaoMotorista import criarTabelaProducaoPorMotorista
+    from relatorios.producaoPrimaria.tabelaTempoCiclo import criarTabelaTempoCiclo
+
+    styles = estilos_relatorio()
+
+    def relatorio(df, pasta):
+        inicio, fim = df["time"].min(), df["time"].max()
+        build_relatorio(
+            df, inicio, fim, "Benchmark", "Benchmark", "benchmarks", None, False,
+            output_path=Path(pasta) / "benchmark.pdf",
+        )
+
+    return {
+        "calcular_indicadores": lambda df, pasta: calcular_indicadores(df),
+        "cubo_producao": lambda df, pasta: CuboProducao.de_dataframe(df),
+        "colapsar_leituras": lambda df, pasta: colapsar_leituras(df),
+        "tabela_diaria": lambda df, pasta: criarTabelaProducaoDiaria(df, styles, 48),
+        "tabela_caminhoes": lambda df, pasta: criarTabelaProducaoPorCaminhao(df, styles, MAX_LINHAS_TABELA),
+        "tabela_motoristas": lambda df, pasta: criarTabelaProducaoPorMotorista(df, styles, MAX_LINHAS_TABELA),
+        "tabela_ciclos": lambda df, pasta: criarTabelaTempoCiclo(df, styles, MAX_LINHAS_TABELA),
+        "tabela_cargas": lambda df, pasta: criarTabelaDistribuicaoCarga(df, styles, MAX_LINHAS_TABELA),
+        "grafico_diario": lambda df, pasta: graficoLinhaProducaoDiaria(df),
+        "grafico_horario": lambda df, pasta: graficoMapaCalorHorario(df),
+        "grafico_caminhoes": lambda df, pasta: graficoProducaoCaminhao(df),
+        "grafico_motoristas": lambda df, pasta: graficoProducaoMotorista(df),
+        "build_relatorio": relatorio,
+    }
+
+
+def medir(fn, df, pasta, repeticoes: int) -> float:
+    """Melhor tempo (s) entre as repetições."""
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        t0 = time.perf_counter()
+        fn(df, pasta)
+        melhor = min(melhor, time.perf_counter() - t0)
+    return melhor
+
+
+def executar(tamanhos, nomes_casos=None, repeticoes: int = 3, semente: int = 0) -> dict:
+    """Roda os casos pedidos e devolve {"caso@tamanho": segundos}."""
+    from .dadosSinteticos import gerar_viagens
+
+    casos = _casos()
+    if nomes_casos:
+        casos = {nome: casos[nome] for nome in nomes_casos}
+
+    resultados = {}
+    with tempfile.TemporaryDirectory(prefix="benchmarks_") as pasta:
+        for n in tamanhos:
+            df = gerar_viagens(n, semente=semente)
+            # tamanhos grandes custam minutos por repetição: mede uma vez só
+            reps = repeticoes if n <= 100_000 else 1
+            for nome, fn in casos.items():
+                segundos = medir(fn, df, pasta, reps)
+                resultados[f"{nome}@{rotulo_tamanho(n)}"] = segundos
+                print(f"  {nome:<22} {rotulo_tamanho(n):>5} {segundos:9.3f} s", flush=True)
+            del df
+    return resultados
+
+
+# ---------------------------------------------------------------------
+# Baseline
+# ---------------------------------------------------------------------
+
+def ambiente() -> dict:
+    import matplotlib
+    import numpy
+    import pandas
+    import reportlab
+
+    return {
+        "maquina": platform.node(),
+        "plataforma": platform.platform(),
+        "processador": platform.processor() or platform.machine(),
+        "python": platform.python_version(),
+        "pandas": pandas.__version__,
+        "numpy": numpy.__version__,
+        "matplotlib": matplotlib.__version__,
+        "reportlab": reportlab.Version,
+    }
+
+
+def carregar_baseline(caminho: Path) -> dict:
+    if not caminho.is_file():
+        return {}
+    return json.loads(caminho.read_text(encoding="utf-8"))
+
+
+def salvar_baseline(caminho: Path, resultados: dict, anterior: dict) -> None:
+    """Atualiza apenas os casos medidos agora, mantendo os demais."""
+    tempos = dict(anterior.get("tempos", {}))
+    tempos.update({k: round(v, 4) for k, v in resultados.items()})
+    dados = {
+        "gravada_em": datetime.now().isoformat(timespec="seconds"),
+        "ambiente": ambiente(),
+        "tempos": dict(sorted(tempos.items())),
+    }
+    caminho.write_text(json.dumps(dados, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+
+
+def relatorio_regressao(resultados: dict, baseline: dict, limite: float) -> int:
+    """Imprime a comparação com a baseline e devolve o número de regressões."""
+    tempos = baseline.get("tempos", {})
+    if baseline:
+        amb = baseline.get("ambiente", {})
+        print(f"\nBaseline de {baseline.get('gravada_em', '?')} ({amb.get('maquina', '?')}, "
+              f"Python {amb.get('python', '?')}, pandas {amb.get('pandas', '?')})")
+        if amb.get("maquina") not in (None, platform.node()):
+            print("Atenção: baseline gravada em outra máquina; compare com cautela.")
+    else:
+        print("\nSem baseline gravada (use --salvar-baseline).")
+
+    print(f"{'Caso':<30} {'Atual':>9} {'Baseline':>9} {'Razão':>6}  Situação")
+    regressoes = 0
+    for chave, atual in resultados.items():
+        base = tempos.get(chave)
+        if base is None:
+            print(f"{chave:<30} {atual:8.3f}s {'-':>9} {'-':>6}  sem baseline")
+            continue
+        razao = atual / base if base > 0 else float("inf")
+        if razao > limite:
+            situacao = "REGRESSÃO"
+            regressoes += 1
+        elif razao < 1 / limite:
+            situacao = "melhora"
+        else:
+            situacao = "ok"
+        print(f"{chave:<30} {atual:8.3f}s {base:8.3f}s {razao:6.2f}  {situacao}")
+
+    print(f"{regressoes} regressão(ões) acima de {limite:.2f}x a baseline")
+    return regressoes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks dos construtores do relatório (dados sintéticos)")
+    parser.add_argument("--tamanhos", default=TAMANHOS_PADRAO, help="Linhas por rodada (ex: 10k,100k,1M,10M)")
+    parser.add_argument("--casos", help="Casos a rodar, separados por vírgula (padrão: todos)")
+    parser.add_argument("--repeticoes", type=int, default=3, help="Repetições até 100k linhas (vale o melhor tempo)")
+    parser.add_argument("--semente", type=int, default=0, help="Semente do gerador de dados")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PADRAO, help="Arquivo JSON da baseline")
+    parser.add_argument("--limite", type=float, default=LIMITE_PADRAO,
+                        help="Razão atual/baseline acima da qual o caso é regressão")
+    parser.add_argument("--salvar-baseline", action="store_true", help="Grava os tempos medidos como nova baseline")
+    parser.add_argument("--listar", action="store_true", help="Lista os casos disponíveis")
+    args = parser.parse_args()
+
+    if args.listar:
+        print("\n".join(_casos()))
+        return 0
+
+    try:
+        tamanhos = [interpretar_tamanho(t) for t in args.tamanhos.split(",") if t.strip()]
+    except ValueError:
+        parser.error(f"tamanhos inválidos: {args.tamanhos!r}")
+    if not tamanhos or min(tamanhos) < 1:
+        parser.error("informe ao menos um tamanho positivo")
+    if args.repeticoes < 1:
+        parser.error("o argumento --repeticoes deve ser positivo")
+
+    nomes_casos = [c.strip() for c in args.casos.split(",")] if args.casos else None
+    if nomes_casos:
+        desconhecidos = sorted(set(nomes_casos) - set(_casos()))
+        if desconhecidos:
+            parser.error(f"casos desconhecidos: {', '.join(desconhecidos)} (use --listar)")
+
+    resultados = executar(tamanhos, nomes_casos, args.repeticoes, args.semente)
+    baseline = carregar_baseline(args.baseline)
+    regressoes = relatorio_regressao(resultados, baseline, args.limite)
+
+    if args.salvar_baseline:
+        salvar_baseline(args.baseline, resultados, baseline)
+        print(f"Baseline gravada em: {args.baseline}")
+        return 0
+    return 1 if regressoes else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
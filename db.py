@@ -1,10 +1,13 @@
-from sqlalchemy import create_engine, text
+from sqlalchemy import bindparam, create_engine, text
 import pandas as pd
 import os
+from functools import lru_cache
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# um engine por processo: o pool de conexões é reaproveitado entre consultas
+@lru_cache(maxsize=1)
 def get_engine():
   user = os.getenv("DB_USER")
   pwd  = os.getenv("DB_PASS")
@@ -14,8 +17,28 @@ def get_engine():
   url = f"mysql+pymysql://{user}:{pwd}@{host}:{port}/{db}"
   return create_engine(url, pool_pre_ping=True)
 
+def _preparar(sql: str, params: dict | None):
+    params = params or {}
+    stmt = text(sql)
+    # listas/tuplas viram "IN (...)" expandido
+    listas = [k for k, v in params.items() if isinstance(v, (list, tuple))]
+    if listas:
+        stmt = stmt.bindparams(*(bindparam(k, expanding=True) for k in listas))
+    return stmt, params
+
 def load_dataframe(sql: str, params: dict | None = None) -> pd.DataFrame:
+    stmt, params = _preparar(sql, params)
     engine = get_engine()
     with engine.connect() as con:
-        df = pd.read_sql(text(sql), con, params=params or {})
-    return df
\ No newline at end of file
+        df = pd.read_sql(stmt, con, params=params)
+    return df
+
+def iter_dataframes(sql: str, params: dict | None = None, chunksize: int = 200_000):
+    """
+    Lê o resultado em blocos de `chunksize` linhas com cursor no servidor
+    (stream_results): a memória fica limitada a um bloco por vez.
+    """
+    stmt, params = _preparar(sql, params)
+    engine = get_engine()
+    with engine.connect().execution_options(stream_results=True) as con:
+        yield from pd.read_sql(stmt, con, params=params, chunksize=chunksize)
\ No newline at end of file
@@ -0,0 +1,151 @@
+"""
+Modo --acompanhar: relatório do mês corrente atualizado durante o turno.
+
+Guarda uma marca (time, id) da última viagem lida e, a cada intervalo, busca
+no banco só as viagens posteriores a ela (paginação por chave de
+QUERY_VIAGENS_PAGINA). As novas viagens entram no cubo em memória, as seções
+cuja fatia de dados não mudou são reaproveitadas (CacheSecoes) e o PDF é
+escrito num temporário e trocado de uma vez (os.replace), então quem abre o
+arquivo nunca vê um PDF pela metade.
+
+Viagens gravadas com `time` anterior à marca (leituras atrasadas) não são
+vistas pela marca; a cada VERIFICAR_A_CADA ciclos a impressão digital do
+intervalo (COUNT/SUM sobre as mesmas junções da leitura, para que leituras de
+tags não cadastradas não contem) é comparada com o que foi lido e, se
+divergir, o cubo é refeito do zero.
+
+As leituras repetidas do RFID são colapsadas na entrada (leiturasDuplicadas);
+o colapsador guarda a última leitura de cada tag entre os ciclos, então uma
+rajada dividida entre duas consultas também conta como uma viagem. A
+comparação com a impressão digital usa as leituras brutas.
+"""
+import os
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+INTERVALO_PADRAO = 60.0
+VERIFICAR_A_CADA = 10
+
+
+class Acompanhamento:
+    """Estado do acompanhamento de uma obra: marca, cubo e cache das seções."""
+
+    def __init__(self, obra: int, ini: datetime, fim: datetime, nome_obra: str, destino,
+                 detalhamento: tuple = (), prazo: float | None = None, janela_duplicatas: float | None = None):
+        from .cacheSecoes import CacheSecoes
+        from .leiturasDuplicadas import JANELA_PADRAO
+
+        self.obra = obra
+        self.ini = ini
+        self.fim = fim
+        self.nome_obra = nome_obra
+        self.destino = Path(destino)
+        self.detalhamento = detalhamento
+        self.prazo = prazo
+        self.janela_duplicatas = JANELA_PADRAO if janela_duplicatas is None else janela_duplicatas
+        self.cache = CacheSecoes()
+        self._reiniciar()
+
+    def _reiniciar(self) -> None:
+        from .cuboProducao import CuboProducao
+        from .leiturasDuplicadas import ColapsadorLeituras
+
+        self.cubo = CuboProducao()
+        self.colapsador = ColapsadorLeituras(self.janela_duplicatas)
+        self.marca = None
+        self.lidas = 0
+        self.volume = 0.0
+
+    def buscar_novas(self) -> int:
+        """Lê as viagens posteriores à marca e as soma ao cubo; devolve quantas entraram (sem as repetidas)."""
+        import pandas as pd
+        from .extracaoParalela import ler_desde
+
+        # QUERY_VIAGENS_PAGINA usa [ini, fim); o relatório inclui o instante final
+        df, self.marca = ler_desde(self.obra, self.ini, self.fim + timedelta(microseconds=1), self.marca)
+        if df is None:
+            return 0
+        self.lidas += len(df)
+        self.volume += float(pd.to_numeric(df["volume_descarregado"], errors="coerce").sum())
+        df = self.colapsador.aplicar(df)
+        self.cubo.adicionar(df)
+        return len(df)
+
+    def conferir(self) -> bool:
+        """Compara o lido com a impressão digital do banco; refaz o cubo se divergir."""
+        from .impressaoDigital import impressao_viagens
+
+        dados = impressao_viagens(self.obra, self.ini, self.fim, juncoes=True)
+        if dados["linhas"] == self.lidas and abs(dados["volume"] - self.volume) < 0.01:
+            return True
+        self._reiniciar()
+        self.buscar_novas()
+        return False
+
+    def renderizar(self):
+        """Monta o PDF com as seções alteradas e troca o arquivo atomicamente."""
+        from .criarPdfRelatorio import criarPdf
+        from .modoExecucao import nota_modo
+        from .orcamentoTempo import OrcamentoTempo
+
+        self.cache.reiniciar_contagem()
+        orcamento = OrcamentoTempo(self.prazo)
+        self.destino.parent.mkdir(parents=True, exist_ok=True)
+        temporario = self.destino.with_name(f".{self.destino.name}.{os.getpid()}.tmp")
+        try:
+            criarPdf(
+                self.cubo, self.ini, self.fim, self.nome_obra, temporario,
+                orcamento=orcamento, detalhamento=self.detalhamento, cache_secoes=self.cache,
+                nota_modo=nota_modo("streaming"),
+            )
+            os.replace(temporario, self.destino)
+        finally:
+            if temporario.exists():
+                temporario.unlink()
+        return orcamento
+
+
+def acompanhar(obra: int, ini: datetime, fim: datetime, nome_obra: str, destino,
+               intervalo: float = INTERVALO_PADRAO, detalhamento: tuple = (),
+               prazo: float | None = None, ciclos: int | None = None,
+               janela_duplicatas: float | None = None) -> int:
+    """
+    Laço do modo --acompanhar; termina com Ctrl+C, depois de `ciclos` consultas
+    ou quando o período acaba. Devolve o número de PDFs gravados.
+    """
+    estado = Acompanhamento(obra, ini, fim, nome_obra, destino, detalhamento, prazo, janela_duplicatas)
+    gravados = 0
+    ciclo = 0
+    try:
+        while True:
+            t0 = time.perf_counter()
+            novas = estado.buscar_novas()
+            refeito = False
+            if ciclo and ciclo % VERIFICAR_A_CADA == 0:
+                refeito = not estado.conferir()
+            agora = datetime.now().strftime("%H:%M:%S")
+
+            if estado.lidas == 0:
+                print(f"[{agora}] nenhuma viagem no período ainda")
+            elif novas or refeito or gravados == 0:
+                estado.renderizar()
+                gravados += 1
+                motivo = "divergência com o banco, cubo refeito; " if refeito else ""
+                print(
+                    f"[{agora}] {motivo}+{novas} viagem(ns), total {estado.lidas - estado.colapsador.removidas} "
+                    f"({estado.colapsador.removidas} leitura(s) repetida(s) removida(s)); "
+                    f"seções refeitas: {len(estado.cache.renderizadas)}, "
+                    f"reaproveitadas: {len(estado.cache.reutilizadas)} "
+                    f"({time.perf_counter() - t0:.1f} s) -> {estado.destino}"
+                )
+            else:
+                print(f"[{agora}] sem viagens novas")
+
+            ciclo += 1
+            if (ciclos is not None and ciclo >= ciclos) or datetime.now() > fim:
+                break
+            time.sleep(intervalo)
+    except KeyboardInterrupt:
+        print("Acompanhamento interrompido.")
+    return gravados
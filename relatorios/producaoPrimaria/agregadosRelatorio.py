@@ -0,0 +1,455 @@
+"""
+Agregados exibidos no relatório, sem dependência de desenho (só pandas).
+
+As tabelas (diária, por caminhão e por motorista) e os cards de indicadores
+formatam o que sai daqui; a exportação de dados (exportacaoDados) grava os
+mesmos valores, então o PDF e os arquivos exportados nunca divergem.
+Todas as funções aceitam o DataFrame de viagens ou um CuboProducao.
+"""
+from typing import Any, Dict, Tuple
+
+import numpy as np
+import pandas as pd
+
+from utils.primeiraLetraMaiuscula import titlecase_pt
+
+from .cuboProducao import CuboProducao
+from .esbocoQuantis import QUANTIS, faixas_volume, quantis_faixas
+
+
+def _garantir_colunas(df: pd.DataFrame) -> pd.DataFrame:
+    df = df.copy()
+    for col in ("time", "nome", "volume_descarregado", "desc_obra", "prefixo_veiculo"):
+        if col not in df.columns:
+            df[col] = "" if col != "volume_descarregado" else 0.0
+    return df
+
+
+def _normalizar_nomes(s: pd.Series) -> pd.Series:
+    # motoristas: vazios viram "não definido"; nomes em titlecase
+    s = s.fillna("não definido").astype(str).replace("", "não definido")
+    return s.apply(titlecase_pt)
+
+
+def _ordenar_e_arredondar(df_agrupado: pd.DataFrame) -> pd.DataFrame:
+    # maior produção primeiro; valores com 2 casas, como aparecem no relatório
+    df_agrupado = df_agrupado.sort_values("total_descarregado", ascending=False)
+    df_agrupado["total_descarregado"] = df_agrupado["total_descarregado"].astype(float).round(2)
+    df_agrupado["peso_medio"] = df_agrupado["peso_medio"].fillna(0.0).astype(float).round(2)
+    return df_agrupado
+
+
+# ---- produção por dia ----
+def producao_diaria(fonte: pd.DataFrame | CuboProducao) -> pd.DataFrame:
+    """
+    Uma linha por dia: data, prefixos, n_viagens, total_descarregado, peso_medio,
+    hora_primeira_viagem e hora_ultima_viagem (datetime).
+    """
+    # prefixos únicos do dia, em ordem alfabética
+    def unique_join_order(series):
+        res = sorted({str(v).strip() for v in series if str(v).strip()}, key=str.lower)
+        return ", ".join(res)
+
+    if isinstance(fonte, CuboProducao):
+        # totais por dia e caminhões de cada dia vêm direto do cubo
+        df_agrupado = (
+            fonte.agregar_df(por=("dia",), medidas=("viagens", "volume", "tempo_min", "tempo_max"))
+            .rename(columns={
+                "dia": "data",
+                "viagens": "n_viagens",
+                "volume": "total_descarregado",
+                "tempo_min": "hora_primeira_viagem",
+                "tempo_max": "hora_ultima_viagem",
+            })
+        )
+        df_agrupado["peso_medio"] = df_agrupado["total_descarregado"] / df_agrupado["n_viagens"]
+        caminhoes_dia = fonte.agregar_df(por=("dia", "caminhao"), medidas=("viagens",))
+        prefixos = caminhoes_dia.groupby("dia")["caminhao"].agg(lambda s: unique_join_order(s.dropna()))
+        df_agrupado["prefixos"] = df_agrupado["data"].map(prefixos).fillna("")
+    else:
+        df = _garantir_colunas(fonte)
+        df["time"] = pd.to_datetime(df["time"], errors="coerce")
+        df["volume_descarregado"] = pd.to_numeric(df["volume_descarregado"], errors="coerce").fillna(0.0)
+        for col in ("nome", "desc_obra", "prefixo_veiculo"):
+            df[col] = df[col].fillna("").astype(str)
+        df["data"] = df["time"].dt.date
+
+        df_agrupado = (
+            df.groupby("data", dropna=False)
+            .agg(
+                n_viagens=("volume_descarregado", "count"),
+                total_descarregado=("volume_descarregado", "sum"),
+                peso_medio=("volume_descarregado", "mean"),
+                prefixos=("prefixo_veiculo", lambda s: unique_join_order(s)),
+                hora_primeira_viagem=("time", "min"),
+                hora_ultima_viagem=("time", "max"),
+            )
+            .reset_index()
+        )
+
+    # descarta registros sem data
+    df_agrupado = df_agrupado[df_agrupado["data"].notna()].copy()
+    df_agrupado["total_descarregado"] = df_agrupado["total_descarregado"].astype(float).round(2)
+    df_agrupado["peso_medio"] = df_agrupado["peso_medio"].fillna(0.0).astype(float).round(2)
+    return df_agrupado[[
+        "data", "prefixos", "n_viagens", "total_descarregado", "peso_medio",
+        "hora_primeira_viagem", "hora_ultima_viagem",
+    ]].reset_index(drop=True)
+
+
+# ---- produção por caminhão ----
+def producao_por_caminhao(fonte: pd.DataFrame | CuboProducao) -> pd.DataFrame:
+    """Uma linha por caminhão (maior total primeiro): prefixo_veiculo, n_viagens, total_descarregado, peso_medio."""
+    if isinstance(fonte, CuboProducao):
+        # o cubo já traz contagem e soma por caminhão; reagrupa após normalizar nulos
+        df_agrupado = (
+            fonte.agregar_df(por=("caminhao",), medidas=("pesagens", "volume"))
+            .assign(prefixo_veiculo=lambda d: d["caminhao"].fillna("").astype(str))
+            .groupby("prefixo_veiculo")
+            .agg(n_viagens=("pesagens", "sum"), total_descarregado=("volume", "sum"))
+            .reset_index()
+        )
+        df_agrupado["peso_medio"] = (
+            df_agrupado["total_descarregado"] / df_agrupado["n_viagens"].where(df_agrupado["n_viagens"] > 0)
+        )
+    else:
+        df = _garantir_colunas(fonte)
+        df["volume_descarregado"] = pd.to_numeric(df["volume_descarregado"], errors="coerce")
+        df["prefixo_veiculo"] = df["prefixo_veiculo"].fillna("").astype(str)
+
+        df_agrupado = (
+            df.groupby("prefixo_veiculo")
+            .agg(
+                n_viagens=("volume_descarregado", "count"),
+                total_descarregado=("volume_descarregado", "sum"),
+                peso_medio=("volume_descarregado", "mean"),
+            )
+            .reset_index()
+        )
+
+    return _ordenar_e_arredondar(df_agrupado).reset_index(drop=True)
+
+
+# ---- produção por motorista ----
+def producao_por_motorista(fonte: pd.DataFrame | CuboProducao) -> pd.DataFrame:
+    """
+    Uma linha por motorista (maior total primeiro): nome, n_viagens, total_descarregado,
+    peso_medio, dias_com_producao e media_por_dia.
+    """
+    if isinstance(fonte, CuboProducao):
+        # parte do cubo agregado por (motorista, dia) e reagrupa após normalizar os nomes
+        df_dia = fonte.agregar_df(por=("motorista", "dia"), medidas=("pesagens", "volume"))
+        df_dia["nome"] = _normalizar_nomes(df_dia["motorista"])
+        df_dia = df_dia.groupby(["nome", "dia"], as_index=False)[["pesagens", "volume"]].sum()
+
+        df_agrupado = (
+            df_dia.groupby("nome")
+            .agg(n_viagens=("pesagens", "sum"), total_descarregado=("volume", "sum"))
+            .reset_index()
+        )
+        df_agrupado["peso_medio"] = (
+            df_agrupado["total_descarregado"] / df_agrupado["n_viagens"].where(df_agrupado["n_viagens"] > 0)
+        )
+        df_dias = (
+            df_dia[df_dia["volume"] > 0].groupby("nome")["dia"]
+            .nunique()
+            .reset_index(name="dias_com_producao")
+        )
+    else:
+        df = _garantir_colunas(fonte)
+        df["volume_descarregado"] = pd.to_numeric(df["volume_descarregado"], errors="coerce")
+        df["time"] = pd.to_datetime(df["time"], errors="coerce")
+        df["nome"] = _normalizar_nomes(df["nome"])
+
+        df_agrupado = (
+            df.groupby("nome")
+            .agg(
+                n_viagens=("volume_descarregado", "count"),
+                total_descarregado=("volume_descarregado", "sum"),
+                peso_medio=("volume_descarregado", "mean"),
+            )
+            .reset_index()
+        )
+        # dias com produção (>0) por motorista
+        df_valid = df[df["volume_descarregado"] > 0].copy()
+        df_valid["dia"] = df_valid["time"].dt.date
+        df_dias = (
+            df_valid.groupby("nome")["dia"]
+            .nunique()
+            .reset_index(name="dias_com_producao")
+        )
+
+    df_agrupado = df_agrupado.merge(df_dias, on="nome", how="left")
+    df_agrupado["dias_com_producao"] = df_agrupado["dias_com_producao"].fillna(0).astype(int)
+    df_agrupado = _ordenar_e_arredondar(df_agrupado)
+
+    # média por dia: total / dias_com_producao (quando dias > 0)
+    df_agrupado["media_por_dia"] = 0.0
+    mask_dias = df_agrupado["dias_com_producao"] > 0
+    df_agrupado.loc[mask_dias, "media_por_dia"] = (
+        df_agrupado.loc[mask_dias, "total_descarregado"]
+        / df_agrupado.loc[mask_dias, "dias_com_producao"]
+    )
+    df_agrupado["media_por_dia"] = df_agrupado["media_por_dia"].round(2)
+    return df_agrupado.reset_index(drop=True)
+
+
+# ---- distribuição da carga por caminhão / motorista ----
+def distribuicao_carga(fonte: pd.DataFrame | CuboProducao, por: str = "caminhao") -> pd.DataFrame:
+    """
+    Uma linha por caminhão (por="caminhao": prefixo_veiculo) ou motorista
+    (por="motorista": nome), mais pesagens primeiro: pesagens, p10, p50 e p90
+    do volume descarregado (t). Os quantis saem do esboço de esbocoQuantis: no
+    cubo, da distribuição guardada com as células; no DataFrame, do mesmo
+    esboço montado na hora, para os dois caminhos darem os mesmos números.
+    """
+    chave = "prefixo_veiculo" if por == "caminhao" else "nome"
+    if isinstance(fonte, CuboProducao):
+        dist = fonte.distribuicao(por=(por,))
+        grupos = pd.Series(dist[por], dtype=object)
+        faixas, contagens = dist["faixa"], dist["contagem"]
+    else:
+        volumes = pd.to_numeric(fonte["volume_descarregado"], errors="coerce").to_numpy(dtype=float)
+        pesadas = ~np.isnan(volumes)
+        grupos = (fonte[chave] if chave in fonte.columns else pd.Series(None, index=fonte.index))[pesadas]
+        faixas = faixas_volume(volumes[pesadas])
+        contagens = np.ones(len(faixas), dtype=np.int64)
+
+    # normaliza os rótulos distintos (não as linhas) e junta os que ficam iguais
+    codigos, unicos = pd.factorize(grupos, use_na_sentinel=False)
+    unicos = pd.Series(unicos, dtype=object)
+    rotulos = unicos.fillna("").astype(str) if por == "caminhao" else _normalizar_nomes(unicos)
+    codigos_rotulo, nomes = pd.factorize(rotulos)
+    codigos = codigos_rotulo[codigos] if len(codigos) else codigos
+
+    indices, totais, valores = quantis_faixas(codigos, faixas, contagens)
+    df_agrupado = pd.DataFrame({chave: nomes[indices].astype(str), "pesagens": totais})
+    for i, q in enumerate(QUANTIS):
+        df_agrupado[f"p{round(q * 100)}"] = valores[:, i].round(2)
+    return df_agrupado.sort_values(["pesagens", chave], ascending=[False, True]).reset_index(drop=True)
+
+
+# ---- produção por dia x hora (mapa de calor) ----
+def producao_dia_hora(fonte: pd.DataFrame | CuboProducao) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (dias, matriz): dias (datetime64[D]) contínuos do primeiro ao último com
+    viagem e matriz len(dias) x 24 com o volume de cada hora. Numa passada: cada
+    instante vira o número da hora desde o primeiro dia e np.bincount soma os
+    volumes nessas posições.
+    """
+    if isinstance(fonte, CuboProducao):
+        res = fonte.agregar(por=("dia", "hora"), medidas=("volume",))
+        dias = np.array(res["dia"], dtype="datetime64[D]").astype(np.int64)
+        horas = dias * 24 + np.asarray(res["hora"], dtype=np.int64)
+        volumes = np.asarray(res["volume"], dtype=float)
+    else:
+        tempo = pd.to_datetime(fonte["time"], errors="coerce").to_numpy(dtype="datetime64[ns]")
+        validos = ~np.isnat(tempo)
+        horas = tempo[validos].astype("datetime64[h]").astype(np.int64)
+        volumes = pd.to_numeric(fonte["volume_descarregado"], errors="coerce").to_numpy(dtype=float)[validos]
+    volumes = np.nan_to_num(volumes)
+
+    if not len(horas):
+        return np.array([], dtype="datetime64[D]"), np.zeros((0, 24))
+    primeiro_dia = horas.min() // 24
+    posicoes = horas - primeiro_dia * 24
+    n_dias = int(posicoes.max() // 24) + 1
+    matriz = np.bincount(posicoes, weights=volumes, minlength=n_dias * 24).reshape(n_dias, 24)
+    dias = np.datetime64(int(primeiro_dia), "D") + np.arange(n_dias)
+    return dias, matriz
+
+
+# ---- tempo de ciclo dos caminhões ----
+# minutos; intervalos maiores entre viagens do mesmo caminhão no mesmo dia são paradas
+LIMIAR_PARADA_MIN = 60.0
+
+
+def intervalos_caminhoes(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Um registro por par de viagens consecutivas do mesmo caminhão no mesmo dia:
+    caminhao (Categorical), dia (datetime64[D]) e minutos entre as duas. Uma
+    única ordenação (np.lexsort por caminhão e instante) para a frota inteira;
+    as diferenças são tiradas de uma vez e descartadas onde o caminhão ou o dia
+    mudam.
+    """
+    tempo = pd.to_datetime(df["time"], errors="coerce").to_numpy(dtype="datetime64[ns]")
+    caminhao = df["prefixo_veiculo"] if "prefixo_veiculo" in df.columns else pd.Series(None, index=df.index)
+    validos = ~np.isnat(tempo) & caminhao.notna().to_numpy()
+    codigos, nomes = pd.factorize(caminhao[validos].astype(str))
+    instantes = tempo[validos].astype(np.int64)
+
+    ordem = np.lexsort((instantes, codigos))
+    codigos, instantes = codigos[ordem], instantes[ordem]
+    dias = instantes // (86400 * 10**9)
+    mesmo = (codigos[1:] == codigos[:-1]) & (dias[1:] == dias[:-1])
+
+    return pd.DataFrame({
+        "caminhao": pd.Categorical.from_codes(codigos[1:][mesmo], nomes),
+        "dia": dias[1:][mesmo].astype("datetime64[D]"),
+        "minutos": np.diff(instantes)[mesmo] / 6e10,
+    })
+
+
+def _estatisticas_ciclo(intervalos: pd.DataFrame, chave: str, limiar: float) -> pd.DataFrame:
+    # ciclos: intervalos até o limiar (mediana e p90); paradas: os acima dele
+    parada = intervalos["minutos"] > limiar
+    ciclos = intervalos.loc[~parada].groupby(chave, observed=True)["minutos"]
+    paradas = intervalos.loc[parada].groupby(chave, observed=True)["minutos"]
+    resultado = pd.concat({
+        "ciclos": ciclos.size(),
+        "mediana_min": ciclos.median(),
+        "p90_min": ciclos.quantile(0.9),
+        "paradas": paradas.size(),
+        "tempo_parado_h": paradas.sum() / 60.0,
+    }, axis=1)
+    resultado[["ciclos", "paradas"]] = resultado[["ciclos", "paradas"]].fillna(0).astype(int)
+    resultado["tempo_parado_h"] = resultado["tempo_parado_h"].fillna(0.0)
+    return resultado.round({"mediana_min": 1, "p90_min": 1, "tempo_parado_h": 2})
+
+
+def tempos_ciclo(fonte: pd.DataFrame | CuboProducao,
+                 limiar: float = LIMIAR_PARADA_MIN) -> Tuple[pd.DataFrame, pd.DataFrame] | None:
+    """
+    (por_caminhao, por_dia) do tempo entre viagens consecutivas de cada caminhão:
+    - por_caminhao: prefixo_veiculo, ciclos, mediana_min, p90_min, paradas,
+      tempo_parado_h (período inteiro; maior mediana primeiro);
+    - por_dia: data, caminhoes, ciclos, mediana_min, p90_min, paradas,
+      tempo_parado_h (frota inteira, um dia por linha).
+    Intervalos acima de `limiar` minutos contam como paradas e ficam fora da
+    mediana e do p90. O cubo não guarda os instantes das viagens: devolve None.
+    """
+    if isinstance(fonte, CuboProducao):
+        return None
+
+    intervalos = intervalos_caminhoes(fonte)
+    por_caminhao = (
+        _estatisticas_ciclo(intervalos, "caminhao", limiar)
+        .rename_axis("prefixo_veiculo")
+        .reset_index()
+        .astype({"prefixo_veiculo": str})
+        .sort_values(["mediana_min", "prefixo_veiculo"], ascending=[False, True], na_position="last")
+        .reset_index(drop=True)
+    )
+    por_dia = _estatisticas_ciclo(intervalos, "dia", limiar)
+    por_dia.insert(0, "caminhoes", intervalos.groupby("dia")["caminhao"].nunique())
+    por_dia = por_dia.rename_axis("data").reset_index()
+    por_dia["data"] = pd.to_datetime(por_dia["data"]).dt.date
+    return por_caminhao, por_dia
+
+
+# ---- cálculo dos KPIs a partir do cubo de produção ----
+def _calcular_indicadores_cubo(cubo: CuboProducao) -> Dict[str, Any]:
+    producao_total = float(cubo.total("volume") or 0.0)
+    num_viagens = int(cubo.total("viagens") or 0)
+
+    def mais_produtivo(dim: str) -> str:
+        res = cubo.agregar(por=(dim,), medidas=("volume",))
+        validos = [i for i, v in enumerate(res[dim]) if v is not None]
+        if not validos:
+            return ""
+        melhor = max(validos, key=lambda i: res["volume"][i])
+        return titlecase_pt(res[dim][melhor])
+
+    dias = cubo.agregar(por=("dia",), medidas=("volume",))
+    dias_ativos = len(dias["dia"])
+    dia_mais = None
+    dia_menos = None
+    if dias_ativos:
+        dia_mais = dias["dia"][dias["volume"].argmax()]
+        positivos = dias["volume"] > 0
+        if positivos.any():
+            idx = positivos.nonzero()[0]
+            dia_menos = dias["dia"][idx[dias["volume"][idx].argmin()]]
+
+    return dict(
+        producao_total=producao_total,
+        num_viagens=num_viagens,
+        caminhao_mais_prod=mais_produtivo("caminhao"),
+        motorista_mais_prod=mais_produtivo("motorista"),
+        producao_media_dia=(producao_total / dias_ativos) if dias_ativos > 0 else 0.0,
+        dia_mais=dia_mais,
+        dia_menos=dia_menos,
+        dias_ativos=dias_ativos
+    )
+
+
+# ---- cálculo dos KPIs a partir do DataFrame ----
+def calcular_indicadores(df: pd.DataFrame | CuboProducao) -> Dict[str, Any]:
+    """
+    Espera df com colunas: 'time' (datetime-like), 'volume_descarregado' (numérico),
+    'prefixo_veiculo' (str) e 'nome' (motorista) — adapta quando colunas faltarem.
+    Aceita também um CuboProducao já montado.
+    """
+    if isinstance(df, CuboProducao):
+        return _calcular_indicadores_cubo(df)
+
+    df = df.copy()
+    # garante colunas
+    for col in ("time", "volume_descarregado", "prefixo_veiculo", "nome"):
+        if col not in df.columns:
+            df[col] = None
+
+    # converte time
+    df["time"] = pd.to_datetime(df["time"], errors="coerce")
+    df["volume_descarregado"] = pd.to_numeric(df["volume_descarregado"], errors="coerce").fillna(0.0)
+
+    # producao total no período
+    producao_total = float(df["volume_descarregado"].sum())
+
+    # numero total de viagens (contagem de registros onde volume > 0)
+    num_viagens = int(df.shape[0])
+
+    # caminhão mais produtivo (por soma de volume)
+    if df["prefixo_veiculo"].notna().any():
+        cam_prod = (
+            df.groupby("prefixo_veiculo")["volume_descarregado"]
+            .sum()
+            .sort_values(ascending=False)
+        )
+        caminhao_mais_prod = cam_prod.index[0] if not cam_prod.empty else ""
+    else:
+        caminhao_mais_prod = ""
+
+    # motorista mais produtivo
+    if df["nome"].notna().any():
+        mot_prod = (
+            df.groupby("nome")["volume_descarregado"]
+            .sum()
+            .sort_values(ascending=False)
+        )
+        motorista_mais_prod = mot_prod.index[0] if not mot_prod.empty else ""
+    else:
+        motorista_mais_prod = ""
+
+    # produção média por dia (considera dias com pelo menos um registro)
+    df["data"] = df["time"].dt.date
+    dias_ativos = df["data"].nunique()
+    producao_media_dia = (producao_total / dias_ativos) if dias_ativos > 0 else 0.0
+
+    # dia com maior e menor produção (menor > 0)
+    agrup_dias = df.groupby("data")["volume_descarregado"].sum().dropna()
+    dia_mais = None
+    dia_menos = None
+    if not agrup_dias.empty:
+        dia_mais = agrup_dias.idxmax()
+        # menor produção não-zero:
+        agrup_pos = agrup_dias[agrup_dias > 0]
+        if not agrup_pos.empty:
+            dia_menos = agrup_pos.idxmin()
+        else:
+            dia_menos = None
+
+    # normaliza strings com titlecase_pt (aplica se não vazio)
+    caminhao_mais_prod = titlecase_pt(caminhao_mais_prod) if caminhao_mais_prod else ""
+    motorista_mais_prod = titlecase_pt(motorista_mais_prod) if motorista_mais_prod else ""
+
+    return dict(
+        producao_total=producao_total,
+        num_viagens=num_viagens,
+        caminhao_mais_prod=caminhao_mais_prod,
+        motorista_mais_prod=motorista_mais_prod,
+        producao_media_dia=producao_media_dia,
+        dia_mais=dia_mais,
+        dia_menos=dia_menos,
+        dias_ativos=dias_ativos
+    )
@@ -0,0 +1,73 @@
+"""
+Cache local dos agregados (cubo) por obra e período.
+
+O cubo vem de QUERY_AGREGADOS_VIAGENS (agregado no banco) e é gravado em
+.cache/agregados na raiz do projeto. O nome do arquivo leva a impressão digital
+das viagens do período (impressaoDigital.impressao_viagens: contagem, última
+leitura e volume): um período encerrado que recebe leituras atrasadas ou
+correções gera outro arquivo, e o antigo é apagado.
+
+Com janela > 0 o cubo é montado das viagens lidas em blocos (streaming), sem
+as leituras repetidas do RFID (leiturasDuplicadas), como no período atual.
+"""
+import hashlib
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+PASTA_CACHE = PROJECT_ROOT / ".cache" / "agregados"
+
+
+def prefixo_cache(obra: int, ini: datetime, fim: datetime) -> str:
+    return f"cubo_{obra}_{ini:%Y%m%d%H%M%S}_{fim:%Y%m%d%H%M%S}"
+
+
+def caminho_cache(obra: int, ini: datetime, fim: datetime, impressao: dict, janela: float = 0.0) -> Path:
+    chave = {"impressao": impressao, "janela": float(janela)}
+    resumo = hashlib.sha1(json.dumps(chave, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+    return PASTA_CACHE / f"{prefixo_cache(obra, ini, fim)}_{resumo[:16]}.npz"
+
+
+def _apagar_antigos(caminho: Path, prefixo: str) -> None:
+    for antigo in PASTA_CACHE.glob(f"{prefixo}*.npz"):
+        if antigo != caminho:
+            try:
+                antigo.unlink()
+            except OSError:
+                pass
+
+
+def cubo_agregado(obra: int, ini: datetime, fim: datetime, impressao: dict | None = None,
+                  janela: float = 0.0, usar_cache: bool = True):
+    """
+    Devolve (cubo, origem), origem "cache" ou "banco"; grava o cubo lido do banco.
+    impressao: impressao_viagens do período, quando já consultada.
+    janela: colapsa as leituras repetidas do RFID (0: agregado no banco, sem colapso).
+    """
+    from .cuboProducao import CuboProducao
+    from .impressaoDigital import impressao_viagens
+    from .leiturasDuplicadas import ColapsadorLeituras
+    from .modoExecucao import carregar_viagens
+
+    if impressao is None:
+        impressao = impressao_viagens(obra, ini, fim)
+    caminho = caminho_cache(obra, ini, fim, impressao, janela)
+    if usar_cache and caminho.exists():
+        try:
+            return CuboProducao.carregar(caminho), "cache"
+        except (OSError, ValueError, KeyError):
+            pass  # arquivo corrompido: relê do banco
+
+    if janela > 0:
+        cubo = carregar_viagens(obra, ini, fim, "streaming", colapsador=ColapsadorLeituras(janela))
+    else:
+        cubo = carregar_viagens(obra, ini, fim, "agregado")
+    PASTA_CACHE.mkdir(parents=True, exist_ok=True)
+    temporario = caminho.with_name(f".{caminho.name}.{os.getpid()}.tmp")
+    with open(temporario, "wb") as f:
+        cubo.salvar(f)
+    os.replace(temporario, caminho)
+    _apagar_antigos(caminho, prefixo_cache(obra, ini, fim))
+    return cubo, "banco"
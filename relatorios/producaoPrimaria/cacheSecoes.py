@@ -0,0 +1,178 @@
+"""
+Caches das seções do relatório.
+
+CacheSecoes (em memória, modo --acompanhar): cada seção (etapa do orçamento)
+guarda a assinatura da fatia de dados que consome — o roll-up do cubo pelas
+dimensões que ela usa — e os flowables que gerou. Numa nova montagem, só as
+seções cuja fatia mudou são refeitas; as demais são copiadas do cache (o
+ReportLab altera os flowables durante o build, por isso cada uso recebe uma
+cópia).
+
+CachePecas (em disco, entre execuções): guarda as peças de cada seção — PNG
+dos gráficos, linhas formatadas de cada bloco de max_linhas das tabelas e os
+valores dos indicadores — sob uma chave feita da fatia de entrada da peça,
+dos parâmetros que mudam o desenho e da versão do renderizador. Na geração
+diária do mês corrente, só as peças cuja fatia mudou (ex.: o último bloco da
+tabela diária e os gráficos) são refeitas.
+"""
+import copy
+import hashlib
+import io
+import os
+import pickle
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from .cuboProducao import DIMENSOES, CuboProducao
+
+# dimensões do roll-up lido por cada seção
+ENTRADAS_SECOES = {
+    "indicadores": ("dia", "caminhao", "motorista"),
+    "grafico_diario": ("dia",),
+    "grafico_horario": ("dia", "hora"),
+    "tabela_diaria": ("dia", "caminhao"),
+    "grafico_caminhoes": ("caminhao",),
+    "tabela_caminhoes": ("caminhao",),
+    "grafico_motoristas": ("motorista",),
+    "tabela_motoristas": ("motorista", "dia"),
+    "tabela_ciclos": ("caminhao", "dia", "hora"),
+    "tabela_cargas": ("caminhao", "motorista"),
+    "detalhamento_caminhoes": ("caminhao", "dia"),
+    "detalhamento_motoristas": ("motorista", "dia"),
+}
+# seções que leem também a distribuição do volume (CuboProducao.distribuicao)
+DISTRIBUICAO_SECOES = {
+    "tabela_cargas": ("caminhao", "motorista"),
+}
+
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+PASTA_PECAS = PROJECT_ROOT / ".cache" / "pecas"
+
+# peças sem uso há mais que isso são apagadas por CachePecas.podar
+IDADE_MAX_PECAS = 40 * 24 * 3600
+
+
+def assinatura_df(dados: pd.DataFrame) -> str:
+    """Hash do conteúdo de um DataFrame (colunas e valores, sem o índice)."""
+    h = hashlib.sha1("|".join(map(str, dados.columns)).encode())
+    h.update(pd.util.hash_pandas_object(dados, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def assinatura_entrada(fonte: pd.DataFrame | CuboProducao, etapa: str) -> str:
+    """Hash da fatia de dados que a seção consome."""
+    if isinstance(fonte, CuboProducao):
+        por = ENTRADAS_SECOES.get(etapa, DIMENSOES)
+        assinatura = assinatura_df(fonte.agregar_df(por=por))
+        if etapa in DISTRIBUICAO_SECOES:
+            dist = fonte.distribuicao(por=DISTRIBUICAO_SECOES[etapa])
+            assinatura += assinatura_df(pd.DataFrame(dist))
+        return assinatura
+    # sem cubo não há roll-up barato: vale o DataFrame inteiro
+    h = hashlib.sha1()
+    h.update(pd.util.hash_pandas_object(fonte, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+class CacheSecoes:
+    """Flowables por seção, refeitos apenas quando a entrada (ou a variante) muda."""
+
+    def __init__(self):
+        self._secoes = {}
+        self.renderizadas = []
+        self.reutilizadas = []
+
+    def obter(self, etapa: str, fonte, variante: str, construir) -> list:
+        assinatura = (variante, assinatura_entrada(fonte, etapa))
+        atual = self._secoes.get(etapa)
+        if atual is not None and atual[0] == assinatura:
+            self.reutilizadas.append(etapa)
+        else:
+            atual = self._secoes[etapa] = (assinatura, construir())
+            self.renderizadas.append(etapa)
+        return copy.deepcopy(atual[1])
+
+    def reiniciar_contagem(self) -> None:
+        self.renderizadas = []
+        self.reutilizadas = []
+
+
+class CachePecas:
+    """
+    Peças das seções gravadas em disco (uma por arquivo, escrita atômica).
+
+    partes: tudo o que determina a peça além do código — assinaturas das
+    fatias de entrada, variante, dpi, textos desenhados. A versão do
+    renderizador entra na chave, então mudar o código invalida as peças.
+    """
+
+    def __init__(self, pasta=PASTA_PECAS):
+        self.pasta = Path(pasta)
+        self.refeitas = []
+        self.reaproveitadas = []
+
+    def chave(self, nome: str, partes: tuple) -> str:
+        from .impressaoDigital import versao_renderizador
+
+        texto = repr((nome, tuple(partes), versao_renderizador()))
+        return hashlib.sha256(texto.encode()).hexdigest()
+
+    def _obter(self, nome: str, partes: tuple, extensao: str, construir, ler, gravar):
+        caminho = self.pasta / f"{nome}_{self.chave(nome, partes)[:32]}.{extensao}"
+        try:
+            valor = ler(caminho)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            pass
+        else:
+            os.utime(caminho)  # marca o uso, para a poda
+            self.reaproveitadas.append(nome)
+            return valor
+
+        valor = construir()
+        self.pasta.mkdir(parents=True, exist_ok=True)
+        temporario = caminho.with_name(f".{caminho.name}.{os.getpid()}.tmp")
+        gravar(temporario, valor)
+        os.replace(temporario, caminho)
+        self.refeitas.append(nome)
+        return valor
+
+    def imagem(self, nome: str, partes: tuple, construir) -> io.BytesIO:
+        """PNG de um gráfico; construir devolve o BytesIO gerado pelo matplotlib."""
+        dados = self._obter(
+            nome, partes, "png", lambda: construir().getvalue(),
+            ler=lambda c: c.read_bytes(),
+            gravar=lambda c, v: c.write_bytes(v),
+        )
+        return io.BytesIO(dados)
+
+    def valor(self, nome: str, partes: tuple, construir):
+        """Valores simples (linhas formatadas de uma tabela, indicadores)."""
+        def gravar(caminho, valor):
+            with open(caminho, "wb") as f:
+                pickle.dump(valor, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+        def ler(caminho):
+            with open(caminho, "rb") as f:
+                return pickle.load(f)
+
+        return self._obter(nome, partes, "pkl", construir, ler, gravar)
+
+    def podar(self, idade_max: float = IDADE_MAX_PECAS) -> int:
+        """Apaga as peças sem uso há mais de idade_max segundos; devolve quantas."""
+        limite = time.time() - idade_max
+        apagadas = 0
+        for arquivo in self.pasta.glob("*.*"):
+            try:
+                if arquivo.stat().st_mtime < limite:
+                    arquivo.unlink()
+                    apagadas += 1
+            except OSError:
+                pass
+        return apagadas
+
+    def resumo(self) -> str:
+        total = len(self.refeitas) + len(self.reaproveitadas)
+        return f"Peças do relatório: {len(self.reaproveitadas)} de {total} reaproveitadas de {self.pasta}"
@@ -0,0 +1,210 @@
+"""
+Comparação com o período anterior equivalente (--comparar).
+
+O período de comparação é lido só como agregados: um cubo reaproveitado do
+cache local de agregados (cacheAgregados) enquanto a impressão digital das
+viagens do período não mudar. As leituras repetidas do RFID
+(leiturasDuplicadas) são tratadas como no período atual: com o colapso ativo o
+cubo é montado das viagens em blocos, sem as repetidas; sem ele (janela 0 ou
+modo agregado) vem de QUERY_AGREGADOS_VIAGENS, somado no banco. O PDF diz qual
+dos dois foi usado.
+
+As variações são calculadas de uma vez para cada tabela: os agregados do
+período anterior viram uma Series indexada pela chave (caminhão, motorista ou
+dia equivalente) e cada linha atual busca o seu valor com Series.map.
+
+- anterior: período imediatamente antes; meses inteiros comparam com os meses
+  anteriores (setembro -> agosto), um trecho que começa no dia 1 com o mesmo
+  trecho dos meses anteriores (1 a 19/10 -> 1 a 19/09), os demais com o
+  intervalo de mesma duração;
+- ano: mesmo período do ano anterior.
+
+Um período ainda em aberto (o mês corrente, padrão da linha de comando) só é
+comparado até o instante equivalente a agora, arredondado para o fim da hora
+corrente: 19 dias de outubro comparam com 19 dias de setembro, não com o mês
+inteiro.
+"""
+from datetime import datetime, timedelta
+from functools import cached_property
+from typing import Dict, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .agregadosRelatorio import (
+    calcular_indicadores, producao_diaria, producao_por_caminhao, producao_por_motorista,
+)
+from .cuboProducao import CuboProducao
+
+TIPOS = ("anterior", "ano")
+# indicadores dos cards que ganham a variação
+INDICADORES_COMPARADOS = ("producao_total", "num_viagens", "producao_media_dia")
+
+
+# ---------------------------------------------------------------------
+# Períodos
+# ---------------------------------------------------------------------
+
+def _meses_inteiros(ini: datetime, fim: datetime) -> int:
+    """Quantos meses inteiros [ini, fim] cobre (0 se não começar e terminar em limites de mês)."""
+    if not _inicio_mes(ini):
+        return 0
+    proximo = fim + timedelta(seconds=1)
+    if proximo != proximo.replace(day=1, hour=0, minute=0, second=0, microsecond=0):
+        return 0
+    return (proximo.year - ini.year) * 12 + proximo.month - ini.month
+
+
+def _inicio_mes(ini: datetime) -> bool:
+    return ini == ini.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def corte_periodo(ini: datetime, fim: datetime, agora: datetime | None = None) -> datetime:
+    """Fim efetivo de [ini, fim]: o fim da hora corrente quando o período ainda está em aberto."""
+    agora = agora or datetime.now()
+    if not ini <= agora < fim:
+        return fim
+    fim_hora = agora.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1) - timedelta(seconds=1)
+    return min(fim, fim_hora)
+
+
+def periodo_comparacao(ini: datetime, fim: datetime, tipo: str,
+                       agora: datetime | None = None) -> Tuple[datetime, datetime, pd.DateOffset]:
+    """
+    (ini, fim) do período de comparação e o deslocamento que leva um dia do
+    período atual ao dia equivalente do anterior. Período em aberto: o fim
+    da comparação acompanha o tempo decorrido (corte_periodo).
+    """
+    corte = corte_periodo(ini, fim, agora)
+    if tipo == "ano":
+        deslocamento = pd.DateOffset(years=1)
+        return (ini - deslocamento).to_pydatetime(), (corte - deslocamento).to_pydatetime(), deslocamento
+    if tipo != "anterior":
+        raise ValueError(f"Comparação desconhecida: {tipo}")
+
+    meses = _meses_inteiros(ini, fim)
+    if meses and corte == fim:
+        deslocamento = pd.DateOffset(months=meses)
+        ini_ant = (ini - deslocamento).to_pydatetime()
+        return ini_ant, ini - timedelta(seconds=1), deslocamento
+    if _inicio_mes(ini):
+        # do dia 1 até o corte: o mesmo trecho dos meses anteriores
+        deslocamento = pd.DateOffset(months=(corte.year - ini.year) * 12 + corte.month - ini.month + 1)
+        return (ini - deslocamento).to_pydatetime(), (corte - deslocamento).to_pydatetime(), deslocamento
+    duracao = fim - ini + timedelta(seconds=1)
+    deslocamento = pd.DateOffset(days=max(1, round(duracao / timedelta(days=1))))
+    return ini - duracao, corte - duracao, deslocamento
+
+
+def rotulo_comparacao(tipo: str, ini: datetime, fim: datetime) -> str:
+    """Texto curto do período de comparação para o relatório."""
+    datas = f"{ini:%d/%m/%Y} a {fim:%d/%m/%Y}"
+    if tipo == "ano":
+        return f"mesmo período de {ini.year} ({datas})"
+    if _meses_inteiros(ini, fim) == 1:
+        return f"mês anterior ({datas})"
+    if _inicio_mes(ini) and (ini.year, ini.month) == (fim.year, fim.month):
+        return f"mesmo trecho do mês anterior ({datas})"
+    return f"período anterior ({datas})"
+
+
+# ---------------------------------------------------------------------
+# Variações
+# ---------------------------------------------------------------------
+
+def variacao(atual, anterior) -> pd.Series:
+    """Variação percentual (atual / anterior - 1) * 100; NaN sem base (anterior nulo ou zero)."""
+    atual = pd.to_numeric(pd.Series(atual), errors="coerce").astype(float)
+    anterior = pd.to_numeric(pd.Series(anterior, index=atual.index), errors="coerce").astype(float)
+    base = anterior.where(anterior > 0)
+    return (atual / base - 1.0) * 100.0
+
+
+def fmt_variacao(v) -> str:
+    """"+12,3%" / "-4,0%"; "-" quando não há base de comparação."""
+    if v is None or not np.isfinite(v):
+        return "-"
+    return f"{v:+.1f}%".replace(".", ",")
+
+
+class ComparacaoPeriodo:
+    """Agregados do período de comparação e as variações das seções do relatório."""
+
+    def __init__(self, tipo: str, ini: datetime, fim: datetime, fonte: CuboProducao | pd.DataFrame,
+                 origem: str = "", periodo: Tuple | None = None, janela: float = 0.0):
+        """
+        periodo: o resultado de periodo_comparacao já calculado (o corte depende da hora).
+        janela: janela de colapso das leituras repetidas usada nos dois períodos (0: sem colapso).
+        """
+        self.tipo = tipo
+        self.ini, self.fim, self.deslocamento = periodo or periodo_comparacao(ini, fim, tipo)
+        self.fonte = fonte
+        self.origem = origem
+        self.janela = float(janela)
+        self.rotulo = rotulo_comparacao(tipo, self.ini, self.fim)
+
+    @classmethod
+    def carregar(cls, obra: int, ini: datetime, fim: datetime, tipo: str,
+                 periodo: Tuple | None = None, impressao: dict | None = None,
+                 janela: float = 0.0) -> "ComparacaoPeriodo":
+        """
+        Lê o período de comparação como cubo agregado, do cache local quando possível.
+        impressao: impressao_viagens do período de comparação, quando já consultada.
+        janela: a mesma do período atual (0 quando ele não colapsa as leituras repetidas).
+        """
+        from .cacheAgregados import cubo_agregado
+
+        periodo = periodo or periodo_comparacao(ini, fim, tipo)
+        ini_ant, fim_ant, _ = periodo
+        cubo, origem = cubo_agregado(obra, ini_ant, fim_ant, impressao, janela)
+        return cls(tipo, ini, fim, cubo, origem, periodo, janela)
+
+    @property
+    def nota(self) -> str:
+        """Como as leituras repetidas do RFID entram nos dois lados da comparação."""
+        if self.janela > 0:
+            return f"Leituras repetidas do RFID colapsadas nos dois períodos (janela de {self.janela:g} s)."
+        return "Leituras repetidas do RFID não colapsadas em nenhum dos dois períodos."
+
+    # agregados do período anterior, calculados uma vez
+    @cached_property
+    def indicadores(self) -> Dict:
+        return calcular_indicadores(self.fonte)
+
+    @cached_property
+    def _totais_caminhoes(self) -> pd.Series:
+        df = producao_por_caminhao(self.fonte)
+        return df.set_index("prefixo_veiculo")["total_descarregado"]
+
+    @cached_property
+    def _totais_motoristas(self) -> pd.Series:
+        df = producao_por_motorista(self.fonte)
+        return df.set_index("nome")["total_descarregado"]
+
+    @cached_property
+    def _totais_diarios(self) -> pd.Series:
+        df = producao_diaria(self.fonte)
+        return pd.Series(df["total_descarregado"].to_numpy(), index=pd.to_datetime(df["data"]))
+
+    def variacao_indicadores(self, atuais: Dict) -> Dict[str, float]:
+        """{indicador: variação %} dos indicadores numéricos dos cards."""
+        chaves = list(INDICADORES_COMPARADOS)
+        resultado = variacao([atuais.get(k) for k in chaves], [self.indicadores.get(k) for k in chaves])
+        return dict(zip(chaves, resultado.tolist()))
+
+    def com_variacao_caminhoes(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Tabela por caminhão com a coluna var_total (produção vs o mesmo caminhão no período anterior)."""
+        anterior = df["prefixo_veiculo"].map(self._totais_caminhoes)
+        return df.assign(var_total=variacao(df["total_descarregado"], anterior).to_numpy())
+
+    def com_variacao_motoristas(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Tabela por motorista com a coluna var_total."""
+        anterior = df["nome"].map(self._totais_motoristas)
+        return df.assign(var_total=variacao(df["total_descarregado"], anterior).to_numpy())
+
+    def com_variacao_diaria(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Tabela diária com a coluna var_total (produção vs o dia equivalente do período anterior)."""
+        equivalentes = pd.DatetimeIndex(pd.to_datetime(df["data"])) - self.deslocamento
+        anterior = self._totais_diarios.reindex(equivalentes).to_numpy()
+        return df.assign(var_total=variacao(df["total_descarregado"].to_numpy(), anterior).to_numpy())
+
@@ -0,0 +1,174 @@
+"""
+Consultas SQL do relatório de produção primária.
+"""
+
+# junções das viagens (compartilhadas por todas as variantes da consulta)
+_JUNCOES_VIAGENS = """
+                FROM ossj_contador_primario AS cp
+                         JOIN ossj_veiculo_sensor_rfid AS v
+                              ON cp.user_id_device = v.user_id_sensor
+                         JOIN ossj_sensor_rfid AS sr
+                              ON sr.device_id = cp.device_id
+                         JOIN ossj_cad_obra AS o
+                              ON o.id = sr.local_instalacao
+                         LEFT JOIN ossj_motoristas_rocha AS mr
+                                   ON mr.id = cp.motorista
+                         LEFT JOIN ossj_cad_func AS f
+                                   ON f.id = mr.id_motorista
+"""
+
+_SELECT_VIAGENS = """
+                SELECT cp.`time`,
+                       cp.user_id_device,
+                       v.prefixo_veiculo,
+                       f.nome,
+                       cp.volume_descarregado,
+                       o.desc_obra{colunas_extra}""" + _JUNCOES_VIAGENS
+
+# viagens de uma obra em um período
+QUERY_VIAGENS = _SELECT_VIAGENS.format(colunas_extra="") + """
+                WHERE cp.codigo_planta = :obra
+                  AND cp.`time` BETWEEN :ini AND :fim
+                ORDER BY cp.`time`
+"""
+
+# uma página de viagens de uma partição [ini, fim) com paginação por chave (time, id):
+# cada página continua da última (time, id) lida, sem OFFSET
+QUERY_VIAGENS_PAGINA = _SELECT_VIAGENS.format(colunas_extra=",\n                       cp.id AS id_viagem") + """
+                WHERE cp.codigo_planta = :obra
+                  AND cp.`time` >= :ini AND cp.`time` < :fim
+                  AND (cp.`time` > :ultimo_time OR (cp.`time` = :ultimo_time AND cp.id > :ultimo_id))
+                ORDER BY cp.`time`, cp.id
+                LIMIT :limite
+"""
+
+# tamanho do resultado de QUERY_VIAGENS sem as junções (usa o índice de codigo_planta/time)
+QUERY_CONTAR_VIAGENS = """
+                SELECT COUNT(*) AS linhas
+                FROM ossj_contador_primario AS cp
+                WHERE cp.codigo_planta = :obra
+                  AND cp.`time` BETWEEN :ini AND :fim
+"""
+
+# impressão digital do intervalo: muda quando entra, sai ou é corrigida uma viagem
+QUERY_IMPRESSAO_VIAGENS = """
+                SELECT COUNT(*) AS linhas,
+                       MAX(cp.`time`) AS ultimo,
+                       SUM(cp.volume_descarregado) AS volume
+                FROM ossj_contador_primario AS cp
+                WHERE cp.codigo_planta = :obra
+                  AND cp.`time` BETWEEN :ini AND :fim
+"""
+
+# a mesma impressão digital sobre as junções de QUERY_VIAGENS: conta só as viagens que
+# as consultas das viagens devolvem (sem as leituras de tags não cadastradas)
+QUERY_IMPRESSAO_VIAGENS_JUNCOES = """
+                SELECT COUNT(*) AS linhas,
+                       MAX(cp.`time`) AS ultimo,
+                       SUM(cp.volume_descarregado) AS volume""" + _JUNCOES_VIAGENS + """
+                WHERE cp.codigo_planta = :obra
+                  AND cp.`time` BETWEEN :ini AND :fim
+"""
+
+# estimativa do otimizador (coluna rows do EXPLAIN), sem percorrer o intervalo
+QUERY_EXPLAIN_VIAGENS = "EXPLAIN" + QUERY_CONTAR_VIAGENS.replace("COUNT(*) AS linhas", "cp.id")
+
+# QUERY_VIAGENS já agregada no banco por célula do cubo (obra, dia, hora, caminhão, motorista)
+QUERY_AGREGADOS_VIAGENS = """
+                SELECT o.desc_obra,
+                       DATE(cp.`time`) AS dia,
+                       HOUR(cp.`time`) AS hora,
+                       v.prefixo_veiculo,
+                       f.nome,
+                       SUM(cp.volume_descarregado) AS volume,
+                       COUNT(*) AS viagens,
+                       COUNT(cp.volume_descarregado) AS pesagens,
+                       MIN(cp.volume_descarregado) AS volume_min,
+                       MAX(cp.volume_descarregado) AS volume_max,
+                       MIN(cp.`time`) AS tempo_min,
+                       MAX(cp.`time`) AS tempo_max""" + _JUNCOES_VIAGENS + """
+                WHERE cp.codigo_planta = :obra
+                  AND cp.`time` BETWEEN :ini AND :fim
+                GROUP BY o.desc_obra, DATE(cp.`time`), HOUR(cp.`time`), v.prefixo_veiculo, f.nome
+"""
+
+# distribuição do volume (esbocoQuantis) agregada no banco: contagem de pesagens por
+# (obra, dia, caminhão, motorista, faixa); faixa = CEIL(LN(volume) / LN(GAMA))
+QUERY_FAIXAS_VOLUME = """
+                SELECT o.desc_obra,
+                       DATE(cp.`time`) AS dia,
+                       v.prefixo_veiculo,
+                       f.nome,
+                       CASE WHEN cp.volume_descarregado > :volume_minimo
+                            THEN CEIL(LN(cp.volume_descarregado) / :ln_gama)
+                            ELSE :faixa_zero END AS faixa,
+                       COUNT(*) AS contagem""" + _JUNCOES_VIAGENS + """
+                WHERE cp.codigo_planta = :obra
+                  AND cp.`time` BETWEEN :ini AND :fim
+                  AND cp.volume_descarregado IS NOT NULL
+                GROUP BY o.desc_obra, DATE(cp.`time`), v.prefixo_veiculo, f.nome, faixa
+"""
+
+# produção de todas as obras por dia numa só varredura (relatório consolidado), com as
+# junções das viagens de cada relatório; caminhoes conta as tags distintas do dia, base
+# da produtividade por caminhão·dia. Sem colapso das leituras repetidas (--janela-duplicatas 0)
+_QUERY_CONSOLIDADO_OBRAS = """
+                SELECT cp.codigo_planta AS obra,
+                       o.desc_obra,
+                       DATE(cp.`time`) AS dia,
+                       SUM(cp.volume_descarregado) AS volume,
+                       COUNT(*) AS viagens,
+                       COUNT(cp.volume_descarregado) AS pesagens,
+                       COUNT(DISTINCT cp.user_id_device) AS caminhoes""" + _JUNCOES_VIAGENS + """
+                WHERE cp.`time` BETWEEN :ini AND :fim{filtro_obras}
+                GROUP BY cp.codigo_planta, o.desc_obra, DATE(cp.`time`)
+"""
+# as mesmas viagens linha a linha, em ordem de tempo, para colapsar as leituras
+# repetidas antes de agregar (como no relatório de cada obra)
+_QUERY_VIAGENS_CONSOLIDADO = """
+                SELECT cp.codigo_planta AS obra,
+                       o.desc_obra,
+                       cp.`time`,
+                       cp.user_id_device,
+                       cp.volume_descarregado""" + _JUNCOES_VIAGENS + """
+                WHERE cp.`time` BETWEEN :ini AND :fim{filtro_obras}
+                ORDER BY cp.`time`
+"""
+_FILTRO_OBRAS = "\n                  AND cp.codigo_planta IN :obras"
+QUERY_CONSOLIDADO_OBRAS = _QUERY_CONSOLIDADO_OBRAS.format(filtro_obras="")
+QUERY_CONSOLIDADO_OBRAS_FILTRO = _QUERY_CONSOLIDADO_OBRAS.format(filtro_obras=_FILTRO_OBRAS)
+QUERY_VIAGENS_CONSOLIDADO = _QUERY_VIAGENS_CONSOLIDADO.format(filtro_obras="")
+QUERY_VIAGENS_CONSOLIDADO_FILTRO = _QUERY_VIAGENS_CONSOLIDADO.format(filtro_obras=_FILTRO_OBRAS)
+
+# sensores RFID instalados na obra (inclusive os que não leram nada no período)
+QUERY_SENSORES_OBRA = "SELECT device_id FROM ossj_sensor_rfid WHERE local_instalacao = :obra"
+
+# instantes das leituras de cada sensor, sem as junções das viagens: leituras de tags
+# não cadastradas também mostram o sensor funcionando; usa o índice de codigo_planta/time
+QUERY_LEITURAS_SENSORES = """
+                SELECT cp.device_id,
+                       cp.`time`
+                FROM ossj_contador_primario AS cp
+                WHERE cp.codigo_planta = :obra
+                  AND cp.`time` BETWEEN :ini AND :fim
+                ORDER BY cp.`time`
+"""
+
+QUERY_NOME_OBRA = "SELECT desc_obra FROM ossj_cad_obra WHERE id = :obra"
+
+QUERY_NOMES_OBRAS = "SELECT id, desc_obra FROM ossj_cad_obra WHERE id IN :obras"
+
+
+def query_viagens_lote(n_periodos: int) -> str:
+    """
+    Viagens de várias obras (:obras) em vários períodos (:ini0/:fim0, :ini1/:fim1, ...)
+    numa única varredura; traz codigo_planta para separar as obras em memória.
+    """
+    periodos = "\n                   OR ".join(
+        f"cp.`time` BETWEEN :ini{i} AND :fim{i}" for i in range(n_periodos)
+    )
+    return _SELECT_VIAGENS.format(colunas_extra=",\n                       cp.codigo_planta") + f"""
+                WHERE cp.codigo_planta IN :obras
+                  AND ({periodos})
+                ORDER BY cp.`time`
+"""
@@ -1,9 +1,10 @@
 from datetime import timezone, timedelta, datetime
+from functools import lru_cache
 from pathlib import Path
 
 import pandas as pd
 from reportlab.lib.pagesizes import A4
-from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
 from reportlab.lib.units import cm
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
@@ -14,11 +15,29 @@ from reportlab.platypus import (
 
 from .tabelaProducaoDiaria import criarTabelaProducaoDiaria
 from .graficoProducaoDiaria import graficoLinhaProducaoDiaria
+from .graficoMapaCalorHorario import graficoMapaCalorHorario
 from .cardsIndicadores import criar_cards_indicadores
 from .graficoProducaoPorCaminhao import graficoProducaoCaminhao
 from .tabelaProducaoCaminhao import criarTabelaProducaoPorCaminhao
 from .graficoProducaoPorMotorista import graficoProducaoMotorista
 from .tabelaProducaoMotorista import criarTabelaProducaoPorMotorista
+from .tabelaDisponibilidadeSensores import criarTabelaDisponibilidadeSensores
+from .tabelaDistribuicaoCarga import criarTabelaDistribuicaoCarga
+from .tabelaTempoCiclo import criarTabelaTempoCiclo
+from .graficoPequenosMultiplos import criarSecaoPequenosMultiplos
+from .cuboProducao import CuboProducao, periodo_viagens
+from .cacheSecoes import CachePecas, CacheSecoes, assinatura_entrada
+from .comparacaoPeriodo import ComparacaoPeriodo
+from .disponibilidadeSensores import DisponibilidadeSensores
+from .otimizacaoPdf import OtimizadorImagens, streams_binarios
+from .orcamentoTempo import (
+    OrcamentoTempo,
+    contar_dimensoes,
+    DPI_REDUZIDO,
+    TOP_N_REDUZIDO,
+    LINHAS_PAGINA,
+    AVISOS,
+)
 
 from temas.tema_amarelo_dnp import (
     COR_PRIMARIA,
@@ -78,7 +97,8 @@ def onpage_capa(c, doc):
     empresa = ctx.get("empresa", "Pedreira São João")
     gerado_por = ctx.get("gerado_por", "Sistema OSSJ")
 
-    # pode vir string ou Path; se não vier nada, usa DEFAULT_LOGO_PATH
+    # logo já reduzido (modo otimizado) ou string/Path; se não vier nada, usa DEFAULT_LOGO_PATH
+    logo = ctx.get("logo")
     caminho_logo_ctx = ctx.get("caminho_logo")
     if caminho_logo_ctx:
         caminho_logo = Path(caminho_logo_ctx)
@@ -97,9 +117,9 @@ def onpage_capa(c, doc):
     # Logo (se existir)
     logo_w, logo_h = 5 * cm, 2 * cm
     try:
-        if caminho_logo.is_file():
+        if logo is not None or caminho_logo.is_file():
             c.drawImage(
-                str(caminho_logo),
+                logo if logo is not None else str(caminho_logo),
                 page_w - logo_w - 1.5 * cm,
                 page_h - logo_h - 0.9 * cm,
                 width=logo_w, height=logo_h, mask='auto'
@@ -161,12 +181,35 @@ def onpage_normal(c, doc):
     c.drawRightString(page_w - doc.rightMargin, M * 0.5, numero_pagina)
 
 
+# ---------------------------------------------------------------------
+# Estilos
+# ---------------------------------------------------------------------
+
+@lru_cache(maxsize=1)
+def estilos_relatorio():
+    """
+    Folha de estilos do relatório, montada uma vez por processo.
+    Os construtores só leem os estilos, então a mesma instância é compartilhada.
+    """
+    styles = getSampleStyleSheet()
+    styles["Heading1"].fontName = FONT_PADRAO
+    styles["Heading1"].textColor = COR_PRIMARIA
+    styles["Heading2"].fontName = FONT_PADRAO
+    styles["Heading2"].textColor = COR_PRIMARIA
+    styles["Normal"].fontName = FONT_PADRAO
+    styles.add(ParagraphStyle(
+        "Aviso", parent=styles["Normal"], fontName="Helvetica-Oblique",
+        fontSize=8, textColor=COR_TEXTO_SECUNDARIO,
+    ))
+    return styles
+
+
 # ---------------------------------------------------------------------
 # Montagem do relatório
 # ---------------------------------------------------------------------
 
 def build_relatorio(
-        df: pd.DataFrame,
+        df: pd.DataFrame | CuboProducao,
         dataInicio: datetime,
         dataFinal: datetime,
         titulo: str,
@@ -175,41 +218,96 @@ def build_relatorio(
         caminho_logo: str | Path | None,
         mostrar_marcadagua: bool,
         output_path: str | Path = "producaoPrimaria.pdf",
+        orcamento: OrcamentoTempo | None = None,
+        detalhamento: tuple = (),
+        cache_secoes: CacheSecoes | None = None,
+        otimizar: bool = False,
+        cache_pecas: CachePecas | None = None,
+        comparacao: ComparacaoPeriodo | None = None,
+        sensores: DisponibilidadeSensores | None = None,
+        nota_modo: str | None = None,
 ) -> str:
+    """
+    detalhamento: seções extras de pequenos múltiplos, "caminhoes" e/ou
+    "motoristas" (uma curva diária por entidade, em grades paginadas).
+    cache_secoes: reaproveita os flowables das seções cuja entrada não mudou
+    desde a montagem anterior (modo --acompanhar).
+    cache_pecas: reaproveita de execuções anteriores os gráficos, blocos de
+    tabela e indicadores cuja fatia de entrada não mudou.
+    comparacao: período de comparação (--comparar); cards e tabelas mostram a
+    variação em relação a ele.
+    sensores: disponibilidade dos sensores RFID da obra; acrescenta a seção
+    com a cobertura e as janelas sem leitura de cada sensor.
+    nota_modo: aviso do modo de execução (modoExecucao.nota_modo), no início do relatório.
+    otimizar: PDF menor para arquivo/e-mail (otimizacaoPdf); o tamanho sem
+    otimização é estimado pelas imagens trocadas, sem um segundo build.
+    """
+    # sem orçamento: tudo completo, apenas mede o tempo das etapas
+    orc = orcamento if orcamento is not None else OrcamentoTempo()
+    orc.planejar(contar_dimensoes(df), ausentes=() if sensores is not None else ("tabela_sensores",))
+    # linhas de entrada de cada construtor, registradas no perfil (--perfil)
+    viagens = orc.dimensoes["viagens"]
+
     M = 1.0 * cm
     frame_capa = Frame(M, M, A4[0] - 2 * M, A4[1] - 2 * M, id="frame_capa")
     frame_normal = Frame(M, M, A4[0] - 2 * M, A4[1] - 2 * M, id="frame_normal")
 
-    doc = BaseDocTemplate(
-        str(output_path),
-        pagesize=A4,
-        leftMargin=M, rightMargin=M, topMargin=M, bottomMargin=M,
-        title="Relatório Gerencial: Produção primária"
-    )
-
-    pt_capa = PageTemplate(id="CAPA", frames=[frame_capa], onPage=onpage_capa)
-    pt_norm = PageTemplate(id="NORMAL", frames=[frame_normal], onPage=onpage_normal)
-    doc.addPageTemplates([pt_capa, pt_norm])
-
     # se não vier caminho_logo, usa o default resolvido pelo arquivo
     caminho_logo_final = Path(caminho_logo) if caminho_logo else DEFAULT_LOGO_PATH_SJ
 
-    doc.capa_ctx = {
-        "dataInicio": dataInicio,
-        "dataFinal": dataFinal,
-        "titulo": titulo,
-        "empresa": empresa,
-        "gerado_por": gerado_por,
-        "caminho_logo": str(caminho_logo_final),
-        "mostrar_marcadagua": mostrar_marcadagua,
-    }
-
-    styles = getSampleStyleSheet()
-    styles["Heading1"].fontName = FONT_PADRAO
-    styles["Heading1"].textColor = COR_PRIMARIA
-    styles["Heading2"].fontName = FONT_PADRAO
-    styles["Heading2"].textColor = COR_PRIMARIA
-    styles["Normal"].fontName = FONT_PADRAO
+    def novo_doc(destino):
+        doc = BaseDocTemplate(
+            destino,
+            pagesize=A4,
+            leftMargin=M, rightMargin=M, topMargin=M, bottomMargin=M,
+            title="Relatório Gerencial: Produção primária",
+            pageCompression=1 if otimizar else None,
+        )
+
+        pt_capa = PageTemplate(id="CAPA", frames=[frame_capa], onPage=onpage_capa)
+        pt_norm = PageTemplate(id="NORMAL", frames=[frame_normal], onPage=onpage_normal)
+        doc.addPageTemplates([pt_capa, pt_norm])
+
+        doc.capa_ctx = {
+            "dataInicio": dataInicio,
+            "dataFinal": dataFinal,
+            "titulo": titulo,
+            "empresa": empresa,
+            "gerado_por": gerado_por,
+            "caminho_logo": str(caminho_logo_final),
+            "mostrar_marcadagua": mostrar_marcadagua,
+        }
+        return doc
+
+    doc = novo_doc(str(output_path))
+
+    styles = estilos_relatorio()
+
+    def aviso(etapa):
+        # marca no PDF as seções degradadas pelo prazo
+        texto = orc.aviso(etapa)
+        return [Paragraph(texto, styles["Aviso"])] if texto else []
+
+    def grafico(buf):
+        return Image(buf, width=20 * cm, height=12 * cm)
+
+    def imagem(etapa, construir, *partes):
+        # PNG do gráfico: refeito só quando a fatia de entrada, a variante ou as partes mudam
+        if cache_pecas is None:
+            return grafico(construir())
+        chave = (orc.variante(etapa), assinatura_entrada(df, etapa), *partes)
+        return grafico(cache_pecas.imagem(etapa, chave, construir))
+
+    def opcoes_grafico(etapa):
+        variante = orc.variante(etapa)
+        if variante == "completo":
+            return {}
+        return {"dpi": DPI_REDUZIDO, "top_n": TOP_N_REDUZIDO}
+
+    def secao(etapa, construir):
+        if cache_secoes is None:
+            return construir()
+        return cache_secoes.obter(etapa, df, orc.variante(etapa), construir)
 
     story = []
     story.append(NextPageTemplate("NORMAL"))
@@ -217,37 +315,167 @@ def build_relatorio(
 
     # cartões / gráfico produção diária
     story.append(Paragraph("Geral", styles["Heading1"]))
-    story.extend(criar_cards_indicadores(df, styles))
+    if nota_modo:
+        story.append(Paragraph(nota_modo, styles["Aviso"]))
+    with orc.etapa("indicadores") as registro:
+        registro["linhas"] = viagens
+        story.extend(secao("indicadores", lambda: criar_cards_indicadores(
+            df, styles, pecas=cache_pecas, comparacao=comparacao,
+        )))
     story.append(Spacer(1, 0.8 * cm))
     story.append(Paragraph("Produção diária", styles["Heading2"]))
-    story.append(Image(graficoLinhaProducaoDiaria(df), width=20 * cm, height=12 * cm))
+    with orc.etapa("grafico_diario") as registro:
+        registro["linhas"] = viagens
+        story.extend(aviso("grafico_diario"))
+        variante = orc.variante("grafico_diario")
+        if variante == "completo":
+            story.extend(secao("grafico_diario", lambda: [
+                imagem("grafico_diario", lambda: graficoLinhaProducaoDiaria(df))
+            ]))
+        else:
+            agrupamento = "semana" if variante == "semanal" else "dia"
+            story.extend(secao("grafico_diario", lambda: [
+                imagem("grafico_diario", lambda: graficoLinhaProducaoDiaria(
+                    df, dpi=DPI_REDUZIDO, agrupamento=agrupamento,
+                ))
+            ]))
+
+    # mapa de calor hora x dia (padrão dos turnos)
+    with orc.etapa("grafico_horario") as registro:
+        registro.update(linhas=viagens, itens=orc.dimensoes["dias"])
+        if orc.variante("grafico_horario") != "omitido":
+            story.append(PageBreak())
+            story.append(Paragraph("Produção por hora do dia", styles["Heading2"]))
+            story.extend(aviso("grafico_horario"))
+            story.extend(secao("grafico_horario", lambda: [
+                imagem("grafico_horario", lambda: graficoMapaCalorHorario(
+                    df, **({} if orc.variante("grafico_horario") == "completo" else {"dpi": DPI_REDUZIDO})
+                ))
+            ]))
+        else:
+            story.extend(aviso("grafico_horario"))
 
     # tabela produção diária
     story.append(PageBreak())
-    story.extend(criarTabelaProducaoDiaria(df, styles, 48))
+    with orc.etapa("tabela_diaria") as registro:
+        registro["linhas"] = viagens
+        story.extend(secao("tabela_diaria", lambda: criarTabelaProducaoDiaria(
+            df, styles, 48, pecas=cache_pecas, comparacao=comparacao,
+        )))
     story.append(Spacer(1, 0.8 * cm))
 
-    # caminhões
-    story.append(PageBreak())
-    story.append(Paragraph("Caminhões", styles["Heading2"]))
-    story.append(Image(graficoProducaoCaminhao(df), width=20 * cm, height=12 * cm))
-    story.append(Spacer(1, 0.4 * cm))
-    story.extend(criarTabelaProducaoPorCaminhao(df, styles, 38))
-
-    # motoristas
-    story.append(PageBreak())
-    story.append(Paragraph("Motoristas", styles["Heading2"]))
-    story.append(Image(graficoProducaoMotorista(df), width=20 * cm, height=12 * cm))
-    story.append(Spacer(1, 0.4 * cm))
-    story.extend(criarTabelaProducaoPorMotorista(df, styles, 38))
-
-    doc.build(story)
-    return f"Relatório gerado em: {Path(output_path).resolve()}"
+    # caminhões e motoristas: gráfico + tabela, ambos opcionais sob prazo
+    secoes = (
+        ("Caminhões", "caminhoes", graficoProducaoCaminhao, criarTabelaProducaoPorCaminhao),
+        ("Motoristas", "motoristas", graficoProducaoMotorista, criarTabelaProducaoPorMotorista),
+    )
+    # os gráficos de caminhões e motoristas escrevem o período no título
+    periodo = tuple(None if pd.isna(t) else f"{t:%d/%m/%Y}" for t in periodo_viagens(df))
+    for titulo_secao, chave, fn_grafico, fn_tabela in secoes:
+        etapa_grafico = f"grafico_{chave}"
+        etapa_tabela = f"tabela_{chave}"
+
+        story.append(PageBreak())
+        story.append(Paragraph(titulo_secao, styles["Heading2"]))
+        with orc.etapa(etapa_grafico) as registro:
+            registro.update(linhas=viagens, itens=orc.dimensoes[chave])
+            story.extend(aviso(etapa_grafico))
+            if orc.variante(etapa_grafico) != "omitido":
+                story.extend(secao(etapa_grafico, lambda: [
+                    imagem(etapa_grafico, lambda: fn_grafico(df, **opcoes_grafico(etapa_grafico)), periodo)
+                ]))
+                story.append(Spacer(1, 0.4 * cm))
+        with orc.etapa(etapa_tabela) as registro:
+            registro.update(linhas=viagens, itens=orc.dimensoes[chave])
+            variante = orc.variante(etapa_tabela)
+            if variante != "omitido":
+                limite = LINHAS_PAGINA if variante == "reduzido" else None
+                tabela = secao(etapa_tabela, lambda: fn_tabela(
+                    df, styles, 38, limite=limite, pecas=cache_pecas, comparacao=comparacao,
+                ))
+                story.extend(tabela[:1] + aviso(etapa_tabela) + tabela[1:])
+            else:
+                story.extend(aviso(etapa_tabela))
+
+    # tempo de ciclo dos caminhões (intervalos entre viagens, por caminhão e por dia)
+    with orc.etapa("tabela_ciclos") as registro:
+        registro.update(linhas=viagens, itens=orc.dimensoes["caminhoes"])
+        variante = orc.variante("tabela_ciclos")
+        if variante != "omitido":
+            limite = LINHAS_PAGINA if variante == "reduzido" else None
+            story.append(PageBreak())
+            tabela = secao("tabela_ciclos", lambda: criarTabelaTempoCiclo(
+                df, styles, 38, limite=limite, pecas=cache_pecas,
+            ))
+            story.extend(tabela[:1] + aviso("tabela_ciclos") + tabela[1:])
+        else:
+            story.extend(aviso("tabela_ciclos"))
+
+    # distribuição da carga (p10/p50/p90 do volume) por caminhão e por motorista
+    with orc.etapa("tabela_cargas") as registro:
+        registro.update(linhas=viagens, itens=orc.dimensoes["caminhoes"] + orc.dimensoes["motoristas"])
+        variante = orc.variante("tabela_cargas")
+        if variante != "omitido":
+            limite = LINHAS_PAGINA if variante == "reduzido" else None
+            story.append(PageBreak())
+            tabela = secao("tabela_cargas", lambda: criarTabelaDistribuicaoCarga(
+                df, styles, 38, limite=limite, pecas=cache_pecas,
+            ))
+            story.extend(tabela[:1] + aviso("tabela_cargas") + tabela[1:])
+        else:
+            story.extend(aviso("tabela_cargas"))
+
+    # disponibilidade dos sensores RFID (entrada própria, fora do cache por fatia do cubo)
+    if sensores is not None:
+        with orc.etapa("tabela_sensores") as registro:
+            variante = orc.variante("tabela_sensores")
+            if variante != "omitido":
+                story.append(PageBreak())
+                tabela = criarTabelaDisponibilidadeSensores(
+                    sensores, styles, 38, janelas=variante == "completo", pecas=cache_pecas,
+                )
+                story.extend(tabela[:1] + aviso("tabela_sensores") + tabela[1:])
+            else:
+                story.extend(aviso("tabela_sensores"))
+
+    # detalhamento por caminhão/motorista (fora das variantes do orçamento:
+    # é omitido apenas quando o prazo já se esgotou)
+    for chave in detalhamento:
+        etapa_detalhe = f"detalhamento_{chave}"
+        restante = orc.restante()
+        if restante is not None and restante <= 0:
+            story.append(PageBreak())
+            story.append(Paragraph(AVISOS["omitido"], styles["Aviso"]))
+            continue
+        with orc.etapa(etapa_detalhe) as registro:
+            registro.update(linhas=viagens, itens=orc.dimensoes[chave])
+            story.extend(secao(etapa_detalhe, lambda: criarSecaoPequenosMultiplos(df, styles, chave)))
+
+    if not otimizar:
+        with orc.etapa("montagem") as registro:
+            doc.build(story)
+            registro["paginas"] = doc.page
+        return f"Relatório gerado em: {Path(output_path).resolve()}"
+
+    # um único build: o tamanho sem otimização é estimado pelas imagens trocadas
+    with orc.etapa("montagem") as registro:
+        otimizador = OtimizadorImagens()
+        doc.capa_ctx["logo"] = otimizador.logo(caminho_logo_final, 5 * cm, 2 * cm)
+        with streams_binarios():
+            doc.build(otimizador.story(story))
+        tamanho = Path(output_path).stat().st_size
+        registro.update(paginas=doc.page, bytes_original=otimizador.estimar_original(tamanho), bytes=tamanho)
+    return (
+        f"Relatório gerado em: {Path(output_path).resolve()}\n"
+        f"{otimizador.resumo(tamanho)}"
+    )
 
 
-def criarPdf(df, dataInicio, dataFinal, stringNomeObra, output_path=None) -> str:
+def criarPdf(df, dataInicio, dataFinal, stringNomeObra, output_path=None, orcamento=None,
+             detalhamento=(), cache_secoes=None, otimizar=False, cache_pecas=None, comparacao=None,
+             sensores=None, nota_modo=None) -> str:
     out = output_path if output_path else "producaoPrimaria.pdf"
-    obra = df["desc_obra"][0]
+    obra = df.valores("obra")[0] if isinstance(df, CuboProducao) else df["desc_obra"][0]
     if obra == "SÃO JOÃO":
         caminho_logo = DEFAULT_LOGO_PATH_SJ
     else:
@@ -263,4 +491,12 @@ def criarPdf(df, dataInicio, dataFinal, stringNomeObra, output_path=None) -> str
         caminho_logo=caminho_logo,
         mostrar_marcadagua=True,
         output_path=out,
+        orcamento=orcamento,
+        detalhamento=detalhamento,
+        cache_secoes=cache_secoes,
+        otimizar=otimizar,
+        cache_pecas=cache_pecas,
+        comparacao=comparacao,
+        sensores=sensores,
+        nota_modo=nota_modo,
     )
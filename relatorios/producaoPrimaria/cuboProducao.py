@@ -0,0 +1,497 @@
+"""
+Cubo OLAP em memória da produção primária.
+
+Guarda as viagens agregadas por célula (obra, dia, hora, caminhão, motorista)
+em arrays NumPy. As dimensões textuais são codificadas por dicionário
+(valor -> código inteiro); dia e hora são guardados diretamente como inteiros.
+Fatias e roll-ups percorrem apenas as células, não as viagens, e por isso
+respondem em microssegundos mesmo para meses de dados.
+
+Junto das células fica a distribuição do volume: contagem de pesagens por
+(obra, dia, caminhão, motorista, faixa de volume) — o esboço de quantis de
+esbocoQuantis, que se junta somando contagens. Os quantis de qualquer período
+saem dela sem reler as viagens.
+"""
+import json
+from datetime import date
+from typing import Any, Dict, Iterable, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .esbocoQuantis import faixas_volume
+
+# ---------------------------------------------------------------------
+# Constantes
+# ---------------------------------------------------------------------
+
+DIMENSOES = ("obra", "dia", "hora", "caminhao", "motorista")
+
+# dimensões codificadas por dicionário (as demais já são inteiras)
+DIMENSOES_DICIONARIO = ("obra", "caminhao", "motorista")
+
+# coluna do DataFrame de viagens usada por cada dimensão
+COLUNAS_PADRAO = {
+    "obra": "desc_obra",
+    "caminhao": "prefixo_veiculo",
+    "motorista": "nome",
+}
+
+# viagens: registros; pesagens: registros com volume não nulo
+MEDIDAS = ("volume", "viagens", "pesagens", "volume_min", "volume_max", "tempo_min", "tempo_max")
+
+# dimensões da distribuição do volume (contagens por faixa de esbocoQuantis)
+DIMENSOES_DISTRIBUICAO = ("obra", "dia", "caminhao", "motorista")
+
+_DIA_EPOCH = date(1970, 1, 1)
+
+
+# ---------------------------------------------------------------------
+# Cubo
+# ---------------------------------------------------------------------
+
+class CuboProducao:
+    """
+    Cubo de produção construído incrementalmente a partir de blocos de viagens.
+
+    Exemplo:
+        cubo = CuboProducao.de_dataframe(df)
+        cubo.total("volume", caminhao="CB-010", dia=slice(date(2025, 9, 1), date(2025, 9, 7)))
+        cubo.agregar_df(por=("dia",), medidas=("volume", "viagens"))
+    """
+
+    def __init__(self, colunas: Optional[Dict[str, str]] = None):
+        self.colunas = dict(COLUNAS_PADRAO, **(colunas or {}))
+        self._codigos: Dict[str, Dict[Any, int]] = {d: {} for d in DIMENSOES_DICIONARIO}
+        self._valores: Dict[str, list] = {d: [] for d in DIMENSOES_DICIONARIO}
+
+        # células consolidadas (uma linha por combinação de dimensões)
+        self._dims = {d: np.empty(0, dtype=np.int32) for d in DIMENSOES}
+        self._med = {
+            "volume": np.empty(0, dtype=np.float64),
+            "viagens": np.empty(0, dtype=np.int64),
+            "pesagens": np.empty(0, dtype=np.int64),
+            "volume_min": np.empty(0, dtype=np.float64),
+            "volume_max": np.empty(0, dtype=np.float64),
+            "tempo_min": np.empty(0, dtype=np.int64),
+            "tempo_max": np.empty(0, dtype=np.int64),
+        }
+        # distribuição do volume: uma linha por (dimensões, faixa) com a contagem de pesagens
+        self._dist = {d: np.empty(0, dtype=np.int32) for d in (*DIMENSOES_DISTRIBUICAO, "faixa")}
+        self._dist_contagem = np.empty(0, dtype=np.int64)
+        # blocos ainda não consolidados
+        self._pendentes: list = []
+        self._pendentes_dist: list = []
+
+    # -----------------------------------------------------------------
+    # Construção
+    # -----------------------------------------------------------------
+
+    @classmethod
+    def de_dataframe(cls, df: pd.DataFrame, tamanho_bloco: int = 500_000, **kwargs) -> "CuboProducao":
+        cubo = cls(**kwargs)
+        for i in range(0, max(len(df), 1), tamanho_bloco):
+            cubo.adicionar(df.iloc[i:i + tamanho_bloco])
+        return cubo
+
+    @classmethod
+    def de_blocos(cls, blocos: Iterable[pd.DataFrame], **kwargs) -> "CuboProducao":
+        cubo = cls(**kwargs)
+        for bloco in blocos:
+            cubo.adicionar(bloco)
+        return cubo
+
+    def _codificar(self, dim: str, serie: pd.Series) -> np.ndarray:
+        """Converte uma coluna em códigos globais; nulos viram o valor None."""
+        locais, unicos = pd.factorize(serie, use_na_sentinel=True)
+        codigos = self._codigos[dim]
+        valores = self._valores[dim]
+
+        def codigo(v):
+            c = codigos.get(v)
+            if c is None:
+                c = codigos[v] = len(valores)
+                valores.append(v)
+            return c
+
+        mapa = np.fromiter((codigo(v) for v in unicos), dtype=np.int32, count=len(unicos))
+        mapa = np.append(mapa, np.int32(codigo(None)) if (locais < 0).any() else np.int32(0))
+        return mapa[locais]
+
+    def adicionar(self, bloco: pd.DataFrame) -> "CuboProducao":
+        """Acrescenta um bloco de viagens ao cubo. Registros sem `time` são ignorados."""
+        if bloco is None or bloco.empty:
+            return self
+
+        tempo = pd.to_datetime(bloco["time"], errors="coerce")
+        validos = tempo.notna().to_numpy()
+        if not validos.all():
+            bloco = bloco[validos]
+            tempo = tempo[validos]
+        if bloco.empty:
+            return self
+
+        ns = tempo.to_numpy(dtype="datetime64[ns]").astype(np.int64)
+        n = len(ns)
+
+        dims = {
+            "dia": (ns // 86_400_000_000_000).astype(np.int32),
+            "hora": ((ns // 3_600_000_000_000) % 24).astype(np.int32),
+        }
+        for dim in DIMENSOES_DICIONARIO:
+            coluna = self.colunas[dim]
+            if coluna in bloco.columns:
+                dims[dim] = self._codificar(dim, bloco[coluna])
+            else:
+                dims[dim] = self._codificar(dim, pd.Series([None] * n, dtype=object))
+
+        volume = pd.to_numeric(bloco["volume_descarregado"], errors="coerce").to_numpy(dtype=np.float64)
+        tem_volume = ~np.isnan(volume)
+        volume_zero = np.where(tem_volume, volume, 0.0)
+
+        if tem_volume.any():
+            dist = {d: dims[d][tem_volume] for d in DIMENSOES_DISTRIBUICAO}
+            dist["faixa"] = faixas_volume(volume[tem_volume])
+            self._pendentes_dist.append((dist, np.ones(len(dist["faixa"]), dtype=np.int64)))
+
+        self._pendentes.append((dims, {
+            "volume": volume_zero,
+            "viagens": np.ones(n, dtype=np.int64),
+            "pesagens": tem_volume.astype(np.int64),
+            "volume_min": np.where(tem_volume, volume, np.inf),
+            "volume_max": np.where(tem_volume, volume, -np.inf),
+            "tempo_min": ns,
+            "tempo_max": ns,
+        }))
+        return self
+
+    def adicionar_agregados(self, bloco: pd.DataFrame) -> "CuboProducao":
+        """
+        Acrescenta células já agregadas no banco (QUERY_AGREGADOS_VIAGENS):
+        colunas dia, hora, volume, viagens, pesagens, volume_min, volume_max,
+        tempo_min, tempo_max e as colunas textuais das dimensões.
+        """
+        if bloco is None or bloco.empty:
+            return self
+        n = len(bloco)
+
+        dias = pd.to_datetime(bloco["dia"]).to_numpy(dtype="datetime64[D]").astype(np.int64)
+        dims = {
+            "dia": dias.astype(np.int32),
+            "hora": pd.to_numeric(bloco["hora"]).to_numpy(dtype=np.int32),
+        }
+        for dim in DIMENSOES_DICIONARIO:
+            coluna = self.colunas[dim]
+            if coluna in bloco.columns:
+                dims[dim] = self._codificar(dim, bloco[coluna])
+            else:
+                dims[dim] = self._codificar(dim, pd.Series([None] * n, dtype=object))
+
+        def numeros(coluna, vazio):
+            return pd.to_numeric(bloco[coluna], errors="coerce").fillna(vazio).to_numpy(dtype=np.float64)
+
+        def instantes(coluna):
+            return pd.to_datetime(bloco[coluna]).to_numpy(dtype="datetime64[ns]").astype(np.int64)
+
+        self._pendentes.append((dims, {
+            "volume": numeros("volume", 0.0),
+            "viagens": pd.to_numeric(bloco["viagens"]).to_numpy(dtype=np.int64),
+            "pesagens": pd.to_numeric(bloco["pesagens"]).to_numpy(dtype=np.int64),
+            "volume_min": numeros("volume_min", np.inf),
+            "volume_max": numeros("volume_max", -np.inf),
+            "tempo_min": instantes("tempo_min"),
+            "tempo_max": instantes("tempo_max"),
+        }))
+        return self
+
+    def adicionar_faixas(self, bloco: pd.DataFrame) -> "CuboProducao":
+        """
+        Acrescenta a distribuição do volume já agregada no banco (QUERY_FAIXAS_VOLUME):
+        colunas dia, faixa, contagem e as colunas textuais das dimensões.
+        """
+        if bloco is None or bloco.empty:
+            return self
+        n = len(bloco)
+
+        dias = pd.to_datetime(bloco["dia"]).to_numpy(dtype="datetime64[D]").astype(np.int64)
+        dist = {"dia": dias.astype(np.int32)}
+        for dim in DIMENSOES_DICIONARIO:
+            coluna = self.colunas[dim]
+            if coluna in bloco.columns:
+                dist[dim] = self._codificar(dim, bloco[coluna])
+            else:
+                dist[dim] = self._codificar(dim, pd.Series([None] * n, dtype=object))
+        dist["faixa"] = pd.to_numeric(bloco["faixa"]).to_numpy(dtype=np.int32)
+        self._pendentes_dist.append((dist, pd.to_numeric(bloco["contagem"]).to_numpy(dtype=np.int64)))
+        return self
+
+    def salvar(self, caminho) -> None:
+        """Grava as células consolidadas, a distribuição do volume e os dicionários num .npz."""
+        self._consolidar()
+        arrays = {f"dim_{d}": v for d, v in self._dims.items()}
+        arrays.update({f"med_{m}": v for m, v in self._med.items()})
+        arrays.update({f"dist_{d}": v for d, v in self._dist.items()})
+        arrays["dist_contagem"] = self._dist_contagem
+        meta = {"colunas": self.colunas, "valores": self._valores}
+        np.savez(caminho, meta=np.array(json.dumps(meta, ensure_ascii=False)), **arrays)
+
+    @classmethod
+    def carregar(cls, caminho) -> "CuboProducao":
+        with np.load(caminho, allow_pickle=False) as dados:
+            meta = json.loads(str(dados["meta"]))
+            cubo = cls(colunas=meta["colunas"])
+            cubo._dims = {d: dados[f"dim_{d}"] for d in DIMENSOES}
+            cubo._med = {m: dados[f"med_{m}"] for m in MEDIDAS}
+            # arquivos anteriores à distribuição do volume levantam KeyError (o cache relê do banco)
+            cubo._dist = {d: dados[f"dist_{d}"] for d in (*DIMENSOES_DISTRIBUICAO, "faixa")}
+            cubo._dist_contagem = dados["dist_contagem"]
+        cubo._valores = {d: list(meta["valores"][d]) for d in DIMENSOES_DICIONARIO}
+        cubo._codigos = {d: {v: i for i, v in enumerate(vs)} for d, vs in cubo._valores.items()}
+        return cubo
+
+    def _consolidar(self) -> None:
+        """Funde os blocos pendentes nas células existentes (ordenação + reduceat)."""
+        if self._pendentes_dist:
+            partes = [(self._dist, self._dist_contagem)] + self._pendentes_dist
+            self._pendentes_dist = []
+            dist = {d: np.concatenate([p[0][d] for p in partes]) for d in self._dist}
+            self._dist, self._dist_contagem = self._somar(
+                dist, np.concatenate([p[1] for p in partes]), tuple(self._dist),
+            )
+        if not self._pendentes:
+            return
+        partes = [(self._dims, self._med)] + self._pendentes
+        self._pendentes = []
+
+        dims = {d: np.concatenate([p[0][d] for p in partes]) for d in DIMENSOES}
+        med = {m: np.concatenate([p[1][m] for p in partes]) for m in MEDIDAS}
+
+        chave = self._chave(dims, DIMENSOES)
+        ordem = np.argsort(chave, kind="stable")
+        chave = chave[ordem]
+        inicio = np.flatnonzero(np.r_[True, chave[1:] != chave[:-1]])
+
+        self._dims = {d: v[ordem][inicio] for d, v in dims.items()}
+        self._med = {}
+        for m, v in med.items():
+            v = v[ordem]
+            if m.endswith("_min"):
+                self._med[m] = np.minimum.reduceat(v, inicio)
+            elif m.endswith("_max"):
+                self._med[m] = np.maximum.reduceat(v, inicio)
+            else:
+                self._med[m] = np.add.reduceat(v, inicio)
+
+    @classmethod
+    def _somar(cls, dims: Dict[str, np.ndarray], contagem: np.ndarray,
+               por: Sequence[str]) -> Tuple[Dict[str, np.ndarray], np.ndarray]:
+        """Soma `contagem` por combinação das dimensões `por` (códigos, sem decodificar)."""
+        chave = cls._chave(dims, por)
+        ordem = np.argsort(chave, kind="stable")
+        chave = chave[ordem]
+        inicio = np.flatnonzero(np.r_[True, chave[1:] != chave[:-1]]) if len(chave) else chave[:0]
+        somadas = np.add.reduceat(contagem[ordem], inicio) if len(inicio) else contagem[:0]
+        return {d: dims[d][ordem][inicio] for d in por}, somadas
+
+    # -----------------------------------------------------------------
+    # Consulta
+    # -----------------------------------------------------------------
+
+    def __len__(self) -> int:
+        self._consolidar()
+        return len(self._med["viagens"])
+
+    @property
+    def vazio(self) -> bool:
+        return len(self) == 0
+
+    def valores(self, dim: str) -> list:
+        """Valores distintos conhecidos de uma dimensão (na ordem de aparecimento)."""
+        if dim in DIMENSOES_DICIONARIO:
+            return list(self._valores[dim])
+        self._consolidar()
+        return [self._decodificar(dim, c) for c in np.unique(self._dims[dim])]
+
+    @staticmethod
+    def _chave(dims: Dict[str, np.ndarray], por: Sequence[str]) -> np.ndarray:
+        """Chave inteira de raiz mista para agrupar pelas dimensões `por`."""
+        chave = np.zeros(len(next(iter(dims.values()))) if dims else 0, dtype=np.int64)
+        for d in por:
+            v = dims[d].astype(np.int64)
+            base = int(v.min()) if len(v) else 0
+            card = (int(v.max()) - base + 1) if len(v) else 1
+            chave = chave * card + (v - base)
+        return chave
+
+    def _decodificar(self, dim: str, codigos):
+        if dim in DIMENSOES_DICIONARIO:
+            valores = self._valores[dim]
+            if np.ndim(codigos) == 0:
+                return valores[int(codigos)]
+            return np.array([valores[c] for c in codigos], dtype=object)
+        if dim == "dia":
+            dias = np.asarray(codigos, dtype="int64").astype("datetime64[D]")
+            if np.ndim(codigos) == 0:
+                return dias.item()
+            return dias.astype(object)
+        return codigos
+
+    def _mascara(self, filtros: Dict[str, Any],
+                 dims: Optional[Dict[str, np.ndarray]] = None) -> Optional[np.ndarray]:
+        dims = self._dims if dims is None else dims
+        mascara = None
+        for dim, alvo in filtros.items():
+            if dim not in DIMENSOES or dim not in dims:
+                raise ValueError(f"Dimensão desconhecida: {dim}")
+            codigos = dims[dim]
+
+            if isinstance(alvo, slice):
+                if dim in DIMENSOES_DICIONARIO:
+                    raise ValueError(f"Intervalo não suportado para a dimensão {dim}")
+                ini = self._codigo_ordinal(dim, alvo.start)
+                fim = self._codigo_ordinal(dim, alvo.stop)
+                m = np.ones(len(codigos), dtype=bool)
+                if ini is not None:
+                    m &= codigos >= ini
+                if fim is not None:
+                    m &= codigos <= fim
+            else:
+                lista = alvo if isinstance(alvo, (list, tuple, set, frozenset, np.ndarray)) else [alvo]
+                alvos = [self._codigo(dim, v) for v in lista]
+                alvos = [c for c in alvos if c is not None]
+                m = np.isin(codigos, alvos) if len(alvos) != 1 else codigos == alvos[0]
+
+            mascara = m if mascara is None else mascara & m
+        return mascara
+
+    def _codigo(self, dim: str, valor) -> Optional[int]:
+        if dim in DIMENSOES_DICIONARIO:
+            return self._codigos[dim].get(valor)
+        return self._codigo_ordinal(dim, valor)
+
+    @staticmethod
+    def _codigo_ordinal(dim: str, valor) -> Optional[int]:
+        if valor is None:
+            return None
+        if dim == "dia":
+            return (pd.Timestamp(valor).date() - _DIA_EPOCH).days
+        return int(valor)
+
+    def agregar(self, por: Sequence[str] = (), medidas: Optional[Sequence[str]] = None,
+                **filtros) -> Dict[str, np.ndarray]:
+        """
+        Roll-up das células filtradas agrupadas pelas dimensões `por`.
+
+        filtros: dimensão=valor, dimensão=[valores] ou, para dia/hora,
+        dimensão=slice(ini, fim) (intervalo fechado).
+        Retorna dict com uma array por dimensão (valores decodificados) e por medida.
+        """
+        self._consolidar()
+        medidas = tuple(medidas or MEDIDAS)
+        por = tuple(por)
+
+        dims = self._dims
+        med = self._med
+        mascara = self._mascara(filtros)
+        if mascara is not None:
+            dims = {d: dims[d][mascara] for d in por}
+            med = {m: med[m][mascara] for m in medidas}
+
+        if not por:
+            res = {}
+            for m in medidas:
+                v = med[m]
+                if m.endswith("_min"):
+                    res[m] = np.array([v.min()]) if len(v) else v[:0]
+                elif m.endswith("_max"):
+                    res[m] = np.array([v.max()]) if len(v) else v[:0]
+                else:
+                    res[m] = np.array([v.sum()])
+            return res
+
+        chave = self._chave(dims, por)
+        ordem = np.argsort(chave, kind="stable")
+        chave = chave[ordem]
+        inicio = np.flatnonzero(np.r_[True, chave[1:] != chave[:-1]]) if len(chave) else chave[:0]
+
+        res = {d: self._decodificar(d, dims[d][ordem][inicio]) for d in por}
+        for m in medidas:
+            v = med[m][ordem]
+            if not len(v):
+                res[m] = v
+            elif m.endswith("_min"):
+                res[m] = np.minimum.reduceat(v, inicio)
+            elif m.endswith("_max"):
+                res[m] = np.maximum.reduceat(v, inicio)
+            else:
+                res[m] = np.add.reduceat(v, inicio)
+        return res
+
+    def agregar_df(self, por: Sequence[str] = (), medidas: Optional[Sequence[str]] = None,
+                   **filtros) -> pd.DataFrame:
+        """Igual a `agregar`, mas devolve DataFrame (tempos como Timestamp, mínimos vazios como NaN)."""
+        res = self.agregar(por, medidas, **filtros)
+        df = pd.DataFrame(res)
+        for m in ("tempo_min", "tempo_max"):
+            if m in df.columns:
+                df[m] = pd.to_datetime(df[m], unit="ns")
+        for m in ("volume_min", "volume_max"):
+            if m in df.columns:
+                df[m] = df[m].replace([np.inf, -np.inf], np.nan)
+        return df
+
+    def distribuicao(self, por: Sequence[str] = (), **filtros) -> Dict[str, np.ndarray]:
+        """
+        Distribuição do volume das pesagens filtradas: contagem por faixa
+        (esbocoQuantis) para cada combinação das dimensões `por`. Filtros como
+        em `agregar`, exceto hora. Retorna dict com as dimensões decodificadas,
+        "faixa" e "contagem".
+        """
+        self._consolidar()
+        por = tuple(por)
+        dims, contagem = self._dist, self._dist_contagem
+        mascara = self._mascara(filtros, dims)
+        if mascara is not None:
+            dims = {d: v[mascara] for d, v in dims.items()}
+            contagem = contagem[mascara]
+
+        dims, contagem = self._somar(dims, contagem, (*por, "faixa"))
+        res = {d: self._decodificar(d, dims[d]) for d in por}
+        res["faixa"] = dims["faixa"]
+        res["contagem"] = contagem
+        return res
+
+    def total(self, medida: str = "volume", **filtros):
+        res = self.agregar((), (medida,), **filtros)[medida]
+        if not len(res):
+            return None
+        valor = res[0]
+        if medida.startswith("tempo_"):
+            return pd.Timestamp(int(valor), unit="ns")
+        return valor.item()
+
+    def periodo(self, **filtros) -> Tuple[Optional[pd.Timestamp], Optional[pd.Timestamp]]:
+        """Primeira e última viagem das células filtradas."""
+        res = self.agregar((), ("tempo_min", "tempo_max"), **filtros)
+        if not len(res["tempo_min"]):
+            return None, None
+        return (pd.Timestamp(int(res["tempo_min"][0]), unit="ns"),
+                pd.Timestamp(int(res["tempo_max"][0]), unit="ns"))
+
+
+# ---------------------------------------------------------------------
+# Helpers para os construtores do relatório
+# ---------------------------------------------------------------------
+
+def periodo_viagens(fonte) -> Tuple[Optional[pd.Timestamp], Optional[pd.Timestamp]]:
+    """Primeira e última viagem de um DataFrame de viagens ou de um cubo."""
+    if isinstance(fonte, CuboProducao):
+        return fonte.periodo()
+    tempo = pd.to_datetime(fonte["time"], errors="coerce")
+    return tempo.min(), tempo.max()
+
+
+def fonte_vazia(fonte) -> bool:
+    if isinstance(fonte, CuboProducao):
+        return fonte.vazio
+    return fonte.empty
@@ -0,0 +1,210 @@
+"""
+Disponibilidade dos sensores RFID (ossj_sensor_rfid) da obra.
+
+Um sensor que para de ler não gera erro: o relatório só mostra menos viagens.
+Aqui cada device_id é comparado com o horário de operação esperado: todo
+trecho do horário sem nenhuma leitura do sensor por pelo menos `lacuna`
+minutos vira uma janela sem leitura, e a cobertura é a fração do horário de
+operação fora dessas janelas.
+
+As leituras vêm de QUERY_LEITURAS_SENSORES (device_id e time, sem junções) em
+blocos em ordem de tempo. Em cada bloco, uma ordenação por (sensor, instante)
+e as diferenças entre leituras consecutivas dão os silêncios; só os que
+chegam à lacuna mínima são guardados, com a última leitura de cada sensor
+levada de um bloco ao seguinte. No fim, os silêncios são cortados pelas
+janelas diárias de operação de uma vez (cada silêncio repetido pelos dias que
+atravessa, com np.repeat), sem laço por dia ou por sensor.
+"""
+from typing import Iterable, Tuple
+
+import numpy as np
+import pandas as pd
+
+# horário de operação esperado (hora inicial, hora final), todos os dias
+HORARIO_OPERACAO = (6, 22)
+# minutos; trechos do horário de operação sem leitura menores que isso são normais
+LACUNA_MINIMA_MIN = 60.0
+
+_NS_HORA = 3600 * 10**9
+_NS_DIA = 24 * _NS_HORA
+
+
+def _trechos_operacao(inicio: np.ndarray, fim: np.ndarray, horario: Tuple[int, int]):
+    """
+    Corta cada intervalo [inicio, fim) (ns) pelas janelas diárias de operação.
+    Devolve (origem, ini, fim): o índice do intervalo de cada trecho e os seus limites.
+    """
+    fim_incl = np.maximum(fim - 1, inicio)
+    dia_ini = inicio // _NS_DIA
+    n_dias = fim_incl // _NS_DIA - dia_ini + 1
+    origem = np.repeat(np.arange(len(inicio)), n_dias)
+    # dia de cada trecho: o dia inicial do intervalo + 0, 1, 2, ...
+    deslocamento = np.arange(len(origem)) - np.repeat(np.cumsum(n_dias) - n_dias, n_dias)
+    dias = dia_ini[origem] + deslocamento
+    t_ini = np.maximum(inicio[origem], dias * _NS_DIA + horario[0] * _NS_HORA)
+    t_fim = np.minimum(fim[origem], dias * _NS_DIA + horario[1] * _NS_HORA)
+    validos = t_fim > t_ini
+    return origem[validos], t_ini[validos], t_fim[validos]
+
+
+class DisponibilidadeSensores:
+    """
+    Janelas sem leitura e cobertura de cada sensor no período [ini, fim].
+    Recebe as leituras em blocos (adicionar) e calcula as tabelas no fim.
+    Um período em aberto (mês corrente) termina agora: as horas que ainda não
+    passaram não contam como operação nem como silêncio.
+    """
+
+    def __init__(self, ini, fim, horario: Tuple[int, int] = HORARIO_OPERACAO,
+                 lacuna: float = LACUNA_MINIMA_MIN, sensores: Iterable = ()):
+        self.ini = pd.Timestamp(ini)
+        self.fim = max(self.ini, min(pd.Timestamp(fim), pd.Timestamp.now()))
+        self.horario = tuple(horario)
+        self.lacuna = float(lacuna)
+        self.sensores = list(dict.fromkeys(sensores))
+        self._lacuna_ns = int(self.lacuna * 60 * 10**9)
+        # horas de operação esperadas no período (iguais para todos os sensores)
+        _, op_ini, op_fim = _trechos_operacao(
+            np.array([self.ini.value]), np.array([self.fim.value]), self.horario,
+        )
+        self.horas_operacao = float((op_fim - op_ini).sum()) / _NS_HORA
+        self.leituras = 0
+        # por sensor, nos blocos já vistos
+        self._leituras = pd.Series(dtype="int64")
+        self._primeira = pd.Series(dtype="int64")
+        self._ultima = pd.Series(dtype="int64")
+        # silêncios internos que chegam à lacuna: (device_id, início, fim) em ns
+        self._silencios = []
+        self._tabelas = None
+
+    @classmethod
+    def carregar(cls, obra: int, ini, fim, horario: Tuple[int, int] = HORARIO_OPERACAO,
+                 lacuna: float = LACUNA_MINIMA_MIN) -> "DisponibilidadeSensores":
+        """Lista os sensores da obra e lê as leituras do período em blocos."""
+        from db import iter_dataframes, load_dataframe
+        from .consultas import QUERY_LEITURAS_SENSORES, QUERY_SENSORES_OBRA
+
+        sensores = load_dataframe(QUERY_SENSORES_OBRA, params={"obra": obra})["device_id"]
+        disponibilidade = cls(ini, fim, horario, lacuna, sensores.dropna().tolist())
+        for bloco in iter_dataframes(QUERY_LEITURAS_SENSORES, params={"obra": obra, "ini": ini, "fim": fim}):
+            disponibilidade.adicionar(bloco)
+        return disponibilidade
+
+    def adicionar(self, bloco: pd.DataFrame) -> None:
+        """Acrescenta um bloco de leituras (device_id, time); os blocos chegam em ordem de tempo."""
+        self.leituras += len(bloco)
+        tempo = pd.to_datetime(bloco["time"], errors="coerce").to_numpy(dtype="datetime64[ns]")
+        validos = ~np.isnat(tempo) & bloco["device_id"].notna().to_numpy()
+        if not validos.any():
+            return
+        codigos, devices = pd.factorize(bloco["device_id"][validos])
+        instantes = tempo[validos].astype(np.int64)
+        ordem = np.lexsort((instantes, codigos))
+        codigos, instantes = codigos[ordem], instantes[ordem]
+
+        inicio_grupo = np.flatnonzero(np.r_[True, codigos[1:] != codigos[:-1]])
+        fim_grupo = np.r_[inicio_grupo[1:], len(codigos)] - 1
+        devices_grupo = devices[codigos[inicio_grupo]]
+
+        # leitura anterior do mesmo sensor; a primeira do bloco olha os blocos anteriores
+        anterior = np.r_[instantes[:1], instantes[:-1]]
+        anterior[inicio_grupo] = instantes[inicio_grupo]
+        ultima = self._ultima.reindex(devices_grupo)
+        vistos = ultima.notna().to_numpy()
+        anterior[inicio_grupo[vistos]] = ultima[vistos].to_numpy(dtype=np.int64)
+        silencio = instantes - anterior >= self._lacuna_ns
+        if silencio.any():
+            self._silencios.append(pd.DataFrame({
+                "device_id": devices[codigos[silencio]],
+                "inicio": anterior[silencio],
+                "fim": instantes[silencio],
+            }))
+
+        primeira = pd.Series(instantes[inicio_grupo], index=devices_grupo)
+        ultima = pd.Series(instantes[fim_grupo], index=devices_grupo)
+        leituras = pd.Series(fim_grupo - inicio_grupo + 1, index=devices_grupo)
+        self._primeira = pd.concat([self._primeira, primeira]).groupby(level=0, sort=False).min()
+        self._ultima = pd.concat([self._ultima, ultima]).groupby(level=0, sort=False).max()
+        self._leituras = pd.concat([self._leituras, leituras]).groupby(level=0, sort=False).sum()
+        self._tabelas = None
+
+    # ---------------------------------------------------------------------
+    # Resultado
+    # ---------------------------------------------------------------------
+
+    def _silencios_periodo(self, devices: pd.Index) -> pd.DataFrame:
+        # internos + antes da primeira e depois da última leitura; sem leitura: o período todo
+        ini, fim = self.ini.value, self.fim.value
+        primeira = self._primeira.reindex(devices)
+        ultima = self._ultima.reindex(devices)
+        bordas = pd.DataFrame({
+            "device_id": np.r_[devices, devices],
+            "inicio": np.r_[np.full(len(devices), ini), ultima.fillna(ini).to_numpy(dtype=np.int64)],
+            "fim": np.r_[primeira.fillna(fim).to_numpy(dtype=np.int64), np.full(len(devices), fim)],
+        })
+        sem_leitura = np.r_[primeira.isna().to_numpy(), primeira.isna().to_numpy()]
+        # sem leitura, as duas bordas cobririam o período inteiro: fica só uma
+        bordas = bordas[~sem_leitura | (np.arange(len(bordas)) < len(devices))]
+        return pd.concat([*self._silencios, bordas], ignore_index=True)
+
+    def calcular(self) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        (por_sensor, janelas):
+        - por_sensor: device_id, leituras, ultima_leitura, janelas, horas_sem_leitura,
+          cobertura (% do horário de operação com leitura); menor cobertura primeiro;
+        - janelas: device_id, inicio, fim e horas_sem_leitura (só as horas dentro
+          do horário de operação), em ordem de início.
+        """
+        if self._tabelas is not None:
+            return self._tabelas
+
+        devices = pd.Index(list(dict.fromkeys([*self.sensores, *self._leituras.index])))
+        silencios = self._silencios_periodo(devices)
+        inicio = np.clip(silencios["inicio"].to_numpy(dtype=np.int64), self.ini.value, self.fim.value)
+        fim = np.clip(silencios["fim"].to_numpy(dtype=np.int64), self.ini.value, self.fim.value)
+
+        # trechos de silêncio dentro do horário de operação que chegam à lacuna
+        origem, t_ini, t_fim = _trechos_operacao(inicio, fim, self.horario)
+        longos = t_fim - t_ini >= self._lacuna_ns
+        trechos = pd.DataFrame({
+            "origem": origem[longos], "inicio": t_ini[longos], "fim": t_fim[longos],
+            "horas_sem_leitura": (t_fim - t_ini)[longos] / _NS_HORA,
+        })
+        janelas = (
+            trechos.groupby("origem")
+            .agg(inicio=("inicio", "min"), fim=("fim", "max"), horas_sem_leitura=("horas_sem_leitura", "sum"))
+        )
+        janelas.insert(0, "device_id", silencios["device_id"].to_numpy()[janelas.index])
+        janelas["inicio"] = pd.to_datetime(janelas["inicio"])
+        janelas["fim"] = pd.to_datetime(janelas["fim"])
+        janelas = janelas.sort_values(["inicio", "device_id"]).reset_index(drop=True)
+
+        agrupadas = janelas.groupby("device_id")["horas_sem_leitura"]
+        por_sensor = pd.DataFrame({
+            "device_id": devices,
+            "leituras": self._leituras.reindex(devices).fillna(0).astype(int).to_numpy(),
+            "ultima_leitura": pd.to_datetime(self._ultima.reindex(devices)).to_numpy(),
+            "janelas": agrupadas.size().reindex(devices).fillna(0).astype(int).to_numpy(),
+            "horas_sem_leitura": agrupadas.sum().reindex(devices).fillna(0.0).to_numpy(),
+        })
+        por_sensor["cobertura"] = (
+            100.0 * (1.0 - por_sensor["horas_sem_leitura"] / self.horas_operacao)
+            if self.horas_operacao > 0 else 100.0
+        )
+        por_sensor = por_sensor.sort_values(["cobertura", "device_id"]).reset_index(drop=True)
+        por_sensor["horas_sem_leitura"] = por_sensor["horas_sem_leitura"].round(2)
+        por_sensor["cobertura"] = por_sensor["cobertura"].round(1)
+        janelas["horas_sem_leitura"] = janelas["horas_sem_leitura"].round(2)
+
+        self._tabelas = (por_sensor, janelas)
+        return self._tabelas
+
+    def resumo(self) -> str:
+        por_sensor, janelas = self.calcular()
+        if por_sensor.empty:
+            return "Sensores RFID: nenhum sensor cadastrado para a obra"
+        return (
+            f"Sensores RFID: {len(por_sensor)} sensor(es), cobertura mínima {por_sensor['cobertura'].min():.1f}%, "
+            f"{len(janelas)} janela(s) sem leitura de {self.lacuna:g} min ou mais no horário "
+            f"{self.horario[0]:02d}h-{self.horario[1]:02d}h"
+        )
@@ -0,0 +1,76 @@
+"""
+Esboço de quantis do volume descarregado, mergeável.
+
+Cada pesagem cai numa faixa logarítmica: faixa = ceil(ln(volume) / ln(GAMA)),
+com GAMA = (1 + a) / (1 - a). Todo volume da faixa i está em (GAMA^(i-1), GAMA^i]
+e o valor representativo 2·GAMA^i / (GAMA + 1) erra no máximo a (PRECISAO_RELATIVA)
+em termos relativos — o mapeamento do DDSketch. O esboço de um conjunto de
+pesagens é só a contagem por faixa, então juntar esboços (blocos do streaming,
+dias, obras) é somar contagens: o CuboProducao guarda as contagens por
+(obra, dia, caminhão, motorista, faixa) junto das células e qualquer período é
+respondido sem reler as viagens.
+
+Tudo é vetorizado: faixas de um bloco inteiro de uma vez e os quantis de todos
+os grupos (caminhões, motoristas) numa única ordenação com np.searchsorted.
+"""
+import math
+from typing import Sequence, Tuple
+
+import numpy as np
+
+# erro relativo máximo de um quantil (1%: 30 t -> entre 29,7 t e 30,3 t)
+PRECISAO_RELATIVA = 0.01
+GAMA = (1 + PRECISAO_RELATIVA) / (1 - PRECISAO_RELATIVA)
+LN_GAMA = math.log(GAMA)
+
+# volumes até isso (t) caem na faixa zero, representada por 0
+VOLUME_MINIMO = 0.01
+FAIXA_ZERO = -1000
+
+# quantis mostrados no relatório
+QUANTIS = (0.1, 0.5, 0.9)
+
+
+def faixas_volume(volumes) -> np.ndarray:
+    """Faixa de cada volume (int32); volumes nulos devem ser retirados antes."""
+    volumes = np.asarray(volumes, dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        faixas = np.ceil(np.log(volumes) / LN_GAMA)
+    return np.where(volumes > VOLUME_MINIMO, faixas, FAIXA_ZERO).astype(np.int32)
+
+
+def valor_faixa(faixas) -> np.ndarray:
+    """Valor representativo de cada faixa (o de menor erro relativo dentro dela)."""
+    faixas = np.asarray(faixas, dtype=np.float64)
+    return np.where(faixas == FAIXA_ZERO, 0.0, 2.0 * GAMA ** faixas / (GAMA + 1.0))
+
+
+def quantis_faixas(grupos, faixas, contagens,
+                   quantis: Sequence[float] = QUANTIS) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Quantis de vários esboços de uma vez.
+
+    grupos, faixas, contagens: uma linha por (grupo, faixa) — repetidas são
+    somadas naturalmente. Devolve (grupos distintos, total de pesagens de cada
+    grupo, matriz grupos x quantis). O quantil q é o valor da pesagem de ordem
+    floor(q·(n-1)) (a partir de 0) na ordem crescente.
+    """
+    grupos = np.asarray(grupos)
+    faixas = np.asarray(faixas)
+    contagens = np.asarray(contagens, dtype=np.int64)
+    com_pesagem = contagens > 0
+    grupos, faixas, contagens = grupos[com_pesagem], faixas[com_pesagem], contagens[com_pesagem]
+    if not len(grupos):
+        return grupos, contagens, np.empty((0, len(quantis)))
+
+    ordem = np.lexsort((faixas, grupos))
+    grupos, faixas, contagens = grupos[ordem], faixas[ordem], contagens[ordem]
+    inicio = np.flatnonzero(np.r_[True, grupos[1:] != grupos[:-1]])
+
+    # posição de cada pesagem-alvo na contagem acumulada de todos os grupos
+    acumulado = np.cumsum(contagens)
+    antes = acumulado[inicio] - contagens[inicio]
+    totais = np.add.reduceat(contagens, inicio)
+    alvos = antes[:, None] + np.floor(np.asarray(quantis)[None, :] * (totais[:, None] - 1))
+    posicoes = np.searchsorted(acumulado, alvos, side="right")
+    return grupos[inicio], totais, valor_faixa(faixas[posicoes])
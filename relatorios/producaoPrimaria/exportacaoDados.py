@@ -0,0 +1,123 @@
+"""
+Exportação dos agregados do relatório (--exportar), sem renderizar o PDF.
+
+Grava as tabelas diária, por caminhão e por motorista, o tempo de ciclo
+dos caminhões (só com as viagens individuais) e os indicadores — os
+mesmos valores que o PDF mostra, calculados por agregadosRelatorio — em CSV,
+Parquet e/ou XLSX. Os dados são lidos e agregados uma vez e cada formato
+apenas escreve as mesmas tabelas; matplotlib e ReportLab não são importados.
+
+Parquet exige pyarrow (ou fastparquet) e XLSX exige openpyxl; as dependências
+são conferidas antes de consultar o banco.
+"""
+import importlib.util
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List
+
+import pandas as pd
+
+from .agregadosRelatorio import (
+    calcular_indicadores, distribuicao_carga, producao_diaria, producao_por_caminhao, producao_por_motorista,
+    tempos_ciclo,
+)
+from .cuboProducao import CuboProducao
+
+FORMATOS = ("csv", "parquet", "xlsx")
+# formato -> pacotes aceitos (basta um)
+DEPENDENCIAS = {
+    "parquet": ("pyarrow", "fastparquet"),
+    "xlsx": ("openpyxl",),
+}
+# nome das tabelas (sufixo dos arquivos / abas da planilha)
+TABELAS = (
+    "diaria", "caminhoes", "motoristas", "ciclos_caminhoes", "ciclos_diarios",
+    "cargas_caminhoes", "cargas_motoristas", "indicadores",
+)
+
+
+def dependencias_faltando(formatos: Iterable[str]) -> List[str]:
+    """Mensagens para os formatos cujas bibliotecas não estão instaladas."""
+    faltando = []
+    for formato in formatos:
+        pacotes = DEPENDENCIAS.get(formato, ())
+        if pacotes and not any(importlib.util.find_spec(p) for p in pacotes):
+            faltando.append(f"{formato} exige {' ou '.join(pacotes)} (pip install {pacotes[0]})")
+    return faltando
+
+
+def tabelas_exportacao(fonte: pd.DataFrame | CuboProducao, obra: int, nome_obra: str,
+                       ini: datetime, fim: datetime) -> Dict[str, pd.DataFrame]:
+    """
+    Agregados do relatório, uma tabela por seção; indicadores numa linha.
+    As tabelas de tempo de ciclo só existem com o DataFrame de viagens.
+    """
+    indicadores = {"obra": obra, "nome_obra": str(nome_obra), "ini": ini, "fim": fim}
+    indicadores.update(calcular_indicadores(fonte))
+    tabelas = {
+        "diaria": producao_diaria(fonte),
+        "caminhoes": producao_por_caminhao(fonte),
+        "motoristas": producao_por_motorista(fonte),
+    }
+    ciclos = tempos_ciclo(fonte)
+    if ciclos is not None:
+        tabelas["ciclos_caminhoes"], tabelas["ciclos_diarios"] = ciclos
+    tabelas["cargas_caminhoes"] = distribuicao_carga(fonte, "caminhao")
+    tabelas["cargas_motoristas"] = distribuicao_carga(fonte, "motorista")
+    tabelas["indicadores"] = pd.DataFrame([indicadores])
+    return tabelas
+
+
+def _para_arquivo(df: pd.DataFrame) -> pd.DataFrame:
+    # datas do groupby chegam como objetos date; Parquet/XLSX preferem datetime64
+    df = df.copy()
+    for col in df.columns:
+        if df[col].dtype == object and df[col].map(lambda v: hasattr(v, "isoformat")).any():
+            df[col] = pd.to_datetime(df[col])
+    return df
+
+
+def _gravar_atomico(destino: Path, escrever) -> Path:
+    temporario = destino.with_name(f".{destino.name}.{os.getpid()}.tmp")
+    try:
+        escrever(temporario)
+        os.replace(temporario, destino)
+    finally:
+        if temporario.exists():
+            temporario.unlink()
+    return destino
+
+
+def exportar(tabelas: Dict[str, pd.DataFrame], base, formatos: Iterable[str]) -> List[Path]:
+    """
+    Grava as tabelas em cada formato: <base>_<tabela>.csv, <base>_<tabela>.parquet
+    e <base>.xlsx (uma aba por tabela). Devolve os arquivos gravados.
+    """
+    base = Path(base)
+    base = base.with_suffix("") if base.suffix.lower() in (".pdf", ".csv", ".parquet", ".xlsx") else base
+    base.parent.mkdir(parents=True, exist_ok=True)
+    convertidas = {nome: _para_arquivo(df) for nome, df in tabelas.items()}
+
+    gravados = []
+    for formato in dict.fromkeys(formatos):
+        if formato == "csv":
+            for nome, df in tabelas.items():
+                destino = base.with_name(f"{base.name}_{nome}.csv")
+                gravados.append(_gravar_atomico(
+                    destino, lambda p, df=df: df.to_csv(p, index=False, encoding="utf-8-sig"),
+                ))
+        elif formato == "parquet":
+            for nome, df in convertidas.items():
+                destino = base.with_name(f"{base.name}_{nome}.parquet")
+                gravados.append(_gravar_atomico(destino, lambda p, df=df: df.to_parquet(p, index=False)))
+        elif formato == "xlsx":
+            def escrever_planilha(p):
+                with pd.ExcelWriter(p, engine="openpyxl") as planilha:
+                    for nome, df in convertidas.items():
+                        df.to_excel(planilha, sheet_name=nome, index=False)
+
+            gravados.append(_gravar_atomico(base.with_name(f"{base.name}.xlsx"), escrever_planilha))
+        else:
+            raise ValueError(f"Formato de exportação desconhecido: {formato}")
+    return gravados
@@ -0,0 +1,142 @@
+"""
+Extração paralela das viagens, particionada por intervalo de tempo.
+
+O período é dividido em partições de um dia ou uma semana, lidas ao mesmo
+tempo em várias conexões do pool do engine. Cada partição é paginada pela
+chave (time, id) — sem OFFSET, cada página continua da última linha lida — e
+devolvida já ordenada. Como as partições são disjuntas e consecutivas, basta
+concatená-las na ordem para ter o resultado ordenado, sem reordenar tudo.
+
+As leituras rodam em threads: o ganho vem de o MySQL varrer várias partes do
+índice ao mesmo tempo e das esperas de rede sobrepostas; a conversão das
+linhas pelo pymysql continua limitada pelo GIL.
+"""
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timedelta
+from itertools import islice
+from typing import List, Tuple
+
+GRANULARIDADES = {"dia": timedelta(days=1), "semana": timedelta(weeks=1)}
+TAMANHO_PAGINA = 50_000
+CONEXOES_PADRAO = 4
+
+
+def particionar(ini: datetime, fim: datetime, granularidade: str = "dia") -> List[Tuple[datetime, datetime]]:
+    """
+    Partições [início, fim) cobrindo o intervalo fechado [ini, fim] de QUERY_VIAGENS,
+    alinhadas à meia-noite (dia) ou à segunda-feira (semana).
+    """
+    passo = GRANULARIDADES[granularidade]
+    corte = ini.replace(hour=0, minute=0, second=0, microsecond=0)
+    if granularidade == "semana":
+        corte -= timedelta(days=corte.weekday())
+
+    limite = fim + timedelta(microseconds=1)  # BETWEEN inclui o último instante
+    particoes = []
+    inicio = ini
+    while inicio < limite:
+        corte += passo
+        final = min(corte, limite)
+        if final > inicio:
+            particoes.append((inicio, final))
+        inicio = final
+    return particoes
+
+
+def _valor_chave(valor):
+    # Timestamp/np.int64 do pandas -> tipos que o driver sabe enviar
+    if hasattr(valor, "to_pydatetime"):
+        return valor.to_pydatetime()
+    return valor.item() if hasattr(valor, "item") else valor
+
+
+def ler_desde(obra: int, ini: datetime, fim: datetime, marca: Tuple[datetime, int] | None = None,
+              tamanho_pagina: int = TAMANHO_PAGINA):
+    """
+    Viagens de [ini, fim) posteriores à marca (time, id), em ordem, página por página.
+    Devolve (df ou None, nova marca); sem marca, lê a partição inteira.
+    """
+    import pandas as pd
+    from db import load_dataframe
+    from .consultas import QUERY_VIAGENS_PAGINA
+
+    paginas = []
+    ultimo_time, ultimo_id = marca if marca is not None else (ini, -1)
+    while True:
+        pagina = load_dataframe(QUERY_VIAGENS_PAGINA, params={
+            "obra": obra, "ini": ini, "fim": fim,
+            "ultimo_time": ultimo_time, "ultimo_id": ultimo_id, "limite": tamanho_pagina,
+        })
+        if not pagina.empty:
+            paginas.append(pagina)
+            ultimo_time = _valor_chave(pagina["time"].iloc[-1])
+            ultimo_id = _valor_chave(pagina["id_viagem"].iloc[-1])
+        if len(pagina) < tamanho_pagina:
+            break
+
+    if not paginas:
+        return None, (ultimo_time, ultimo_id)
+    df = paginas[0] if len(paginas) == 1 else pd.concat(paginas, ignore_index=True)
+    return df.drop(columns="id_viagem"), (ultimo_time, ultimo_id)
+
+
+def ler_particao(obra: int, ini: datetime, fim: datetime, tamanho_pagina: int = TAMANHO_PAGINA):
+    """Todas as viagens de uma partição, em ordem de (time, id), página por página."""
+    return ler_desde(obra, ini, fim, tamanho_pagina=tamanho_pagina)[0]
+
+
+def iter_particoes(obra: int, ini: datetime, fim: datetime, conexoes: int = CONEXOES_PADRAO,
+                   granularidade: str = "dia", tamanho_pagina: int = TAMANHO_PAGINA,
+                   ordenado: bool = True):
+    """
+    Gera os DataFrames das partições lidas em paralelo (partições vazias são omitidas).
+    No máximo `conexoes` partições ficam em leitura ou à espera de consumo: a
+    seguinte só é pedida quando uma delas é entregue, e a entregue deixa de ser
+    referenciada aqui (o modo streaming depende disso para limitar a memória).
+    ordenado=False entrega na ordem em que terminam (basta para o cubo, que não
+    depende da ordem).
+    """
+    particoes = iter(particionar(ini, fim, granularidade))
+    conexoes = max(1, conexoes)
+    with ThreadPoolExecutor(max_workers=conexoes) as pool:
+        def pedir(n):
+            for a, b in islice(particoes, n):
+                yield pool.submit(ler_particao, obra, a, b, tamanho_pagina)
+
+        if ordenado:
+            pendentes = deque(pedir(conexoes))
+            while pendentes:
+                df = pendentes.popleft().result()
+                pendentes.extend(pedir(1))
+                if df is not None:
+                    yield df
+                del df  # antes de esperar a próxima partição
+        else:
+            pendentes = set(pedir(conexoes))
+            while pendentes:
+                prontos, pendentes = wait(pendentes, return_when=FIRST_COMPLETED)
+                while prontos:
+                    df = prontos.pop().result()
+                    pendentes.update(pedir(1))
+                    if df is not None:
+                        yield df
+                    del df
+
+
+def extrair_viagens(obra: int, ini: datetime, fim: datetime, conexoes: int = CONEXOES_PADRAO,
+                    granularidade: str = "dia", tamanho_pagina: int = TAMANHO_PAGINA):
+    """Mesmo resultado de QUERY_VIAGENS (ordenado por time), lido em paralelo."""
+    import pandas as pd
+
+    partes = list(iter_particoes(obra, ini, fim, conexoes, granularidade, tamanho_pagina))
+    if not partes:
+        from db import load_dataframe
+        from .consultas import QUERY_VIAGENS_PAGINA
+
+        # resultado vazio com as colunas certas
+        vazio = load_dataframe(QUERY_VIAGENS_PAGINA, params={
+            "obra": obra, "ini": ini, "fim": ini, "ultimo_time": ini, "ultimo_id": -1, "limite": 0,
+        })
+        return vazio.drop(columns="id_viagem")
+    return pd.concat(partes, ignore_index=True)
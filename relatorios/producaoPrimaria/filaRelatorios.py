@@ -0,0 +1,411 @@
+"""
+Fila persistente de geração de relatórios (SQLite local).
+
+Os pedidos (obra, período, opções, destinatário) ficam gravados num arquivo
+SQLite; pedidos iguais de (obra, período, opções, arquivo) são fundidos num
+só job, e um pedido repetido de um job já concluído o põe de volta na fila (a
+impressão digital evita refazer o PDF se os dados não mudaram).
+O comando `trabalhar` executa os jobs com N workers, refaz os que falharem com
+espera exponencial e, depois de uma queda, retoma os que ficaram pela metade.
+Cada PDF é escrito num arquivo temporário e renomeado só no fim.
+
+Só um comando `trabalhar` por arquivo de fila: ele registra um sinal de vida na
+tabela `execucao` e recusa iniciar se outro estiver ativo.
+
+Uso:
+    python -m relatorios.producaoPrimaria.filaRelatorios adicionar --obra 41 42 --periodos "2025-07:2025-09"
+    python -m relatorios.producaoPrimaria.filaRelatorios trabalhar --workers 4
+    python -m relatorios.producaoPrimaria.filaRelatorios listar
+"""
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+# Adiciona o diretório raiz do projeto ao sys.path (mesmo motivo da CLI principal)
+project_root = Path(__file__).resolve().parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+FMT = "%Y-%m-%d %H:%M:%S"
+
+CAMINHO_FILA_PADRAO = "filaRelatorios.sqlite"
+MODELO_SAIDA_PADRAO = "producaoPrimaria_{obra}_{periodo}.pdf"
+
+MAX_TENTATIVAS = 5
+ESPERA_BASE = 30.0       # segundos antes da 1ª nova tentativa (dobra a cada falha)
+ESPERA_MAXIMA = 3600.0
+# intervalo do sinal de vida do comando `trabalhar`; sem sinal por 3 intervalos = caiu
+INTERVALO_SINAL = 20.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id           INTEGER PRIMARY KEY AUTOINCREMENT,
+    chave        TEXT    NOT NULL UNIQUE,
+    obra         INTEGER NOT NULL,
+    ini          TEXT    NOT NULL,
+    fim          TEXT    NOT NULL,
+    opcoes       TEXT    NOT NULL,
+    arquivo      TEXT    NOT NULL,
+    destinatarios TEXT   NOT NULL DEFAULT '[]',
+    estado       TEXT    NOT NULL DEFAULT 'pendente',
+    tentativas   INTEGER NOT NULL DEFAULT 0,
+    proxima_em   REAL    NOT NULL DEFAULT 0,
+    iniciado_em  REAL,
+    concluido_em REAL,
+    erro         TEXT,
+    criado_em    REAL    NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_jobs_estado ON jobs (estado, proxima_em);
+CREATE TABLE IF NOT EXISTS execucao (
+    id     INTEGER PRIMARY KEY CHECK (id = 1),
+    pid    INTEGER NOT NULL,
+    sinal  REAL    NOT NULL
+);
+"""
+
+
+class SemDados(Exception):
+    """Período sem viagens: não adianta tentar de novo."""
+
+
+# ---------------------------------------------------------------------
+# Fila
+# ---------------------------------------------------------------------
+
+def conectar(caminho: str | Path = CAMINHO_FILA_PADRAO) -> sqlite3.Connection:
+    con = sqlite3.connect(str(caminho), timeout=30, isolation_level=None)
+    con.row_factory = sqlite3.Row
+    # WAL permite que vários workers leiam enquanto um grava
+    con.execute("PRAGMA journal_mode=WAL")
+    con.executescript(_SCHEMA)
+    return con
+
+
+def chave_job(obra: int, ini: datetime, fim: datetime, opcoes: dict, arquivo: str) -> str:
+    """Identidade do job: pedidos com a mesma chave são fundidos."""
+    destino = os.path.normcase(os.path.abspath(arquivo))
+    return json.dumps([obra, ini.strftime(FMT), fim.strftime(FMT), opcoes, destino], sort_keys=True)
+
+
+def adicionar_job(con, obra: int, ini: datetime, fim: datetime, arquivo: str,
+                  opcoes: dict | None = None, destinatarios=()) -> tuple[int, bool]:
+    """
+    Enfileira um job; devolve (id, novo). Se já existir job com a mesma chave,
+    acrescenta os destinatários; se ele tiver terminado (concluído ou falhou),
+    volta para a fila: leituras atrasadas ou correções entram no PDF, e
+    executar_job não refaz nada se a impressão digital dos dados for a mesma.
+    """
+    opcoes = opcoes or {}
+    chave = chave_job(obra, ini, fim, opcoes, arquivo)
+    agora = time.time()
+    con.execute("BEGIN IMMEDIATE")
+    try:
+        atual = con.execute("SELECT id, destinatarios, estado FROM jobs WHERE chave = ?", (chave,)).fetchone()
+        if atual is None:
+            cur = con.execute(
+                "INSERT INTO jobs (chave, obra, ini, fim, opcoes, arquivo, destinatarios, criado_em) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (chave, obra, ini.strftime(FMT), fim.strftime(FMT), json.dumps(opcoes, sort_keys=True),
+                 arquivo, json.dumps(sorted(set(destinatarios))), agora),
+            )
+            con.execute("COMMIT")
+            return cur.lastrowid, True
+
+        dest = sorted(set(json.loads(atual["destinatarios"])) | set(destinatarios))
+        con.execute("UPDATE jobs SET destinatarios = ? WHERE id = ?", (json.dumps(dest), atual["id"]))
+        if atual["estado"] in ("concluido", "falhou"):
+            con.execute(
+                "UPDATE jobs SET estado = 'pendente', tentativas = 0, proxima_em = 0, erro = NULL WHERE id = ?",
+                (atual["id"],),
+            )
+        con.execute("COMMIT")
+        return atual["id"], False
+    except Exception:
+        con.execute("ROLLBACK")
+        raise
+
+
+def recuperar_interrompidos(con) -> int:
+    """Devolve à fila os jobs que ficaram 'executando' quando o worker caiu."""
+    cur = con.execute("UPDATE jobs SET estado = 'pendente', proxima_em = 0 WHERE estado = 'executando'")
+    return cur.rowcount
+
+
+def reservar_job(con):
+    """Pega o próximo job disponível e marca como 'executando' (atômico)."""
+    agora = time.time()
+    con.execute("BEGIN IMMEDIATE")
+    try:
+        job = con.execute(
+            "SELECT * FROM jobs WHERE estado = 'pendente' AND proxima_em <= ? ORDER BY proxima_em, id LIMIT 1",
+            (agora,),
+        ).fetchone()
+        if job is not None:
+            con.execute(
+                "UPDATE jobs SET estado = 'executando', iniciado_em = ?, tentativas = tentativas + 1 WHERE id = ?",
+                (agora, job["id"]),
+            )
+            # devolve o job como ficou gravado: tentativas já conta esta execução
+            job = dict(job, estado="executando", iniciado_em=agora, tentativas=job["tentativas"] + 1)
+        con.execute("COMMIT")
+        return job
+    except Exception:
+        con.execute("ROLLBACK")
+        raise
+
+
+def concluir_job(con, job_id: int) -> None:
+    con.execute(
+        "UPDATE jobs SET estado = 'concluido', concluido_em = ?, erro = NULL WHERE id = ?",
+        (time.time(), job_id),
+    )
+
+
+def falhar_job(con, job: dict, erro: str, definitivo: bool = False) -> None:
+    """Reagenda com espera exponencial ou marca como 'falhou' após MAX_TENTATIVAS."""
+    if definitivo or job["tentativas"] >= MAX_TENTATIVAS:
+        con.execute("UPDATE jobs SET estado = 'falhou', erro = ? WHERE id = ?", (erro, job["id"]))
+        return
+    espera = min(ESPERA_BASE * 2 ** (job["tentativas"] - 1), ESPERA_MAXIMA)
+    con.execute(
+        "UPDATE jobs SET estado = 'pendente', proxima_em = ?, erro = ? WHERE id = ?",
+        (time.time() + espera, erro, job["id"]),
+    )
+
+
+# ---------------------------------------------------------------------
+# Execução
+# ---------------------------------------------------------------------
+
+def executar_job(job: dict) -> None:
+    """
+    Gera o PDF do job num arquivo temporário e o renomeia ao final (escrita atômica).
+    Se o PDF já existe com a mesma impressão digital dos dados, nada é refeito.
+    """
+    from db import load_dataframe
+    from .consultas import QUERY_NOME_OBRA, QUERY_VIAGENS
+    from .criarPdfRelatorio import criarPdf
+    from .disponibilidadeSensores import HORARIO_OPERACAO, DisponibilidadeSensores
+    from .impressaoDigital import (
+        chave_relatorio, impressao_viagens, opcoes_relatorio, pode_reaproveitar, registrar,
+        relatorio_completo,
+    )
+    from .leiturasDuplicadas import colapsar_leituras
+    from .orcamentoTempo import OrcamentoTempo
+
+    opcoes = json.loads(job["opcoes"])
+    ini = datetime.strptime(job["ini"], FMT)
+    fim = datetime.strptime(job["fim"], FMT)
+    orcamento = OrcamentoTempo(opcoes.get("prazo"))
+
+    df_nome = load_dataframe(QUERY_NOME_OBRA, params={"obra": job["obra"]})
+    nome_obra = df_nome["desc_obra"].iloc[0] if not df_nome.empty else f"Obra {job['obra']}"
+
+    dados = impressao_viagens(job["obra"], ini, fim)
+    if not dados["linhas"]:
+        raise SemDados("sem viagens no período")
+    opcoes_pdf = opcoes_relatorio(job["obra"], ini, fim, nome_obra, otimizar=opcoes.get("otimizar", False),
+                                  horario_operacao=HORARIO_OPERACAO)
+    chave = chave_relatorio(dados, opcoes_pdf)
+    destino = Path(job["arquivo"])
+    if pode_reaproveitar(destino, chave):
+        return
+
+    df = colapsar_leituras(load_dataframe(QUERY_VIAGENS, params={"ini": ini, "fim": fim, "obra": job["obra"]}))
+    if df.empty:
+        raise SemDados("sem viagens no período")
+    sensores = DisponibilidadeSensores.carregar(job["obra"], ini, fim)
+
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    temporario = destino.with_name(f".{destino.name}.{os.getpid()}.tmp")
+    try:
+        criarPdf(df, ini, fim, nome_obra, temporario, orcamento=orcamento,
+                 otimizar=opcoes.get("otimizar", False), sensores=sensores)
+        os.replace(temporario, destino)
+        if relatorio_completo(orcamento):
+            registrar(destino, chave, dados, opcoes_pdf)
+    finally:
+        if temporario.exists():
+            temporario.unlink()
+
+
+def _worker(caminho_fila: str, ocioso_max: float) -> int:
+    """Laço de um worker: reserva, executa e registra jobs até a fila esvaziar."""
+    con = conectar(caminho_fila)
+    feitos = 0
+    ocioso_desde = None
+    while True:
+        job = reservar_job(con)
+        if job is None:
+            # sem job disponível: espera reagendados até `ocioso_max`
+            proximo = con.execute(
+                "SELECT MIN(proxima_em) FROM jobs WHERE estado = 'pendente'"
+            ).fetchone()[0]
+            agora = time.time()
+            ocioso_desde = ocioso_desde or agora
+            if proximo is None or agora - ocioso_desde > ocioso_max:
+                break
+            time.sleep(min(max(proximo - agora, 0.5), 5.0))
+            continue
+
+        ocioso_desde = None
+        t0 = time.perf_counter()
+        try:
+            executar_job(job)
+        except Exception as e:
+            falhar_job(con, job, repr(e), definitivo=isinstance(e, SemDados))
+            print(f"[job {job['id']}] obra {job['obra']} {job['ini']}: falhou ({e!r})", flush=True)
+        else:
+            concluir_job(con, job["id"])
+            feitos += 1
+            print(f"[job {job['id']}] obra {job['obra']} {job['ini']}: {job['arquivo']} "
+                  f"({time.perf_counter() - t0:.1f} s)", flush=True)
+    con.close()
+    return feitos
+
+
+def _registrar_execucao(caminho_fila: str) -> threading.Event:
+    """
+    Marca este processo como o `trabalhar` ativo da fila e mantém o sinal de vida
+    numa thread. Falha se outro comando estiver ativo.
+    """
+    con = conectar(caminho_fila)
+    agora = time.time()
+    con.execute("BEGIN IMMEDIATE")
+    atual = con.execute("SELECT pid, sinal FROM execucao WHERE id = 1").fetchone()
+    if atual is not None and atual["pid"] != os.getpid() and agora - atual["sinal"] < 3 * INTERVALO_SINAL:
+        con.execute("ROLLBACK")
+        con.close()
+        raise RuntimeError(f"já existe um worker ativo nesta fila (pid {atual['pid']})")
+    con.execute("INSERT OR REPLACE INTO execucao (id, pid, sinal) VALUES (1, ?, ?)", (os.getpid(), agora))
+    con.execute("COMMIT")
+    con.close()
+
+    parar = threading.Event()
+
+    def sinal_de_vida():
+        con_sinal = conectar(caminho_fila)
+        while not parar.wait(INTERVALO_SINAL):
+            con_sinal.execute("UPDATE execucao SET sinal = ? WHERE id = 1", (time.time(),))
+        con_sinal.execute("DELETE FROM execucao WHERE id = 1 AND pid = ?", (os.getpid(),))
+        con_sinal.close()
+
+    threading.Thread(target=sinal_de_vida, daemon=True).start()
+    return parar
+
+
+def trabalhar(caminho_fila: str, workers: int = 1, ocioso_max: float = 0.0) -> int:
+    """Retoma jobs interrompidos e processa a fila com `workers` processos."""
+    parar = _registrar_execucao(caminho_fila)
+    try:
+        con = conectar(caminho_fila)
+        recuperados = recuperar_interrompidos(con)
+        con.close()
+        if recuperados:
+            print(f"{recuperados} job(s) interrompido(s) retomado(s)")
+
+        if workers == 1:
+            return _worker(caminho_fila, ocioso_max)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futuros = [pool.submit(_worker, caminho_fila, ocioso_max) for _ in range(workers)]
+            return sum(f.result() for f in futuros)
+    finally:
+        parar.set()
+
+
+# ---------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------
+
+def main():
+    parser = argparse.ArgumentParser(description="Fila de geração de relatórios de produção primária")
+    parser.add_argument("--fila", default=CAMINHO_FILA_PADRAO, help="Arquivo SQLite da fila")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    p_add = sub.add_parser("adicionar", help="Enfileira relatórios")
+    p_add.add_argument("--obra", type=int, nargs="+", action="extend", required=True, help="Código(s) da obra")
+    p_add.add_argument("--periodos", help='Meses AAAA-MM em lista ou intervalo (ex: "2025-07:2025-09")')
+    p_add.add_argument("--ini", help='Data inicial (ex: "2025-08-01 00:00:00")')
+    p_add.add_argument("--fim", help='Data final (ex: "2025-08-31 23:59:59")')
+    p_add.add_argument("--modelo-saida", default=MODELO_SAIDA_PADRAO, help="Modelo do nome do arquivo")
+    p_add.add_argument("--prazo", type=float, help="Tempo máximo de geração por relatório, em segundos")
+    p_add.add_argument("--otimizar", action="store_true", help="PDF menor para arquivo/e-mail")
+    p_add.add_argument("--destinatario", action="append", default=[], help="E-mail de quem pediu (repetível)")
+
+    p_trab = sub.add_parser("trabalhar", help="Processa a fila")
+    p_trab.add_argument("--workers", type=int, default=1, help="Workers em paralelo")
+    p_trab.add_argument(
+        "--aguardar", type=float, default=0.0,
+        help="Segundos que um worker ocioso espera por jobs reagendados antes de sair",
+    )
+
+    sub.add_parser("listar", help="Mostra os jobs e seus estados")
+    args = parser.parse_args()
+
+    if args.comando == "adicionar":
+        from .loteRelatorios import arquivos_saida, campos_modelo, interpretar_periodos, nomes_obras, rotulo_periodo
+
+        if args.periodos and (args.ini or args.fim):
+            parser.error("use --periodos ou --ini/--fim, não ambos")
+        if args.periodos:
+            try:
+                periodos = interpretar_periodos(args.periodos)
+            except ValueError as e:
+                parser.error(str(e))
+        elif args.ini and args.fim:
+            ini = datetime.strptime(args.ini, FMT)
+            fim = datetime.strptime(args.fim, FMT)
+            periodos = [(rotulo_periodo(ini, fim), ini, fim)]
+        else:
+            parser.error("informe --periodos ou --ini e --fim")
+
+        # mesmos campos do modo lote; o nome da obra só é consultado se o modelo o usar
+        obras = list(dict.fromkeys(args.obra))
+        nomes = nomes_obras(obras) if "nome_obra" in campos_modelo(args.modelo_saida) else {}
+        try:
+            arquivos = arquivos_saida(args.modelo_saida, obras, periodos, nomes)
+        except ValueError as e:
+            parser.error(str(e))
+
+        opcoes = {"prazo": args.prazo} if args.prazo is not None else {}
+        if args.otimizar:
+            opcoes["otimizar"] = True
+        con = conectar(args.fila)
+        for obra in obras:
+            for rotulo, ini, fim in periodos:
+                arquivo = arquivos[(obra, rotulo)]
+                job_id, novo = adicionar_job(con, obra, ini, fim, arquivo, opcoes, args.destinatario)
+                situacao = "enfileirado" if novo else "fundido com job existente"
+                print(f"[job {job_id}] obra {obra} {rotulo}: {situacao}")
+        return 0
+
+    if args.comando == "trabalhar":
+        if args.workers < 1:
+            parser.error("o argumento --workers deve ser positivo")
+        try:
+            feitos = trabalhar(args.fila, args.workers, args.aguardar)
+        except RuntimeError as e:
+            print(f"Erro: {e}")
+            return 2
+        con = conectar(args.fila)
+        falhas = con.execute("SELECT COUNT(*) FROM jobs WHERE estado = 'falhou'").fetchone()[0]
+        print(f"{feitos} relatório(s) gerado(s); {falhas} job(s) com falha definitiva")
+        return 1 if falhas else 0
+
+    con = conectar(args.fila)
+    for job in con.execute("SELECT * FROM jobs ORDER BY id"):
+        erro = f"  erro: {job['erro']}" if job["erro"] else ""
+        print(f"[job {job['id']}] obra {job['obra']} {job['ini']} a {job['fim']}  {job['estado']} "
+              f"(tentativas: {job['tentativas']})  {job['arquivo']}{erro}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
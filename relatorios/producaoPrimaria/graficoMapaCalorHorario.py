@@ -0,0 +1,73 @@
+import io
+import math
+
+import pandas as pd
+import matplotlib
+matplotlib.use("Agg")  # backend não interativo: nada de sondar GUI ao importar o pyplot
+import matplotlib.pyplot as plt
+import numpy as np
+
+from .agregadosRelatorio import producao_dia_hora
+from .perfilExecucao import trecho
+from .cuboProducao import CuboProducao
+
+# rótulos de dia no eixo X: no máximo isso, os demais são pulados
+MAX_ROTULOS_DIAS = 31
+
+
+def graficoMapaCalorHorario(dfViagens: pd.DataFrame | CuboProducao, dpi: int = 120) -> io.BytesIO:
+    """
+    Mapa de calor da produção por hora do dia (linhas) e dia do período (colunas),
+    para ver o padrão dos turnos. A matriz vem de producao_dia_hora (uma passada
+    com np.bincount); horas sem produção ficam em branco.
+    dpi: resolução do PNG gerado.
+    """
+    dias, matriz = producao_dia_hora(dfViagens)
+
+    fig, ax = plt.subplots(figsize=(20, 11))
+    if not len(dias):
+        ax.text(0.5, 0.5, "Sem dados no período", ha="center", va="center", fontsize=16)
+        ax.axis("off")
+        buf = io.BytesIO()
+        plt.tight_layout()
+        with trecho("codificacao_png"):
+            plt.savefig(buf, format="PNG")
+        plt.close(fig)
+        buf.seek(0)
+        return buf
+
+    # horas nas linhas (0h no topo), dias nas colunas; zero = sem produção
+    valores = np.ma.masked_less_equal(matriz.T, 0)
+    cmap = plt.get_cmap("YlOrBr").copy()
+    cmap.set_bad("#ffffff")
+    img = ax.imshow(valores, aspect="auto", cmap=cmap, interpolation="nearest", origin="upper")
+
+    barra = fig.colorbar(img, ax=ax, pad=0.01)
+    barra.set_label("Volume descarregado (t)", fontsize=14)
+
+    # período formatado
+    ini = pd.Timestamp(dias[0]).strftime("%d/%m/%Y")
+    fim = pd.Timestamp(dias[-1]).strftime("%d/%m/%Y")
+    ax.set_title(f"Produção por hora do dia: de {ini} a {fim}", fontsize=20, pad=20)
+    ax.set_xlabel("Data", fontsize=14)
+    ax.set_ylabel("Hora", fontsize=14)
+
+    # eixos: todas as horas; dias espaçados em períodos longos
+    ax.set_yticks(np.arange(24))
+    ax.set_yticklabels([f"{h:02d}h" for h in range(24)])
+    passo = max(1, math.ceil(len(dias) / MAX_ROTULOS_DIAS))
+    posicoes = np.arange(0, len(dias), passo)
+    ax.set_xticks(posicoes)
+    ax.set_xticklabels(pd.DatetimeIndex(dias[posicoes]).strftime("%d/%m"), rotation=45, ha="right")
+
+    # separa as horas e os dias com linhas finas
+    ax.hlines(np.arange(-0.5, 24), -0.5, len(dias) - 0.5, color="#eeeeee", linewidth=0.5)
+    ax.vlines(np.arange(-0.5, len(dias)), -0.5, 23.5, color="#eeeeee", linewidth=0.5)
+
+    plt.tight_layout()
+    buf = io.BytesIO()
+    with trecho("codificacao_png"):
+        plt.savefig(buf, format="PNG", dpi=dpi)
+    plt.close(fig)
+    buf.seek(0)
+    return buf
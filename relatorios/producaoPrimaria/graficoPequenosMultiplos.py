@@ -0,0 +1,150 @@
+import io
+import math
+
+import pandas as pd
+import matplotlib
+matplotlib.use("Agg")  # backend não interativo: nada de sondar GUI ao importar o pyplot
+import matplotlib.pyplot as plt
+import numpy as np
+from reportlab.lib.units import cm
+from reportlab.platypus import Image, PageBreak, Paragraph, Spacer
+from utils.primeiraLetraMaiuscula import titlecase_pt
+
+from .perfilExecucao import trecho
+from .cuboProducao import CuboProducao
+
+# seção -> (coluna do DataFrame, dimensão do cubo, título da seção, rótulo do nulo)
+DIMENSOES_DETALHE = {
+    "caminhoes": ("prefixo_veiculo", "caminhao", "Produção diária por caminhão", ""),
+    "motoristas": ("nome", "motorista", "Produção diária por motorista", "não definido"),
+}
+
+# grade de cada página (cabe no frame A4 com margem de 1 cm)
+COLUNAS_GRADE = 3
+LINHAS_GRADE = 5
+LARGURA_PAGINA_CM = 19
+ALTURA_PAGINA_CM = 24
+
+
+def _nomes(serie: pd.Series, chave: str) -> pd.Series:
+    nulo = DIMENSOES_DETALHE[chave][3]
+    nomes = serie.astype(object).where(serie.notna(), nulo).astype(str).replace("", nulo)
+    return nomes.apply(titlecase_pt) if chave == "motoristas" else nomes
+
+
+def series_diarias(fonte: pd.DataFrame | CuboProducao, chave: str = "caminhoes"):
+    """
+    Produção diária de todas as entidades numa só passada.
+    Retorna (entidades, dias, matriz) com matriz[i, j] = volume da entidade i no
+    dia j; entidades em ordem decrescente de produção no período.
+    """
+    coluna, dim, _, _ = DIMENSOES_DETALHE[chave]
+    if isinstance(fonte, CuboProducao):
+        agregado = fonte.agregar(por=(dim, "dia"), medidas=("volume",))
+        nomes = _nomes(pd.Series(agregado[dim], dtype=object), chave)
+        dia = np.asarray(agregado["dia"], dtype="datetime64[D]")
+        volume = agregado["volume"]
+    else:
+        tempo = pd.to_datetime(fonte["time"], errors="coerce")
+        validos = tempo.notna().to_numpy()
+        nomes = _nomes(fonte[coluna][validos].reset_index(drop=True), chave)
+        dia = tempo[validos].to_numpy(dtype="datetime64[D]")
+        volume = pd.to_numeric(fonte["volume_descarregado"], errors="coerce").fillna(0.0).to_numpy()[validos]
+
+    if not len(dia):
+        return [], np.array([], dtype="datetime64[D]"), np.zeros((0, 0))
+
+    codigos, entidades = pd.factorize(nomes)
+    inicio = dia.min()
+    dias = np.arange(inicio, dia.max() + np.timedelta64(1, "D"))
+    n_ent, n_dias = len(entidades), len(dias)
+    indice_dia = (dia - inicio).astype(np.int64)
+
+    matriz = np.bincount(
+        codigos * n_dias + indice_dia, weights=volume, minlength=n_ent * n_dias
+    ).reshape(n_ent, n_dias)
+
+    ordem = np.argsort(-matriz.sum(axis=1), kind="stable")
+    return [entidades[i] for i in ordem], dias, matriz[ordem]
+
+
+def graficosPequenosMultiplos(fonte: pd.DataFrame | CuboProducao, chave: str = "caminhoes",
+                              colunas: int = COLUNAS_GRADE, linhas: int = LINHAS_GRADE,
+                              dpi: int = 90) -> list:
+    """
+    Uma imagem PNG (BytesIO) por página, cada uma com uma grade de mini gráficos.
+    A figura e as linhas são criadas uma vez; a cada página só mudam os dados,
+    os títulos e a escala, o que evita recriar centenas de figuras.
+    """
+    entidades, dias, matriz = series_diarias(fonte, chave)
+    if not entidades:
+        return []
+
+    por_pagina = colunas * linhas
+    x = np.arange(len(dias))
+    rotulos = pd.to_datetime(dias).strftime("%d/%m")
+    passo = max(1, math.ceil(len(dias) / 5))
+
+    fig, eixos = plt.subplots(
+        linhas, colunas,
+        figsize=(LARGURA_PAGINA_CM / 2.54, ALTURA_PAGINA_CM / 2.54),
+    )
+    eixos = np.atleast_1d(eixos).ravel()
+    fig.subplots_adjust(left=0.07, right=0.98, top=0.97, bottom=0.05, hspace=0.55, wspace=0.3)
+
+    artistas = []
+    for ax in eixos:
+        linha, = ax.plot(x, np.zeros(len(x)), "-", color="#333333", linewidth=1.0)
+        pontos, = ax.plot(x, np.zeros(len(x)), "o", color="#003262", markersize=1.8)
+        titulo = ax.set_title("", fontsize=7, pad=3)
+        ax.tick_params(labelsize=5, length=2, pad=1)
+        ax.grid(axis="y", linewidth=0.3, color="#BBBBBB")
+        ax.set_xlim(-0.5, len(x) - 0.5)
+        ax.set_xticks(x[::passo])
+        ax.set_xticklabels(rotulos[::passo])
+        for lado in ("top", "right"):
+            ax.spines[lado].set_visible(False)
+        artistas.append((linha, pontos, titulo))
+
+    imagens = []
+    try:
+        for inicio in range(0, len(entidades), por_pagina):
+            for k, (ax, (linha, pontos, titulo)) in enumerate(zip(eixos, artistas)):
+                i = inicio + k
+                if i >= len(entidades):
+                    ax.set_visible(False)
+                    continue
+                ax.set_visible(True)
+                y = matriz[i]
+                linha.set_ydata(y)
+                pontos.set_ydata(y)
+                total = f"{y.sum():,.0f}".replace(",", ".")
+                titulo.set_text(f"{str(entidades[i])[:26]} · {total} t")
+                ax.set_ylim(0, max(float(y.max()), 1.0) * 1.15)
+
+            buf = io.BytesIO()
+            with trecho("codificacao_png"):
+                fig.savefig(buf, format="PNG", dpi=dpi)
+            buf.seek(0)
+            imagens.append(buf)
+    finally:
+        plt.close(fig)
+    return imagens
+
+
+def criarSecaoPequenosMultiplos(fonte: pd.DataFrame | CuboProducao, styles, chave: str = "caminhoes",
+                                dpi: int = 90) -> list:
+    """Flowables da seção de detalhamento: título + uma grade por página."""
+    _, _, titulo, _ = DIMENSOES_DETALHE[chave]
+    imagens = graficosPequenosMultiplos(fonte, chave, dpi=dpi)
+    if not imagens:
+        return [Paragraph(titulo, styles["Heading2"]), Paragraph("Sem registros no período.", styles["Normal"])]
+
+    elementos = []
+    for n, img in enumerate(imagens, start=1):
+        elementos.append(PageBreak())
+        sufixo = f" ({n}/{len(imagens)})" if len(imagens) > 1 else ""
+        elementos.append(Paragraph(f"{titulo}{sufixo}", styles["Heading2"]))
+        elementos.append(Spacer(1, 0.2 * cm))
+        elementos.append(Image(img, width=LARGURA_PAGINA_CM * cm, height=ALTURA_PAGINA_CM * cm))
+    return elementos
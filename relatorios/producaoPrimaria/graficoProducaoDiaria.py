@@ -1,44 +1,67 @@
 import io
 import pandas as pd
+import matplotlib
+matplotlib.use("Agg")  # backend não interativo: nada de sondar GUI ao importar o pyplot
 import matplotlib.pyplot as plt
 import numpy as np
 from matplotlib.colors import to_rgba
 from matplotlib.patches import Polygon as MplPolygon
 
-def graficoLinhaProducaoDiaria(dfViagens: pd.DataFrame) -> io.BytesIO:
-    
+from .perfilExecucao import trecho
+from .cuboProducao import CuboProducao
+
+def graficoLinhaProducaoDiaria(dfViagens: pd.DataFrame | CuboProducao, dpi: int = 120,
+                               agrupamento: str = "dia") -> io.BytesIO:
+    """
+    dpi: resolução do PNG gerado.
+    agrupamento: "dia" (padrão) ou "semana" (soma por semana, iniciando na segunda-feira).
+    """
     coluna_data = "time"
     coluna_valor = "volume_descarregado"
-    df = dfViagens.copy()
-    
-    # limpeza de dados
-    df[coluna_data] = pd.to_datetime(df[coluna_data], errors="coerce")
-    df[coluna_valor] = pd.to_numeric(df[coluna_valor], errors="coerce").fillna(0)
-    df = df.dropna(subset=[coluna_data])
+
+    if isinstance(dfViagens, CuboProducao):
+        # o cubo já guarda a soma por dia
+        df_diario = (
+            dfViagens.agregar_df(por=("dia",), medidas=("volume",))
+            .rename(columns={"dia": coluna_data, "volume": coluna_valor})
+        )
+    else:
+        df = dfViagens.copy()
+
+        # limpeza de dados
+        df[coluna_data] = pd.to_datetime(df[coluna_data], errors="coerce")
+        df[coluna_valor] = pd.to_numeric(df[coluna_valor], errors="coerce").fillna(0)
+        df = df.dropna(subset=[coluna_data])
+
+        # agrupa por dia e soma o volume
+        df_diario = (
+            df.groupby(df[coluna_data].dt.date)[coluna_valor]
+            .sum()
+            .reset_index()
+            .sort_values(coluna_data)
+        )
     
     fig, ax = plt.subplots(figsize=(20, 11))
-    if df.empty:
+    if df_diario.empty:
         ax.text(0.5, 0.5, "Sem dados no período", ha="center", va="center", fontsize=16)
         ax.axis("off")
         buf = io.BytesIO()
         plt.tight_layout()
-        plt.savefig(buf, format="PNG")
+        with trecho("codificacao_png"):
+            plt.savefig(buf, format="PNG")
         plt.close(fig)
         buf.seek(0)
         return buf
-    
-    # agrupa por dia e soma o volume
-    df_diario = (
-        df.groupby(df[coluna_data].dt.date)[coluna_valor]
-        .sum()
-        .reset_index()
-        .sort_values(coluna_data)
-    )
-    
+
     # período formatado
     ini = df_diario[coluna_data].min().strftime("%d/%m/%Y")
     fim = df_diario[coluna_data].max().strftime("%d/%m/%Y")
     
+    if agrupamento == "semana":
+        # rótulos passam a ser o início de cada semana
+        semana = pd.to_datetime(df_diario[coluna_data]).dt.to_period("W-SUN").dt.start_time.dt.date
+        df_diario = df_diario.groupby(semana.rename(coluna_data))[coluna_valor].sum().reset_index()
+
     # dados
     x = np.arange(len(df_diario))
     y = df_diario[coluna_valor].to_numpy()
@@ -97,7 +120,8 @@ def graficoLinhaProducaoDiaria(dfViagens: pd.DataFrame) -> io.BytesIO:
         )
 
     # títulos e eixos
-    ax.set_title(f"Produção diária: de {ini} a {fim}", fontsize=20, pad=20)
+    titulo = "Produção semanal" if agrupamento == "semana" else "Produção diária"
+    ax.set_title(f"{titulo}: de {ini} a {fim}", fontsize=20, pad=20)
     ax.set_xlabel("Data", fontsize=14)
     ax.set_ylabel("Volume descarregado (t)", fontsize=14)
 
@@ -109,7 +133,8 @@ def graficoLinhaProducaoDiaria(dfViagens: pd.DataFrame) -> io.BytesIO:
 
     plt.tight_layout()
     buf = io.BytesIO()
-    plt.savefig(buf, format="PNG", dpi=120)
+    with trecho("codificacao_png"):
+        plt.savefig(buf, format="PNG", dpi=dpi)
     plt.close(fig)
     buf.seek(0)
     return buf
@@ -1,52 +1,78 @@
 import io
 import pandas as pd
+import matplotlib
+matplotlib.use("Agg")  # backend não interativo: nada de sondar GUI ao importar o pyplot
 import matplotlib.pyplot as plt
 
 from temas.tema_amarelo_dnp import (
   CORES_VIZ
 )
 
-def graficoProducaoCaminhao(dfViagens: pd.DataFrame) -> io.BytesIO:
+from .perfilExecucao import trecho
+from .cuboProducao import CuboProducao, fonte_vazia, periodo_viagens
+
+def graficoProducaoCaminhao(dfViagens: pd.DataFrame | CuboProducao, dpi: int | None = None,
+                            top_n: int | None = None) -> io.BytesIO:
+  """
+  dpi: resolução do PNG (None usa o padrão do matplotlib).
+  top_n: quando informado, plota apenas os N caminhões de maior produção.
+  """
   coluna_valor = "volume_descarregado"
   coluna_caminhao = "prefixo_veiculo"
-  df = dfViagens.copy()
 
   # cria figura
   fig, ax = plt.subplots(figsize=(20, 11))
 
   # caso não tenha dados
-  if df.empty:
+  if fonte_vazia(dfViagens):
     ax.text(0.5, 0.5, "Sem dados no período", ha="center", va="center", fontsize=20)
     ax.axis("off")
 
     buf = io.BytesIO()
     plt.tight_layout()
-    plt.savefig(buf, format="PNG")
+    with trecho("codificacao_png"):
+        plt.savefig(buf, format="PNG")
     plt.close(fig)
     buf.seek(0)
     return buf
 
-  # garante tipos corretos
-  df[coluna_valor] = pd.to_numeric(df[coluna_valor], errors="coerce").fillna(0)
-
   # período formatado
-  ini = df["time"].min().strftime("%d/%m/%Y")
-  fim = df["time"].max().strftime("%d/%m/%Y")
+  t_ini, t_fim = periodo_viagens(dfViagens)
+  ini = t_ini.strftime("%d/%m/%Y")
+  fim = t_fim.strftime("%d/%m/%Y")
 
   # agrega
-  df_group = (
-    df.groupby(coluna_caminhao)[coluna_valor]
-    .sum()
-    .reset_index()
-    .sort_values(coluna_valor, ascending=False)
-  )
+  if isinstance(dfViagens, CuboProducao):
+    df_group = (
+      dfViagens.agregar_df(por=("caminhao",), medidas=("volume",))
+      .rename(columns={"caminhao": coluna_caminhao, "volume": coluna_valor})
+      .dropna(subset=[coluna_caminhao])
+      .sort_values(coluna_valor, ascending=False)
+    )
+  else:
+    df = dfViagens.copy()
+
+    # garante tipos corretos
+    df[coluna_valor] = pd.to_numeric(df[coluna_valor], errors="coerce").fillna(0)
+
+    df_group = (
+      df.groupby(coluna_caminhao)[coluna_valor]
+      .sum()
+      .reset_index()
+      .sort_values(coluna_valor, ascending=False)
+    )
+
+  titulo = "Produção por Caminhão"
+  if top_n is not None and len(df_group) > top_n:
+    df_group = df_group.head(top_n)
+    titulo = f"Produção por Caminhão ({top_n} maiores)"
 
   # plot
   ax.bar(df_group[coluna_caminhao], df_group[coluna_valor], color=CORES_VIZ)
 
   # labels
   ax.set_ylabel("Total descarregado (t)", fontsize=14, fontweight='bold')
-  ax.set_title(f"Produção por Caminhão: de {ini} a {fim}", fontsize=20, pad=20, fontweight='bold')
+  ax.set_title(f"{titulo}: de {ini} a {fim}", fontsize=20, pad=20, fontweight='bold')
 
   # rotaciona o eixo X para não sobrepor
   plt.xticks(rotation=45, ha="right", fontsize=14)
@@ -54,7 +80,8 @@ def graficoProducaoCaminhao(dfViagens: pd.DataFrame) -> io.BytesIO:
   # salva
   buf = io.BytesIO()
   plt.tight_layout()
-  plt.savefig(buf, format="PNG")
+  with trecho("codificacao_png"):
+    plt.savefig(buf, format="PNG", dpi=dpi)
   plt.close(fig)
   buf.seek(0)
   return buf
@@ -1,5 +1,7 @@
 import io
 import pandas as pd
+import matplotlib
+matplotlib.use("Agg")  # backend não interativo: nada de sondar GUI ao importar o pyplot
 import matplotlib.pyplot as plt
 import matplotlib as mpl
 
@@ -7,6 +9,9 @@ from temas.tema_amarelo_dnp import (
   CORES_VIZ
 )
 
+from .perfilExecucao import trecho
+from .cuboProducao import CuboProducao, fonte_vazia, periodo_viagens
+
 def titlecase_pt(s: str) -> str:
   s = ("" if s is None else str(s)).strip().lower()
   if not s:
@@ -35,28 +40,40 @@ def titlecase_pt(s: str) -> str:
   return " ".join(out)
 
 
-def graficoProducaoMotorista(dfViagens: pd.DataFrame, max_chars: int = 25) -> io.BytesIO:
+def graficoProducaoMotorista(dfViagens: pd.DataFrame | CuboProducao, max_chars: int = 25,
+                             dpi: int | None = None, top_n: int | None = None) -> io.BytesIO:
   """
   Retorna BytesIO com PNG do gráfico de produção agrupado por motorista.
 
   max_chars: comprimento máximo exibido por nome antes de truncar/quebrar.
+  dpi: resolução do PNG (None usa o padrão do matplotlib).
+  top_n: quando informado, plota apenas os N motoristas de maior produção.
   """
   coluna_valor = "volume_descarregado"
   coluna_motorista = "nome"
-  df = dfViagens.copy()
 
   fig, ax = plt.subplots(figsize=(20, 11))
 
   # sem dados
-  if df.empty:
+  if fonte_vazia(dfViagens):
     ax.text(0.5, 0.5, "Sem dados no período", ha="center", va="center", fontsize=20)
     ax.axis("off")
     buf = io.BytesIO()
-    fig.savefig(buf, format="PNG", bbox_inches="tight")
+    with trecho("codificacao_png"):
+        fig.savefig(buf, format="PNG", bbox_inches="tight")
     plt.close(fig)
     buf.seek(0)
     return buf
 
+  if isinstance(dfViagens, CuboProducao):
+    # soma por motorista já vem do cubo; reagrupa após normalizar nulos
+    df = (
+      dfViagens.agregar_df(por=("motorista",), medidas=("volume",))
+      .rename(columns={"motorista": coluna_motorista, "volume": coluna_valor})
+    )
+  else:
+    df = dfViagens.copy()
+
   # normaliza
   df[coluna_valor] = pd.to_numeric(df.get(coluna_valor, 0), errors="coerce").fillna(0)
   df[coluna_motorista] = df.get(coluna_motorista, "").fillna("").astype(str)
@@ -76,14 +93,16 @@ def graficoProducaoMotorista(dfViagens: pd.DataFrame, max_chars: int = 25) -> io
     ax.text(0.5, 0.5, "Sem dados no período", ha="center", va="center", fontsize=20)
     ax.axis("off")
     buf = io.BytesIO()
-    fig.savefig(buf, format="PNG", bbox_inches="tight")
+    with trecho("codificacao_png"):
+        fig.savefig(buf, format="PNG", bbox_inches="tight")
     plt.close(fig)
     buf.seek(0)
     return buf
   
   # período formatado
-  ini = df["time"].min().strftime("%d/%m/%Y")
-  fim = df["time"].max().strftime("%d/%m/%Y")
+  t_ini, t_fim = periodo_viagens(dfViagens)
+  ini = t_ini.strftime("%d/%m/%Y")
+  fim = t_fim.strftime("%d/%m/%Y")
 
   df_group[coluna_motorista] = (
     df_group[coluna_motorista]
@@ -93,6 +112,11 @@ def graficoProducaoMotorista(dfViagens: pd.DataFrame, max_chars: int = 25) -> io
     .apply(titlecase_pt)
   ) 
 
+  titulo = "Produção por Motorista"
+  if top_n is not None and len(df_group) > top_n:
+    df_group = df_group.head(top_n)
+    titulo = f"Produção por Motorista ({top_n} maiores)"
+
   nomes = df_group[coluna_motorista].tolist()
   valores = df_group[coluna_valor].astype(float).tolist()
 
@@ -122,7 +146,7 @@ def graficoProducaoMotorista(dfViagens: pd.DataFrame, max_chars: int = 25) -> io
   cores = CORES_VIZ
   if not isinstance(cores, (list, tuple)) or len(cores) < n_barras:
     # usa um cmap (viridis por padrão) para gerar n cores
-    cmap = mpl.cm.get_cmap("viridis", n_barras)
+    cmap = mpl.colormaps["viridis"].resampled(n_barras)
     cores = [cmap(i) for i in range(n_barras)]
 
   # plot
@@ -130,7 +154,7 @@ def graficoProducaoMotorista(dfViagens: pd.DataFrame, max_chars: int = 25) -> io
 
   # labels e título
   ax.set_ylabel("Total descarregado (t)", fontsize=14, fontweight="bold")
-  ax.set_title(f"Produção por Motorista: de {ini} a {fim}", fontsize=20, pad=20, fontweight="bold")
+  ax.set_title(f"{titulo}: de {ini} a {fim}", fontsize=20, pad=20, fontweight="bold")
 
   # ajusta ticks do x
   rot = 45
@@ -142,7 +166,8 @@ def graficoProducaoMotorista(dfViagens: pd.DataFrame, max_chars: int = 25) -> io
 
   # layout e salva
   buf = io.BytesIO()
-  fig.savefig(buf, format="PNG", bbox_inches="tight")
+  with trecho("codificacao_png"):
+    fig.savefig(buf, format="PNG", bbox_inches="tight", dpi=dpi)
   plt.close(fig)
   buf.seek(0)
   return buf
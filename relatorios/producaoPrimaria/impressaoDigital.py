@@ -0,0 +1,140 @@
+"""
+Reaproveitamento de PDFs já gerados (impressão digital dos dados).
+
+Antes de ler as viagens, uma consulta barata (QUERY_IMPRESSAO_VIAGENS: COUNT,
+MAX(time) e SUM(volume) do intervalo) resume os dados de entrada. Junto com a
+versão do renderizador (fontes do projeto + versões de pandas, matplotlib e
+ReportLab) e as opções do relatório, isso forma uma chave gravada ao lado do
+PDF em <saida>.impressao.json. Se o PDF existe e a chave é a mesma, o relatório
+não precisa ser refeito.
+
+Só PDFs completos são registrados: um relatório simplificado pelo prazo
+(--prazo) é refeito na próxima vez.
+"""
+import hashlib
+import json
+import os
+from datetime import datetime
+from functools import lru_cache
+from importlib import metadata
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+# pastas cujo código muda o PDF gerado
+FONTES_RENDERIZADOR = ("relatorios", "temas", "utils")
+BIBLIOTECAS_RENDERIZADOR = ("pandas", "numpy", "matplotlib", "reportlab")
+
+
+@lru_cache(maxsize=1)
+def versao_renderizador() -> str:
+    """Hash das fontes que desenham o relatório e das versões das bibliotecas."""
+    h = hashlib.sha256()
+    for pasta in FONTES_RENDERIZADOR:
+        for arquivo in sorted((PROJECT_ROOT / pasta).rglob("*.py")):
+            h.update(arquivo.relative_to(PROJECT_ROOT).as_posix().encode())
+            h.update(arquivo.read_bytes())
+    for biblioteca in BIBLIOTECAS_RENDERIZADOR:
+        try:
+            versao = metadata.version(biblioteca)
+        except metadata.PackageNotFoundError:
+            versao = "-"
+        h.update(f"{biblioteca}={versao}".encode())
+    return h.hexdigest()[:16]
+
+
+def impressao_viagens(obra: int, ini: datetime, fim: datetime, juncoes: bool = False) -> dict:
+    """
+    Resumo dos dados do intervalo: {"linhas", "ultimo", "volume"}.
+    juncoes: conta só as linhas que as consultas das viagens devolvem (para
+    comparar com o que foi lido); sem elas a consulta não sai do índice.
+    """
+    from db import load_dataframe
+    from .consultas import QUERY_IMPRESSAO_VIAGENS, QUERY_IMPRESSAO_VIAGENS_JUNCOES
+
+    consulta = QUERY_IMPRESSAO_VIAGENS_JUNCOES if juncoes else QUERY_IMPRESSAO_VIAGENS
+    r = load_dataframe(consulta, params={"obra": obra, "ini": ini, "fim": fim}).iloc[0]
+    linhas = int(r["linhas"] or 0)
+    volume = float(r["volume"]) if r["volume"] is not None else 0.0
+    return {
+        "linhas": linhas,
+        "ultimo": str(r["ultimo"]) if linhas else None,
+        # arredondado: SUM de DECIMAL/DOUBLE pode variar na última casa entre planos
+        "volume": round(volume, 3) if volume == volume else 0.0,  # NaN quando só há nulos
+    }
+
+
+def opcoes_relatorio(obra: int, ini: datetime, fim: datetime, nome_obra: str,
+                     detalhamento: tuple = (), otimizar: bool = False,
+                     janela_duplicatas: float | None = None, comparar: str | None = None,
+                     horario_operacao: tuple | None = None, modo: str = "memoria") -> dict:
+    """
+    Opções que mudam o conteúdo do PDF (o prazo não entra: só PDFs completos são registrados).
+    horario_operacao: horário da seção de disponibilidade dos sensores (None: sem a seção).
+    Num período em aberto essa seção vai até agora: um sensor que parou não gera
+    linhas novas, então o minuto atual entra nas opções e o PDF não é reaproveitado.
+    modo: modo de execução (modoExecucao); lote e fila geram sempre em memoria.
+    """
+    from .leiturasDuplicadas import JANELA_PADRAO
+
+    opcoes = {
+        "obra": obra,
+        "ini": ini.isoformat(sep=" "),
+        "fim": fim.isoformat(sep=" "),
+        "nome_obra": str(nome_obra),
+        "detalhamento": list(detalhamento),
+        "otimizar": bool(otimizar),
+        "janela_duplicatas": JANELA_PADRAO if janela_duplicatas is None else float(janela_duplicatas),
+        "comparar": comparar,
+        "horario_operacao": list(horario_operacao) if horario_operacao else None,
+        "modo": modo,
+    }
+    agora = datetime.now()
+    if horario_operacao and fim > agora:
+        opcoes["sensores_ate"] = agora.replace(second=0, microsecond=0).isoformat(sep=" ")
+    return opcoes
+
+
+def chave_relatorio(dados: dict, opcoes: dict) -> str:
+    conteudo = {"dados": dados, "opcoes": opcoes, "renderizador": versao_renderizador()}
+    texto = json.dumps(conteudo, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(texto.encode()).hexdigest()
+
+
+def caminho_registro(caminho_pdf) -> Path:
+    caminho_pdf = Path(caminho_pdf)
+    return caminho_pdf.with_name(f"{caminho_pdf.stem}.impressao.json")
+
+
+def pode_reaproveitar(caminho_pdf, chave: str) -> bool:
+    """O PDF existe e foi gerado com a mesma chave."""
+    if not Path(caminho_pdf).is_file():
+        return False
+    try:
+        registro = json.loads(caminho_registro(caminho_pdf).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return False
+    return registro.get("chave") == chave
+
+
+def relatorio_completo(orcamento) -> bool:
+    """Nenhuma seção foi simplificada ou omitida pelo prazo."""
+    if orcamento is None or orcamento.prazo is None:
+        return True
+    restante = orcamento.restante()
+    return not orcamento.degradadas() and (restante is None or restante > 0)
+
+
+def registrar(caminho_pdf, chave: str, dados: dict, opcoes: dict) -> Path:
+    """Grava <saida>.impressao.json (escrita atômica)."""
+    destino = caminho_registro(caminho_pdf)
+    registro = {
+        "chave": chave,
+        "dados": dados,
+        "opcoes": opcoes,
+        "renderizador": versao_renderizador(),
+        "gerado_em": datetime.now().isoformat(timespec="seconds"),
+    }
+    temporario = destino.with_name(f".{destino.name}.{os.getpid()}.tmp")
+    temporario.write_text(json.dumps(registro, indent=2, default=str, ensure_ascii=False), encoding="utf-8")
+    os.replace(temporario, destino)
+    return destino
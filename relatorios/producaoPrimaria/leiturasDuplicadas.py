@@ -0,0 +1,126 @@
+"""
+Colapso das leituras repetidas do RFID na entrada dos dados.
+
+O portal às vezes registra o mesmo caminhão várias vezes em poucos segundos;
+cada registro vira uma linha em ossj_contador_primario e infla o número de
+viagens. Uma leitura do mesmo tag (user_id_device; sem ele, prefixo_veiculo)
+até `janela` segundos depois da leitura anterior desse tag é repetição e sai
+do DataFrame; a primeira leitura de cada rajada fica.
+
+Tudo é vetorizado: as diferenças de tempo são calculadas por grupo com
+groupby().shift() sobre as viagens em ordem de tempo (a ordem das consultas;
+só um bloco fora de ordem é reordenado). O ColapsadorLeituras guarda a última
+leitura de cada tag, então blocos consecutivos (streaming, --acompanhar)
+colapsam também as rajadas que atravessam a fronteira entre eles.
+
+Não se aplica aos modos que agregam no banco (--modo agregado e --rascunho):
+lá as viagens não chegam linha a linha. O consolidado lê as viagens de todas
+as obras e colapsa cada obra antes de agregar.
+"""
+from typing import Iterable, Iterator
+
+import numpy as np
+import pandas as pd
+
+# segundos; leituras do mesmo tag mais próximas que isso são uma só viagem
+JANELA_PADRAO = 60.0
+# colunas que identificam o tag, em ordem de preferência
+COLUNAS_CHAVE = ("user_id_device", "prefixo_veiculo")
+
+
+def coluna_chave(df: pd.DataFrame) -> str | None:
+    """Coluna usada para identificar o tag lido (None se não houver nenhuma)."""
+    for coluna in COLUNAS_CHAVE:
+        if coluna in df.columns:
+            return coluna
+    return None
+
+
+class ColapsadorLeituras:
+    """
+    Remove as leituras repetidas de um DataFrame ou de uma sequência de blocos
+    em ordem de tempo; conta lidas e removidas para o resumo.
+    """
+
+    def __init__(self, janela: float = JANELA_PADRAO):
+        self.janela = float(janela)
+        self.lidas = 0
+        self.removidas = 0
+        # última leitura de cada tag nos blocos já vistos
+        self._ultima = pd.Series(dtype="datetime64[ns]")
+
+    @property
+    def ativo(self) -> bool:
+        return self.janela > 0
+
+    def repetidas(self, df: pd.DataFrame) -> np.ndarray:
+        """Máscara das linhas que repetem a leitura anterior do mesmo tag dentro da janela."""
+        coluna = coluna_chave(df)
+        if coluna is None or df.empty:
+            return np.zeros(len(df), dtype=bool)
+
+        tempo = pd.to_datetime(df["time"], errors="coerce").reset_index(drop=True)
+        chave = df[coluna].reset_index(drop=True)
+        ordem = None
+        if not tempo.is_monotonic_increasing:
+            # NaT vai para o fim e nunca é repetição
+            ordem = np.argsort(tempo.to_numpy(dtype="datetime64[ns]"), kind="stable")
+            tempo = tempo.iloc[ordem].reset_index(drop=True)
+            chave = chave.iloc[ordem].reset_index(drop=True)
+
+        # leitura anterior do mesmo tag; a primeira do bloco olha os blocos anteriores
+        grupos = tempo.groupby(chave, sort=False)
+        anterior = grupos.shift()
+        if not self._ultima.empty:
+            primeiras = anterior.isna() & chave.notna()
+            anterior[primeiras] = chave[primeiras].map(self._ultima)
+
+        delta = (tempo - anterior).to_numpy(dtype="timedelta64[ns]")
+        limite = np.timedelta64(int(self.janela * 1e9), "ns")
+        with np.errstate(invalid="ignore"):
+            mascara = ~np.isnat(delta) & (delta >= np.timedelta64(0, "ns")) & (delta <= limite)
+
+        ultimas = grupos.max().dropna()
+        if self._ultima.empty:
+            self._ultima = ultimas
+        else:
+            self._ultima = pd.concat([self._ultima, ultimas]).groupby(level=0, sort=False).max()
+
+        if ordem is not None:
+            desordenada = np.empty_like(mascara)
+            desordenada[ordem] = mascara
+            mascara = desordenada
+        return mascara
+
+    def aplicar(self, df: pd.DataFrame) -> pd.DataFrame:
+        """DataFrame sem as leituras repetidas (o próprio df quando não há nenhuma)."""
+        if df is None:
+            return df
+        self.lidas += len(df)
+        if not self.ativo:
+            return df
+        mascara = self.repetidas(df)
+        removidas = int(mascara.sum())
+        if not removidas:
+            return df
+        self.removidas += removidas
+        return df[~mascara].reset_index(drop=True)
+
+    def blocos(self, blocos: Iterable[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+        """Aplica o colapso a cada bloco de uma leitura em ordem de tempo."""
+        for bloco in blocos:
+            yield self.aplicar(bloco)
+
+    def resumo(self) -> str:
+        if not self.ativo:
+            return "Leituras repetidas: colapso desligado (--janela-duplicatas 0)"
+        percentual = 100 * self.removidas / self.lidas if self.lidas else 0.0
+        return (
+            f"Leituras repetidas (mesmo tag em até {self.janela:g} s): "
+            f"{self.removidas} de {self.lidas} removida(s) ({percentual:.1f}%)"
+        )
+
+
+def colapsar_leituras(df: pd.DataFrame, janela: float = JANELA_PADRAO) -> pd.DataFrame:
+    """Atalho para um DataFrame isolado: df sem as leituras repetidas."""
+    return ColapsadorLeituras(janela).aplicar(df)
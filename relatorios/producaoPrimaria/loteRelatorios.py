@@ -0,0 +1,300 @@
+"""
+Geração em lote: várias obras e vários períodos a partir de uma única consulta.
+
+As viagens de todas as obras/períodos pedidos são lidas de uma vez (filtradas por
+codigo_planta e pelos intervalos de tempo), separadas em memória e os PDFs são
+renderizados em paralelo num pool de processos.
+"""
+import os
+import string
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+MODELO_SAIDA_PADRAO = "producaoPrimaria_{obra}_{periodo}.pdf"
+
+
+# ---------------------------------------------------------------------
+# Períodos
+# ---------------------------------------------------------------------
+
+def limites_mes(ano: int, mes: int):
+    """Primeiro e último segundo do mês."""
+    ini = datetime(ano, mes, 1)
+    proximo = (ini.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return ini, proximo - timedelta(seconds=1)
+
+
+def rotulo_periodo(ini: datetime, fim: datetime) -> str:
+    """"AAAA-MM" para um mês completo; senão "AAAAMMDD-AAAAMMDD"."""
+    if (ini, fim) == limites_mes(ini.year, ini.month):
+        return f"{ini:%Y-%m}"
+    return f"{ini:%Y%m%d}-{fim:%Y%m%d}"
+
+
+def _interpretar_mes(texto: str):
+    try:
+        ref = datetime.strptime(texto.strip(), "%Y-%m")
+    except ValueError:
+        raise ValueError(f"Período inválido: {texto!r} (use AAAA-MM)") from None
+    return ref.year, ref.month
+
+
+def interpretar_periodos(texto: str):
+    """
+    Converte "2025-07:2025-09,2025-12" em [(rótulo, ini, fim), ...], um item por mês.
+    Aceita meses isolados (AAAA-MM) e intervalos fechados (AAAA-MM:AAAA-MM).
+    """
+    periodos = []
+    for parte in texto.split(","):
+        if not parte.strip():
+            continue
+        if ":" in parte:
+            a, b = parte.split(":", 1)
+            ano, mes = _interpretar_mes(a)
+            ano_fim, mes_fim = _interpretar_mes(b)
+            if (ano, mes) > (ano_fim, mes_fim):
+                raise ValueError(f"Intervalo de períodos invertido: {parte.strip()!r}")
+            while (ano, mes) <= (ano_fim, mes_fim):
+                periodos.append((f"{ano:04d}-{mes:02d}", *limites_mes(ano, mes)))
+                ano, mes = (ano + 1, 1) if mes == 12 else (ano, mes + 1)
+        else:
+            ano, mes = _interpretar_mes(parte)
+            periodos.append((f"{ano:04d}-{mes:02d}", *limites_mes(ano, mes)))
+
+    if not periodos:
+        raise ValueError("Nenhum período informado")
+    # remove repetidos mantendo a ordem
+    return list(dict.fromkeys(periodos))
+
+
+def campos_modelo(modelo_saida: str) -> set:
+    """Campos usados no modelo de saída ("relatorio_{obra}_{periodo}.pdf" -> {"obra", "periodo"})."""
+    return {campo for _, campo, _, _ in string.Formatter().parse(modelo_saida) if campo}
+
+
+def arquivos_saida(modelo_saida: str, obras, periodos, nomes: dict) -> dict:
+    """
+    {(obra, rótulo): arquivo} pelo modelo de saída (campos obra, nome_obra,
+    periodo, ini e fim). ValueError se o modelo usar outro campo ou se duas
+    combinações caírem no mesmo arquivo: os processos escreveriam por cima
+    um do outro e só o último PDF sobraria.
+    """
+    arquivos = {}
+    donos = {}
+    for obra in obras:
+        nome_obra = str(nomes.get(obra, f"Obra {obra}")).replace(os.sep, "-")
+        for rotulo, ini, fim in periodos:
+            try:
+                arquivo = modelo_saida.format(obra=obra, nome_obra=nome_obra, periodo=rotulo, ini=ini, fim=fim)
+            except (KeyError, IndexError) as e:
+                raise ValueError(
+                    f"--modelo-saida: campo {e} desconhecido (use {{obra}}, {{nome_obra}}, {{periodo}}, "
+                    f"{{ini}} ou {{fim}})"
+                ) from None
+            caminho = os.path.normcase(os.path.abspath(arquivo))
+            if caminho in donos:
+                outra_obra, outro_periodo = donos[caminho]
+                raise ValueError(
+                    f"--modelo-saida gera o mesmo arquivo ({arquivo}) para a obra {outra_obra} "
+                    f"({outro_periodo}) e a obra {obra} ({rotulo}); inclua {{obra}} e {{periodo}} no modelo"
+                )
+            donos[caminho] = (obra, rotulo)
+            arquivos[(obra, rotulo)] = arquivo
+    return arquivos
+
+
+# ---------------------------------------------------------------------
+# Dados
+# ---------------------------------------------------------------------
+
+def nomes_obras(obras) -> dict:
+    """{obra: nome} numa só consulta."""
+    from db import load_dataframe
+    from .consultas import QUERY_NOMES_OBRAS
+
+    df_nomes = load_dataframe(QUERY_NOMES_OBRAS, params={"obras": list(obras)})
+    return dict(zip(df_nomes["id"].astype(int), df_nomes["desc_obra"]))
+
+
+def carregar_viagens_lote(obras, periodos):
+    """Lê todas as viagens pedidas (obras x períodos) numa única consulta."""
+    from db import load_dataframe
+    from .consultas import query_viagens_lote
+
+    params = {"obras": list(obras)}
+    for i, (_, ini, fim) in enumerate(periodos):
+        params[f"ini{i}"] = ini
+        params[f"fim{i}"] = fim
+    return load_dataframe(query_viagens_lote(len(periodos)), params=params)
+
+
+def separar_viagens(df, obras, periodos):
+    """Parte o resultado da consulta em {(obra, rótulo): DataFrame} sem nova leitura."""
+    import pandas as pd
+
+    partes = {}
+    tempo = pd.to_datetime(df["time"], errors="coerce")
+    por_obra = df.groupby(df["codigo_planta"].astype(int)).indices if not df.empty else {}
+    for obra in obras:
+        idx = por_obra.get(obra)
+        for rotulo, ini, fim in periodos:
+            if idx is None:
+                partes[(obra, rotulo)] = df.iloc[0:0].drop(columns="codigo_planta")
+                continue
+            t = tempo.iloc[idx]
+            sel = idx[((t >= ini) & (t <= fim)).to_numpy()]
+            partes[(obra, rotulo)] = (
+                df.iloc[sel].drop(columns="codigo_planta").reset_index(drop=True)
+            )
+    return partes
+
+
+# ---------------------------------------------------------------------
+# Renderização
+# ---------------------------------------------------------------------
+
+def _gerar_relatorio(tarefa: dict) -> dict:
+    """Executado no pool: gera um PDF e devolve o resultado para o resumo."""
+    from .criarPdfRelatorio import criarPdf
+    from .orcamentoTempo import OrcamentoTempo
+    from .perfilExecucao import PerfilExecucao
+
+    from .impressaoDigital import registrar, relatorio_completo
+
+    resultado = {k: tarefa[k] for k in ("obra", "periodo", "arquivo", "viagens")}
+    perfil = PerfilExecucao(cprofile=tarefa["perfil_cprofile"]).ativar() if tarefa["perfil"] else None
+    t0 = time.perf_counter()
+    try:
+        orcamento = OrcamentoTempo(tarefa["prazo"], perfil=perfil)
+        criarPdf(
+            tarefa["df"], tarefa["ini"], tarefa["fim"], tarefa["nome_obra"], tarefa["arquivo"],
+            orcamento=orcamento,
+            detalhamento=tarefa["detalhamento"],
+            otimizar=tarefa["otimizar"],
+            sensores=tarefa["sensores"],
+        )
+        if tarefa["impressao"] is not None and relatorio_completo(orcamento):
+            registrar(tarefa["arquivo"], *tarefa["impressao"])
+        resultado["erro"] = None
+    except Exception as e:
+        resultado["erro"] = repr(e)
+    finally:
+        if perfil is not None:
+            perfil.encerrar()
+    if perfil is not None and resultado["erro"] is None:
+        perfil.salvar(tarefa["arquivo"])
+    resultado["segundos"] = time.perf_counter() - t0
+    return resultado
+
+
+def gerar_lote(obras, periodos, modelo_saida: str = MODELO_SAIDA_PADRAO,
+               processos: int | None = None, prazo: float | None = None,
+               perfil: bool = False, perfil_cprofile: bool = False, detalhamento: tuple = (),
+               forcar: bool = False, otimizar: bool = False, janela_duplicatas: float | None = None,
+               nomes: dict | None = None, horario_operacao: tuple | None = None) -> list:
+    """
+    Gera um relatório por (obra, período). Combinações sem viagens não geram PDF
+    e aparecem no resumo como "sem dados". Com perfil, cada PDF ganha o seu
+    .perfil.json (as consultas são únicas para o lote e não entram nele).
+
+    Sem forcar, combinações cujo PDF já existe com a mesma impressão digital
+    (impressaoDigital) são reaproveitadas e ficam fora da consulta das viagens.
+    As leituras repetidas do RFID são colapsadas em cada (obra, período).
+    ValueError (antes de qualquer PDF) se o modelo de saída repetir um arquivo.
+    nomes: {obra: nome} já consultado (senão é lido aqui).
+    horario_operacao: horário da seção de disponibilidade dos sensores, lida por
+    (obra, período) como na CLI (padrão: HORARIO_OPERACAO).
+    """
+    from .disponibilidadeSensores import HORARIO_OPERACAO, DisponibilidadeSensores
+    from .impressaoDigital import chave_relatorio, impressao_viagens, opcoes_relatorio, pode_reaproveitar
+    from .leiturasDuplicadas import JANELA_PADRAO, colapsar_leituras
+
+    if janela_duplicatas is None:
+        janela_duplicatas = JANELA_PADRAO
+    if horario_operacao is None:
+        horario_operacao = HORARIO_OPERACAO
+
+    if nomes is None:
+        nomes = nomes_obras(obras)
+    arquivos = arquivos_saida(modelo_saida, obras, periodos, nomes)
+    resultados = {}
+    pendentes = {}
+    for obra in obras:
+        nome_obra = nomes.get(obra, f"Obra {obra}")
+        for rotulo, ini, fim in periodos:
+            arquivo = arquivos[(obra, rotulo)]
+            dados = impressao_viagens(obra, ini, fim)
+            opcoes = opcoes_relatorio(obra, ini, fim, nome_obra, detalhamento, otimizar, janela_duplicatas,
+                                      horario_operacao=horario_operacao)
+            chave = chave_relatorio(dados, opcoes)
+            if not forcar and dados["linhas"] and pode_reaproveitar(arquivo, chave):
+                resultados[(obra, rotulo)] = {
+                    "obra": obra, "periodo": rotulo, "arquivo": arquivo, "viagens": dados["linhas"],
+                    "erro": None, "segundos": 0.0, "reaproveitado": True,
+                }
+            else:
+                pendentes[(obra, rotulo)] = (arquivo, nome_obra, (chave, dados, opcoes))
+
+    # a consulta das viagens cobre só as obras e os períodos que ainda faltam
+    obras_pendentes = [o for o in obras if any(k[0] == o for k in pendentes)]
+    periodos_pendentes = [p for p in periodos if any(k[1] == p[0] for k in pendentes)]
+    partes = {}
+    if pendentes:
+        df = carregar_viagens_lote(obras_pendentes, periodos_pendentes)
+        partes = separar_viagens(df, obras_pendentes, periodos_pendentes)
+
+    tarefas = []
+    for obra in obras:
+        for rotulo, ini, fim in periodos:
+            if (obra, rotulo) not in pendentes:
+                continue
+            arquivo, nome_obra, impressao = pendentes[(obra, rotulo)]
+            df_parte = colapsar_leituras(partes[(obra, rotulo)], janela_duplicatas)
+            tarefa = {
+                "obra": obra, "periodo": rotulo, "arquivo": arquivo, "viagens": len(df_parte),
+                "df": df_parte, "ini": ini, "fim": fim, "nome_obra": nome_obra, "prazo": prazo,
+                "perfil": perfil, "perfil_cprofile": perfil_cprofile, "detalhamento": detalhamento,
+                "impressao": impressao, "otimizar": otimizar, "sensores": None,
+            }
+            if df_parte.empty:
+                resultados[(obra, rotulo)] = {
+                    "obra": obra, "periodo": rotulo, "arquivo": arquivo, "viagens": 0,
+                    "erro": None, "segundos": 0.0, "sem_dados": True,
+                }
+            else:
+                tarefa["sensores"] = DisponibilidadeSensores.carregar(obra, ini, fim, horario_operacao)
+                tarefas.append(tarefa)
+
+    processos = processos or os.cpu_count() or 1
+    if len(tarefas) <= 1 or processos == 1:
+        executados = [_gerar_relatorio(t) for t in tarefas]
+    else:
+        with ProcessPoolExecutor(max_workers=min(processos, len(tarefas))) as pool:
+            executados = list(pool.map(_gerar_relatorio, tarefas))
+    for r in executados:
+        resultados[(r["obra"], r["periodo"])] = r
+
+    return [resultados[(obra, rotulo)] for obra in obras for rotulo, _, _ in periodos]
+
+
+def imprimir_resumo(resultados) -> int:
+    """Mostra o que foi produzido e devolve o código de saída combinado (0 = tudo ok)."""
+    falhas = 0
+    print(f"{'Obra':>6}  {'Período':<17} {'Viagens':>8} {'Tempo':>8}  Resultado")
+    for r in resultados:
+        if r.get("sem_dados"):
+            situacao = "sem dados no período"
+        elif r.get("reaproveitado"):
+            situacao = f"{r['arquivo']} (inalterado, reaproveitado)"
+        elif r["erro"]:
+            situacao = f"ERRO: {r['erro']}"
+            falhas += 1
+        else:
+            situacao = r["arquivo"]
+        print(f"{r['obra']:>6}  {r['periodo']:<17} {r['viagens']:>8} {r['segundos']:>7.1f}s  {situacao}")
+
+    reaproveitados = sum(1 for r in resultados if r.get("reaproveitado"))
+    gerados = sum(1 for r in resultados if not r.get("sem_dados") and not r["erro"]) - reaproveitados
+    print(f"{gerados} relatório(s) gerado(s), {reaproveitados} reaproveitado(s), {falhas} falha(s)")
+    return 1 if falhas else 0
@@ -0,0 +1,150 @@
+"""
+Escolha automática do modo de execução pelo tamanho estimado do resultado.
+
+Antes de ler as viagens, estima quantas linhas a consulta vai trazer (COUNT no
+intervalo de codigo_planta/time ou a estimativa do EXPLAIN) e escolhe:
+
+- memoria:   DataFrame completo, como sempre (cabe em --memoria-max);
+- streaming: leitura em blocos com cursor no servidor, acumulados no
+             CuboProducao; a memória fica limitada a um bloco por vez;
+- agregado:  o banco agrega por célula do cubo (obra, dia, hora, caminhão,
+             motorista) e só as células trafegam; para intervalos longos demais
+             até para transferir linha a linha.
+
+Os construtores do relatório aceitam o DataFrame ou o cubo, mas o PDF não é
+idêntico nos três modos: o tempo de ciclo exige as viagens individuais (só no
+memoria) e as leituras repetidas do RFID só são colapsadas no memoria e no
+streaming (no agregado as viagens chegam já somadas, então viagens e totais
+podem ficar acima dos outros modos). nota_modo() dá o aviso impresso no PDF,
+e o modo entra na impressão digital do PDF (impressaoDigital).
+"""
+from typing import Optional, Tuple
+
+MODOS = ("memoria", "streaming", "agregado")
+
+# memória de uma viagem no DataFrame (4 colunas de texto/data + volume) e
+# quanto o processamento multiplica isso (cópias de groupby, to_datetime etc.)
+BYTES_POR_LINHA = 250
+FATOR_PROCESSAMENTO = 4
+
+MEMORIA_MAX_MB_PADRAO = 1024
+LINHAS_STREAMING_MAX_PADRAO = 5_000_000
+TAMANHO_BLOCO = 200_000
+TAMANHO_BLOCO_MIN = 10_000
+
+MB = 1024 * 1024
+
+
+def memoria_estimada_mb(linhas: int) -> float:
+    """Memória de pico estimada para processar `linhas` viagens em memória."""
+    return linhas * BYTES_POR_LINHA * FATOR_PROCESSAMENTO / MB
+
+
+def tamanho_bloco(memoria_max_mb: float) -> int:
+    """Linhas por bloco no streaming: TAMANHO_BLOCO, reduzido se não couber no limite."""
+    cabe = int(memoria_max_mb * MB / (BYTES_POR_LINHA * FATOR_PROCESSAMENTO))
+    return max(TAMANHO_BLOCO_MIN, min(TAMANHO_BLOCO, cabe))
+
+
+def estimar_linhas(obra: int, ini, fim, metodo: str = "count") -> int:
+    """
+    Linhas que QUERY_VIAGENS deve trazer. "count" é exato para a tabela de
+    viagens (limite superior do resultado, que ainda passa pelas junções);
+    "explain" lê a estimativa do otimizador e não percorre o intervalo.
+    """
+    from db import load_dataframe
+    from .consultas import QUERY_CONTAR_VIAGENS, QUERY_EXPLAIN_VIAGENS
+
+    params = {"obra": obra, "ini": ini, "fim": fim}
+    if metodo == "explain":
+        plano = load_dataframe(QUERY_EXPLAIN_VIAGENS, params=params)
+        return int(plano["rows"].fillna(0).sum()) if "rows" in plano else 0
+    return int(load_dataframe(QUERY_CONTAR_VIAGENS, params=params)["linhas"].iloc[0])
+
+
+def escolher_modo(linhas: int, memoria_max_mb: float = MEMORIA_MAX_MB_PADRAO,
+                  linhas_streaming_max: int = LINHAS_STREAMING_MAX_PADRAO,
+                  forcado: Optional[str] = None) -> Tuple[str, str]:
+    """Devolve (modo, motivo)."""
+    if forcado and forcado != "auto":
+        return forcado, "escolhido em --modo"
+    memoria = memoria_estimada_mb(linhas)
+    if memoria <= memoria_max_mb:
+        return "memoria", f"~{memoria:.0f} MB cabe em {memoria_max_mb:.0f} MB"
+    if linhas <= linhas_streaming_max:
+        return "streaming", f"~{memoria:.0f} MB excede {memoria_max_mb:.0f} MB"
+    return "agregado", f"mais de {linhas_streaming_max:,} linhas para transferir".replace(",", ".")
+
+
+def nota_modo(modo: str, colapso_ativo: bool = True) -> Optional[str]:
+    """Aviso para o PDF com o que o modo deixa de fora em relação ao memoria (None no memoria)."""
+    if modo == "memoria":
+        return None
+    if modo == "streaming":
+        return (
+            "Modo streaming (período grande: viagens lidas em blocos e somadas): "
+            "o tempo de ciclo dos caminhões fica indisponível."
+        )
+    repetidas = (
+        "as leituras repetidas do RFID não são colapsadas, então viagens e totais podem ficar "
+        "acima dos modos memoria e streaming, e " if colapso_ativo else ""
+    )
+    return (
+        f"Modo agregado (período grande: viagens somadas no banco): {repetidas}"
+        f"o tempo de ciclo dos caminhões fica indisponível."
+    )
+
+
+def carregar_viagens(obra: int, ini, fim, modo: str, memoria_max_mb: float = MEMORIA_MAX_MB_PADRAO,
+                     conexoes: int = 1, particao: str = "dia", colapsador=None):
+    """
+    Lê as viagens no modo escolhido: DataFrame (memoria) ou CuboProducao (streaming/agregado).
+    conexoes > 1: memoria e streaming leem o período em partições paralelas (extracaoParalela).
+    colapsador (leiturasDuplicadas.ColapsadorLeituras): remove as leituras repetidas do RFID
+    em memoria e streaming; no modo agregado as viagens não chegam linha a linha.
+    """
+    from db import iter_dataframes, load_dataframe
+    from .consultas import QUERY_AGREGADOS_VIAGENS, QUERY_FAIXAS_VOLUME, QUERY_VIAGENS
+    from .cuboProducao import CuboProducao
+    from .esbocoQuantis import FAIXA_ZERO, LN_GAMA, VOLUME_MINIMO
+    from .extracaoParalela import extrair_viagens, iter_particoes
+
+    params = {"ini": ini, "fim": fim, "obra": obra}
+    colapsar = colapsador is not None and colapsador.ativo
+    if modo == "memoria":
+        if conexoes > 1:
+            df = extrair_viagens(obra, ini, fim, conexoes, particao)
+        else:
+            df = load_dataframe(QUERY_VIAGENS, params=params)
+        return colapsador.aplicar(df) if colapsador is not None else df
+    if modo == "streaming":
+        if conexoes > 1:
+            # o colapso compara cada partição com a anterior: precisa delas em ordem
+            blocos = iter_particoes(obra, ini, fim, conexoes, particao,
+                                    tamanho_pagina=tamanho_bloco(memoria_max_mb), ordenado=colapsar)
+        else:
+            blocos = iter_dataframes(QUERY_VIAGENS, params=params, chunksize=tamanho_bloco(memoria_max_mb))
+        if colapsador is not None:
+            blocos = colapsador.blocos(blocos)
+        return CuboProducao.de_blocos(blocos)
+    if modo == "agregado":
+        cubo = CuboProducao()
+        for bloco in iter_dataframes(QUERY_AGREGADOS_VIAGENS, params=params,
+                                     chunksize=tamanho_bloco(memoria_max_mb)):
+            cubo.adicionar_agregados(bloco)
+        # distribuição do volume para os quantis, também somada no banco
+        params_faixas = dict(params, volume_minimo=VOLUME_MINIMO, ln_gama=LN_GAMA, faixa_zero=FAIXA_ZERO)
+        for bloco in iter_dataframes(QUERY_FAIXAS_VOLUME, params=params_faixas,
+                                     chunksize=tamanho_bloco(memoria_max_mb)):
+            cubo.adicionar_faixas(bloco)
+        return cubo
+    raise ValueError(f"Modo desconhecido: {modo}")
+
+
+def linhas_carregadas(fonte) -> int:
+    """Viagens efetivamente lidas (no cubo, a soma das viagens das células)."""
+    from .cuboProducao import CuboProducao
+
+    if isinstance(fonte, CuboProducao):
+        return int(fonte.total("viagens") or 0)
+    return len(fonte)
@@ -0,0 +1,227 @@
+"""
+Motor comum das tabelas do relatório.
+
+Cada tabela é descrita por uma lista de Coluna (título, largura, alinhamento e
+formatador) e vira uma única TabelaContinua:
+- o corpo é formatado por coluna (uma passada em cada coluna do DataFrame, sem
+  iterrows);
+- o TableStyle é montado uma vez por combinação de alinhamentos/opções e
+  compartilhado entre as tabelas;
+- a quebra de página fica com o layout (TabelaContinua divide a tabela onde
+  a página acaba, com o cabeçalho repetido); cada parte seguinte abre em nova
+  página com o título de continuação, calculado uma vez por tabela.
+"""
+from functools import lru_cache
+from typing import Callable, Iterable, List, Optional, Sequence
+
+import pandas as pd
+from reportlab.lib import colors
+from reportlab.lib.units import cm
+from reportlab.platypus import Flowable, LongTable, PageBreak, Paragraph, Spacer, TableStyle
+
+from temas.tema_amarelo_dnp import (
+    COR_FUNDO, COR_GRID,
+    COR_FUNDO_SECUNDARIA,
+    FONTSIZE_HEADER_TABLE,
+    FONTSIZE_CONTENT_TABLE,
+    LINE_BELLOW_HEADER,
+    LINE_BELLOW_HEADER_GRID,
+    FONT_TABLE_HEADER,
+    FONT_TABLE_BODY,
+    COR_BACKGROUND_HEADER,
+)
+
+from .cacheSecoes import assinatura_df
+
+# padding (topo, base) padrão das células
+PADDING_PADRAO = (2, 1)
+
+
+# ---------------------------------------------------------------------
+# Colunas e formatadores
+# ---------------------------------------------------------------------
+
+def fmt_num(v, casas: int = 2) -> str:
+    """Número no formato pt-BR ("1.234,56"); valores inválidos viram 0."""
+    try:
+        v = float(v)
+    except (TypeError, ValueError):
+        v = 0.0
+    if v != v:  # NaN
+        v = 0.0
+    s = f"{v:,.{casas}f}"
+    return s.replace(",", "X").replace(".", ",").replace("X", ".")
+
+
+def fmt_inteiro(v) -> str:
+    return str(int(v))
+
+
+class Coluna:
+    """Coluna de uma tabela: título, largura, alinhamento e formatador do campo."""
+
+    __slots__ = ("titulo", "largura", "alinhamento", "campo", "formatar")
+
+    def __init__(self, titulo: str, largura: float, alinhamento: str = "LEFT",
+                 campo: Optional[str] = None, formatar: Callable = str):
+        self.titulo = titulo
+        self.largura = largura
+        self.alinhamento = alinhamento
+        self.campo = campo
+        self.formatar = formatar
+
+
+def formatar_linhas(colunas: Sequence[Coluna], dados: pd.DataFrame) -> List[list]:
+    """Corpo da tabela: cada coluna formata o seu campo do DataFrame."""
+    valores = [[c.formatar(v) for v in dados[c.campo].tolist()] for c in colunas]
+    return [list(linha) for linha in zip(*valores)]
+
+
+def linhas_em_blocos(nome: str, colunas: Sequence[Coluna], dados: pd.DataFrame, max_linhas: int,
+                     pecas=None) -> List[list]:
+    """
+    Corpo da tabela formatado em blocos de max_linhas; com pecas (cacheSecoes.CachePecas)
+    só os blocos que mudaram desde a última geração são formatados de novo.
+    """
+    linhas = []
+    for i in range(0, len(dados), max_linhas):
+        bloco = dados.iloc[i:i + max_linhas]
+        if pecas is None:
+            linhas.extend(formatar_linhas(colunas, bloco))
+        else:
+            linhas.extend(pecas.valor(nome, (assinatura_df(bloco),), lambda: formatar_linhas(colunas, bloco)))
+    return linhas
+
+
+# ---------------------------------------------------------------------
+# Estilo
+# ---------------------------------------------------------------------
+
+@lru_cache(maxsize=None)
+def estilo_tabela(alinhamentos: tuple, padding: tuple = PADDING_PADRAO,
+                  linha_total: bool = False) -> TableStyle:
+    """TableStyle do tema, montado uma vez por combinação e compartilhado pelas tabelas."""
+    comandos = [
+        # Cabeçalho
+        ("FONTNAME", (0, 0), (-1, 0), FONT_TABLE_HEADER),
+        ("FONTSIZE", (0, 0), (-1, 0), FONTSIZE_HEADER_TABLE),
+        ("BACKGROUND", (0, 0), (-1, 0), COR_FUNDO),
+        ("TEXTCOLOR", (0, 0), (-1, 0), COR_BACKGROUND_HEADER),
+        ("LINEBELOW", (0, 0), (-1, 0), LINE_BELLOW_HEADER, COR_GRID),
+
+        # Corpo
+        ("FONTNAME", (0, 1), (-1, -1), FONT_TABLE_BODY),
+        ("FONTSIZE", (0, 1), (-1, -1), FONTSIZE_CONTENT_TABLE),
+        ("LINEBELOW", (0, 1), (-1, -1), LINE_BELLOW_HEADER_GRID, COR_GRID),
+        ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+        ("ROWBACKGROUNDS", (0, 1), (-1, -1), [COR_FUNDO_SECUNDARIA, COR_FUNDO]),
+
+        # Espaçamentos
+        ("TOPPADDING", (0, 0), (-1, -1), padding[0]),
+        ("BOTTOMPADDING", (0, 0), (-1, -1), padding[1]),
+        ("GRID", (0, 0), (-1, -1), 0, colors.transparent),
+    ]
+    comandos += [
+        ("ALIGN", (i, 0), (i, -1), alinhamento)
+        for i, alinhamento in enumerate(alinhamentos) if alinhamento != "LEFT"
+    ]
+    if linha_total:
+        comandos += [
+            ("FONTNAME", (0, -1), (-1, -1), "Helvetica-Bold"),
+            ("LINEABOVE", (0, -1), (-1, -1), LINE_BELLOW_HEADER, COR_GRID),
+        ]
+    return TableStyle(comandos)
+
+
+# ---------------------------------------------------------------------
+# Tabela
+# ---------------------------------------------------------------------
+
+@lru_cache(maxsize=None)
+def _alturas_linhas(estilo: TableStyle) -> tuple:
+    """(altura do cabeçalho, altura de uma linha do corpo) medidas pelo ReportLab uma vez por estilo."""
+    amostra = LongTable([["Ág"], ["Ág"]], colWidths=[cm])
+    amostra.setStyle(estilo)
+    amostra.wrap(10 * cm, 10 * cm)
+    return tuple(amostra._rowHeights)
+
+
+class TabelaContinua(Flowable):
+    """
+    Tabela de células de uma linha, com cabeçalho repetido em cada página.
+
+    A altura sai das alturas fixas do cabeçalho e das linhas, sem medir as
+    células; quando não cabe, a divisão monta uma LongTable só com as linhas
+    que cabem e deixa o resto para a próxima página, aberta pelo título de
+    continuação. Assim cada linha é montada uma vez, qualquer que seja o
+    tamanho da tabela.
+    """
+
+    def __init__(self, cabecalho: list, linhas: list, larguras: Sequence[float], estilo: TableStyle,
+                 continuacao=None, estilo_parcial: Optional[TableStyle] = None):
+        super().__init__()
+        self.cabecalho = cabecalho
+        self.linhas = linhas
+        self.larguras = list(larguras)
+        self.estilo = estilo
+        self.continuacao = continuacao  # (texto, estilo) ou None
+        # estilo das partes que não terminam a tabela (ex.: sem a linha de total)
+        self.estilo_parcial = estilo_parcial or estilo
+        self.hAlign = "CENTER"
+        self.altura_cabecalho, self.altura_linha = _alturas_linhas(estilo)
+
+    def _tabela(self, linhas: list, estilo: TableStyle) -> LongTable:
+        tabela = LongTable(
+            [self.cabecalho, *linhas], colWidths=self.larguras, repeatRows=1,
+            rowHeights=[self.altura_cabecalho] + [self.altura_linha] * len(linhas),
+        )
+        tabela.setStyle(estilo)
+        tabela.hAlign = self.hAlign
+        return tabela
+
+    def wrap(self, availWidth, availHeight):
+        self.width = sum(self.larguras)
+        self.height = self.altura_cabecalho + self.altura_linha * len(self.linhas)
+        return self.width, self.height
+
+    def split(self, availWidth, availHeight):
+        cabem = int((availHeight - self.altura_cabecalho) // self.altura_linha)
+        if cabem < 1:
+            return []
+        if cabem >= len(self.linhas):
+            return [self._tabela(self.linhas, self.estilo)]
+        resto = TabelaContinua(
+            self.cabecalho, self.linhas[cabem:], self.larguras, self.estilo, self.continuacao, self.estilo_parcial,
+        )
+        partes = [self._tabela(self.linhas[:cabem], self.estilo_parcial)]
+        if self.continuacao is not None:
+            texto, estilo = self.continuacao
+            partes += [PageBreak(), Paragraph(texto, estilo), Spacer(1, 0.2 * cm)]
+        return partes + [resto]
+
+    def drawOn(self, canvas, x, y, _sW=0):
+        tabela = self._tabela(self.linhas, self.estilo)
+        tabela.wrapOn(canvas, self.width, self.height)
+        tabela.drawOn(canvas, x, y, _sW)
+
+
+def criar_tabela(colunas: Sequence[Coluna], linhas: Iterable[list], continuacao=None,
+                 padding: tuple = PADDING_PADRAO, linha_total: bool = False) -> TabelaContinua:
+    """Tabela do tema com cabeçalho das colunas; continuacao: (texto, estilo) das páginas seguintes."""
+    alinhamentos = tuple(c.alinhamento for c in colunas)
+    return TabelaContinua(
+        [c.titulo for c in colunas], list(linhas), [c.largura for c in colunas],
+        estilo_tabela(alinhamentos, tuple(padding), linha_total), continuacao,
+        estilo_parcial=estilo_tabela(alinhamentos, tuple(padding)),
+    )
+
+
+def secao_tabela(titulo: str, titulo_continuacao: str, colunas: Sequence[Coluna], linhas: Iterable[list],
+                 styles, padding: tuple = PADDING_PADRAO, linha_total: bool = False) -> list:
+    """Título da seção + tabela; o primeiro elemento é sempre o título."""
+    estilo = styles["Heading2"]
+    return [
+        Paragraph(titulo, estilo),
+        Spacer(1, 0.2 * cm),
+        criar_tabela(colunas, linhas, (titulo_continuacao, estilo), padding, linha_total),
+    ]
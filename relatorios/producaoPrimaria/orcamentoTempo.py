@@ -0,0 +1,243 @@
+"""
+Orçamento de tempo (--prazo) para a geração do relatório.
+
+Estima o custo de cada etapa a partir das contagens do período (viagens, dias,
+caminhões, motoristas) e escolhe, para cada seção, a variante mais completa que
+ainda cabe no tempo restante. Depois de cada etapa o plano é refeito com o tempo
+realmente gasto, de modo que um atraso em uma etapa degrada as seguintes.
+
+Não importa pandas no carregamento: o orçamento é criado pela CLI antes de
+qualquer módulo pesado.
+"""
+import math
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Dict, Iterable, Optional, Set
+
+# ---------------------------------------------------------------------
+# Variantes e custos
+# ---------------------------------------------------------------------
+
+# parâmetros das variantes reduzidas
+DPI_REDUZIDO = 60
+TOP_N_REDUZIDO = 20
+
+# variantes por etapa, da mais completa para a mais barata
+VARIANTES = {
+    "indicadores": ("completo",),
+    "grafico_diario": ("completo", "reduzido", "semanal"),
+    "grafico_horario": ("completo", "reduzido", "omitido"),
+    "tabela_diaria": ("completo",),
+    "grafico_caminhoes": ("completo", "reduzido", "omitido"),
+    "tabela_caminhoes": ("completo", "reduzido", "omitido"),
+    "grafico_motoristas": ("completo", "reduzido", "omitido"),
+    "tabela_motoristas": ("completo", "reduzido", "omitido"),
+    "tabela_ciclos": ("completo", "reduzido", "omitido"),
+    "tabela_sensores": ("completo", "reduzido", "omitido"),
+    "tabela_cargas": ("completo", "reduzido", "omitido"),
+    "montagem": ("completo",),
+}
+
+# ordem em que as seções são degradadas quando o prazo não é suficiente
+DEGRADACOES = (
+    ("grafico_diario", "reduzido"),
+    ("grafico_horario", "reduzido"),
+    ("grafico_caminhoes", "reduzido"),
+    ("grafico_motoristas", "reduzido"),
+    ("grafico_diario", "semanal"),
+    ("grafico_horario", "omitido"),
+    ("tabela_sensores", "reduzido"),
+    ("tabela_cargas", "reduzido"),
+    ("tabela_ciclos", "reduzido"),
+    ("tabela_motoristas", "reduzido"),
+    ("tabela_caminhoes", "reduzido"),
+    ("tabela_cargas", "omitido"),
+    ("tabela_ciclos", "omitido"),
+    ("tabela_sensores", "omitido"),
+    ("grafico_motoristas", "omitido"),
+    ("tabela_motoristas", "omitido"),
+    ("grafico_caminhoes", "omitido"),
+    ("tabela_caminhoes", "omitido"),
+)
+
+# custo estimado (s) = base + soma(coeficiente * dimensão); medidos com matplotlib Agg
+CUSTOS = {
+    ("indicadores", "completo"): (0.01, {"viagens": 1.5e-6}),
+    ("grafico_diario", "completo"): (0.6, {"dias": 0.014, "viagens": 1e-6}),
+    ("grafico_diario", "reduzido"): (0.3, {"dias": 0.01, "viagens": 1e-6}),
+    ("grafico_diario", "semanal"): (0.3, {"semanas": 0.01, "viagens": 1e-6}),
+    ("grafico_horario", "completo"): (0.7, {"dias": 0.005, "viagens": 2e-7}),
+    ("grafico_horario", "reduzido"): (0.35, {"dias": 0.003, "viagens": 2e-7}),
+    ("tabela_diaria", "completo"): (0.01, {"dias": 0.002, "viagens": 4e-6}),
+    ("grafico_caminhoes", "completo"): (0.2, {"caminhoes": 0.008, "viagens": 1e-6}),
+    ("grafico_caminhoes", "reduzido"): (0.1, {"caminhoes_top": 0.004, "viagens": 1e-6}),
+    ("tabela_caminhoes", "completo"): (0.01, {"caminhoes": 0.002, "viagens": 1.5e-6}),
+    ("tabela_caminhoes", "reduzido"): (0.01, {"caminhoes_pagina": 0.002, "viagens": 1.5e-6}),
+    ("grafico_motoristas", "completo"): (0.2, {"motoristas": 0.0035, "viagens": 1e-6}),
+    ("grafico_motoristas", "reduzido"): (0.1, {"motoristas_top": 0.003, "viagens": 1e-6}),
+    ("tabela_motoristas", "completo"): (0.01, {"motoristas": 0.002, "viagens": 4e-6}),
+    ("tabela_motoristas", "reduzido"): (0.01, {"motoristas_pagina": 0.002, "viagens": 4e-6}),
+    ("tabela_ciclos", "completo"): (0.02, {"caminhoes": 0.002, "dias": 0.002, "viagens": 1e-6}),
+    ("tabela_ciclos", "reduzido"): (0.02, {"caminhoes_pagina": 0.002, "dias": 0.002, "viagens": 1e-6}),
+    ("tabela_sensores", "completo"): (0.01, {"dias": 0.0002}),
+    ("tabela_sensores", "reduzido"): (0.01, {}),
+    ("tabela_cargas", "completo"): (0.01, {"caminhoes": 0.002, "motoristas": 0.002, "viagens": 5e-7}),
+    ("tabela_cargas", "reduzido"): (
+        0.01, {"caminhoes_pagina": 0.002, "motoristas_pagina": 0.002, "viagens": 5e-7},
+    ),
+    ("montagem", "completo"): (0.1, {"imagens": 0.2}),
+}
+
+# avisos exibidos no PDF para seções degradadas
+AVISOS = {
+    "reduzido": "Seção simplificada para cumprir o prazo de geração.",
+    "semanal": "Seção agregada por semana para cumprir o prazo de geração.",
+    "omitido": "Seção omitida para cumprir o prazo de geração.",
+}
+
+# linhas por página nas tabelas de caminhões/motoristas (variante reduzida)
+LINHAS_PAGINA = 38
+
+
+def contar_dimensoes(fonte) -> Dict[str, int]:
+    """Contagens usadas pelas estimativas, a partir do DataFrame de viagens ou do cubo."""
+    import pandas as pd
+    from .cuboProducao import CuboProducao
+
+    if isinstance(fonte, CuboProducao):
+        viagens = int(fonte.total("viagens") or 0)
+        dias = len(fonte.valores("dia"))
+        caminhoes = len(fonte.valores("caminhao"))
+        motoristas = len(fonte.valores("motorista"))
+    else:
+        viagens = len(fonte)
+        dias = pd.to_datetime(fonte["time"], errors="coerce").dt.normalize().nunique() if viagens else 0
+        caminhoes = fonte["prefixo_veiculo"].nunique() if "prefixo_veiculo" in fonte else 0
+        motoristas = fonte["nome"].nunique(dropna=False) if "nome" in fonte else 0
+
+    return {
+        "viagens": viagens,
+        "dias": dias,
+        "semanas": math.ceil(dias / 7),
+        "caminhoes": caminhoes,
+        "caminhoes_top": min(caminhoes, TOP_N_REDUZIDO),
+        "caminhoes_pagina": min(caminhoes, LINHAS_PAGINA),
+        "motoristas": motoristas,
+        "motoristas_top": min(motoristas, TOP_N_REDUZIDO),
+        "motoristas_pagina": min(motoristas, LINHAS_PAGINA),
+    }
+
+
+# ---------------------------------------------------------------------
+# Orçamento
+# ---------------------------------------------------------------------
+
+class OrcamentoTempo:
+    """
+    Controla o prazo da geração e registra o tempo gasto por etapa.
+
+    prazo: segundos disponíveis desde a criação do objeto (None = sem prazo;
+    nesse caso todas as seções saem completas e apenas os tempos são medidos).
+    perfil: PerfilExecucao opcional (--perfil) que também mede cada etapa.
+    """
+
+    def __init__(self, prazo: Optional[float] = None, perfil=None):
+        self.prazo = prazo
+        self.perfil = perfil
+        self.inicio = time.perf_counter()
+        self.tempos: Dict[str, float] = {}
+        self.estimativas: Dict[str, float] = {}
+        self.plano: Dict[str, str] = {}
+        self.dimensoes: Optional[Dict[str, int]] = None
+        # etapas sem entrada neste relatório: "omitido" sem contar como degradação
+        self.ausentes: Set[str] = set()
+
+    def decorrido(self) -> float:
+        return time.perf_counter() - self.inicio
+
+    def restante(self) -> Optional[float]:
+        if self.prazo is None:
+            return None
+        return self.prazo - self.decorrido()
+
+    def estimar(self, etapa: str, variante: str) -> float:
+        if variante == "omitido" or self.dimensoes is None:
+            return 0.0
+        base, coefs = CUSTOS[(etapa, variante)]
+        dims = dict(self.dimensoes, imagens=self._imagens_planejadas())
+        return base + sum(c * dims.get(d, 0) for d, c in coefs.items())
+
+    def _imagens_planejadas(self) -> int:
+        graficos = ("grafico_diario", "grafico_horario", "grafico_caminhoes", "grafico_motoristas")
+        return sum(1 for g in graficos if self.plano.get(g, "completo") != "omitido")
+
+    def planejar(self, dimensoes: Optional[Dict[str, int]] = None,
+                 ausentes: Optional[Iterable[str]] = None) -> Dict[str, str]:
+        """
+        Escolhe as variantes das etapas ainda não executadas para caber no tempo restante.
+        ausentes: etapas que o relatório não tem (ex.: tabela_sensores sem dados dos sensores).
+        """
+        if dimensoes is not None:
+            self.dimensoes = dimensoes
+        if ausentes is not None:
+            self.ausentes = set(ausentes)
+        pendentes = [e for e in VARIANTES if e not in self.tempos]
+        for etapa in pendentes:
+            self.plano[etapa] = "omitido" if etapa in self.ausentes else "completo"
+
+        restante = self.restante()
+        if restante is not None:
+            for etapa, variante in DEGRADACOES:
+                if self._estimativa_pendentes(pendentes) <= restante:
+                    break
+                if etapa in pendentes and etapa not in self.ausentes:
+                    self.plano[etapa] = variante
+
+        for etapa in pendentes:
+            self.estimativas[etapa] = self.estimar(etapa, self.plano[etapa])
+        return dict(self.plano)
+
+    def _estimativa_pendentes(self, pendentes) -> float:
+        return sum(self.estimar(e, self.plano[e]) for e in pendentes)
+
+    def variante(self, etapa: str) -> str:
+        return self.plano.get(etapa, "completo")
+
+    def aviso(self, etapa: str) -> Optional[str]:
+        """Texto a exibir no PDF quando a seção foi degradada (None se completa)."""
+        return AVISOS.get(self.variante(etapa))
+
+    @contextmanager
+    def etapa(self, nome: str, rotulo: Optional[str] = None):
+        """
+        Mede a etapa `nome`. Com perfil ativo, ela é registrada como `rotulo`
+        (ex.: cada consulta separada dentro de "consulta"); o registro do perfil
+        é devolvido para receber contagens como "linhas".
+        """
+        medicao = self.perfil.etapa(rotulo or nome) if self.perfil is not None else nullcontext({})
+        t0 = time.perf_counter()
+        try:
+            with medicao as registro:
+                yield registro
+        finally:
+            self.tempos[nome] = self.tempos.get(nome, 0.0) + (time.perf_counter() - t0)
+            # refaz o plano das etapas seguintes com o tempo real gasto
+            if self.prazo is not None and self.dimensoes is not None:
+                self.planejar()
+
+    def degradadas(self) -> Dict[str, str]:
+        return {e: v for e, v in self.plano.items() if v != "completo" and e not in self.ausentes}
+
+    def resumo(self) -> str:
+        linhas = ["Tempo por etapa:"]
+        for nome, dt in self.tempos.items():
+            variante = self.plano.get(nome)
+            extra = f" [{variante}]" if variante and variante != "completo" else ""
+            estimado = self.estimativas.get(nome)
+            est = f" (estimado {estimado:.2f} s)" if estimado is not None else ""
+            linhas.append(f"  {nome:<20} {dt:8.2f} s{est}{extra}")
+        linhas.append(f"  {'total':<20} {self.decorrido():8.2f} s")
+        if self.prazo is not None:
+            situacao = "dentro do prazo" if self.decorrido() <= self.prazo else "prazo excedido"
+            linhas.append(f"  prazo: {self.prazo:.2f} s ({situacao})")
+        return "\n".join(linhas)
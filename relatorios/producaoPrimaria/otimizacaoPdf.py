@@ -0,0 +1,155 @@
+"""
+Modo de saída otimizada (--otimizar) para arquivar e enviar por e-mail.
+
+- as imagens dos gráficos são reduzidas ao tamanho em que aparecem na página
+  (DPI_ALVO), perdem o canal alfa (que o ReportLab gravaria como uma segunda
+  imagem, a SMask) e são quantizadas para uma paleta de CORES_PALETA cores, o
+  que deixa o Flate do PDF muito mais eficiente;
+- imagens idênticas são processadas uma vez e gravadas como o mesmo objeto;
+- o logo da capa é reduzido ao tamanho desenhado;
+- os streams saem comprimidos e em binário, sem a codificação ASCII85
+  (rl_config.useA85), que aumenta cada stream em 25%.
+
+O ReportLab expande PNG com paleta para RGB ao embutir, então a paleta vale
+pela compressão e não pelo formato indexado em si.
+
+O tamanho que o PDF teria sem otimização não é medido (seria um segundo
+build completo): é estimado somando ao PDF gerado o que as imagens e o logo
+encolheram (erro típico de ±10%).
+"""
+import hashlib
+import io
+import os
+from contextlib import contextmanager
+
+from PIL import Image as PILImage
+from reportlab import rl_config
+from reportlab.lib.utils import ImageReader
+from reportlab.platypus import Image
+
+DPI_ALVO = 150
+CORES_PALETA = 256
+QUALIDADE_JPEG_LOGO = 90
+
+
+def _pixels(largura_pt: float, altura_pt: float, dpi: int):
+    return max(1, round(largura_pt / 72 * dpi)), max(1, round(altura_pt / 72 * dpi))
+
+
+def _ler_bytes(fonte) -> bytes:
+    if isinstance(fonte, (bytes, bytearray)):
+        return bytes(fonte)
+    if hasattr(fonte, "getvalue"):
+        return fonte.getvalue()
+    with open(fonte, "rb") as f:
+        return f.read()
+
+
+def _fonte_flowable(f: Image):
+    # o Image guarda o arquivo em _file até ler a imagem; depois, no ImageReader (_img.fp)
+    if getattr(f, "_file", None) is not None:
+        return f._file
+    return f._img.fp
+
+
+@contextmanager
+def streams_binarios():
+    """Desliga o ASCII85 durante o build (configuração global do ReportLab)."""
+    anterior = rl_config.useA85
+    rl_config.useA85 = 0
+    try:
+        yield
+    finally:
+        rl_config.useA85 = anterior
+
+
+class OtimizadorImagens:
+    """Reduz, quantiza e deduplica as imagens de um story; guarda os tamanhos para o resumo."""
+
+    def __init__(self, dpi: int = DPI_ALVO, cores: int = CORES_PALETA):
+        self.dpi = dpi
+        self.cores = cores
+        self._feitas = {}
+        self.imagens = 0
+        self.duplicadas = 0
+        self.bytes_antes = 0
+        self.bytes_depois = 0
+        self.bytes_logo_antes = 0
+        self.bytes_logo_depois = 0
+
+    def png(self, fonte, largura_pt: float, altura_pt: float) -> bytes:
+        """PNG reduzido ao tamanho exibido e quantizado (mesma entrada e tamanho -> mesmo resultado)."""
+        dados = _ler_bytes(fonte)
+        chave = (hashlib.sha1(dados).hexdigest(), _pixels(largura_pt, altura_pt, self.dpi))
+        self.imagens += 1
+        if chave in self._feitas:
+            self.duplicadas += 1
+            return self._feitas[chave]
+
+        img = PILImage.open(io.BytesIO(dados))
+        if img.mode in ("RGBA", "LA", "P"):
+            fundo = PILImage.new("RGB", img.size, "white")
+            img = img.convert("RGBA")
+            fundo.paste(img, mask=img.getchannel("A"))
+            img = fundo
+        else:
+            img = img.convert("RGB")
+        largura_px, altura_px = chave[1]
+        if img.width > largura_px or img.height > altura_px:
+            img = img.resize((min(img.width, largura_px), min(img.height, altura_px)), PILImage.LANCZOS)
+        img = img.quantize(colors=self.cores, method=PILImage.Quantize.MEDIANCUT, dither=PILImage.Dither.NONE)
+
+        saida = io.BytesIO()
+        img.save(saida, format="PNG", optimize=True)
+        resultado = self._feitas[chave] = saida.getvalue()
+        self.bytes_antes += len(dados)
+        self.bytes_depois += len(resultado)
+        return resultado
+
+    def story(self, story: list) -> list:
+        """Troca os Image do story pelas versões otimizadas, mantendo o tamanho na página."""
+        saida = []
+        for f in story:
+            if isinstance(f, Image):
+                novo = Image(io.BytesIO(self.png(_fonte_flowable(f), f.drawWidth, f.drawHeight)),
+                             width=f.drawWidth, height=f.drawHeight)
+                novo.hAlign = f.hAlign
+                f = novo
+            saida.append(f)
+        return saida
+
+    def logo(self, caminho, largura_pt: float, altura_pt: float) -> ImageReader | None:
+        """Logo reduzido ao tamanho desenhado na capa (JPEG), ou None se não houver arquivo."""
+        try:
+            img = PILImage.open(caminho).convert("RGB")
+            self.bytes_logo_antes = os.path.getsize(caminho)
+        except OSError:
+            return None
+        img.thumbnail(_pixels(largura_pt, altura_pt, self.dpi), PILImage.LANCZOS)
+        saida = io.BytesIO()
+        img.save(saida, format="JPEG", quality=QUALIDADE_JPEG_LOGO, optimize=True)
+        self.bytes_logo_depois = saida.tell()
+        saida.seek(0)
+        return ImageReader(saida)
+
+    def estimar_original(self, bytes_pdf: int) -> int:
+        """Tamanho estimado do PDF sem otimização: o gerado mais o que as imagens encolheram."""
+        economia = (self.bytes_antes - self.bytes_depois) + (self.bytes_logo_antes - self.bytes_logo_depois)
+        return bytes_pdf + max(economia, 0)
+
+    def resumo(self, bytes_pdf: int) -> str:
+        def kb(n):
+            return f"{n / 1024:,.0f} KB".replace(",", ".")
+
+        linhas = []
+        antes = self.estimar_original(bytes_pdf)
+        if antes > bytes_pdf:
+            reducao = 100 * (1 - bytes_pdf / antes)
+            linhas.append(f"Tamanho do PDF: ~{kb(antes)} (estimado, sem otimização) -> {kb(bytes_pdf)} (-{reducao:.0f}%)")
+        else:
+            linhas.append(f"Tamanho do PDF: {kb(bytes_pdf)}")
+        linhas.append(
+            f"Imagens: {self.imagens} ({self.duplicadas} duplicada(s)), "
+            f"PNG {kb(self.bytes_antes)} -> {kb(self.bytes_depois)}"
+        )
+        return "\n".join(linhas)
@@ -0,0 +1,186 @@
+"""
+Perfil de execução (--perfil) da geração do relatório.
+
+Mede cada etapa (consultas, construtores de seção, montagem do PDF): tempo,
+pico de memória Python (tracemalloc), RSS do processo e contagem de linhas.
+Trechos internos, como a codificação dos PNGs, são medidos dentro da etapa em
+andamento. Ao final grava um JSON ao lado do PDF e, opcionalmente, o cProfile
+da etapa mais lenta (abrir com `python -m pstats` ou snakeviz).
+
+Só usa a biblioteca padrão: pode ser importado pela CLI antes dos módulos
+pesados. Sem perfil ativo, `trecho` não mede nada.
+"""
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# perfil em uso no processo (None = sem instrumentação)
+_ATIVO: Optional["PerfilExecucao"] = None
+
+MB = 1024 * 1024
+
+
+def _rss_mb() -> Optional[float]:
+    """RSS atual do processo (Linux), ou None se indisponível."""
+    try:
+        with open("/proc/self/statm") as f:
+            paginas = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return paginas * resource.getpagesize() / MB if resource else None
+
+
+def _rss_pico_mb() -> Optional[float]:
+    """Maior RSS do processo até agora (ru_maxrss vem em KB no Linux)."""
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def caminhos_perfil(caminho_pdf) -> Dict[str, Path]:
+    """Arquivos gravados ao lado do PDF: relatorio.perfil.json e relatorio.perfil.prof."""
+    base = Path(caminho_pdf)
+    return {
+        "json": base.with_name(f"{base.stem}.perfil.json"),
+        "cprofile": base.with_name(f"{base.stem}.perfil.prof"),
+    }
+
+
+class PerfilExecucao:
+    """
+    Registra tempo, memória e linhas por etapa.
+
+    cprofile: também roda o cProfile em cada etapa e guarda o da mais lenta.
+    O tracemalloc deixa a execução mais lenta; os tempos do perfil servem para
+    comparar etapas entre si, não para medir o tempo normal de geração.
+    """
+
+    def __init__(self, cprofile: bool = False):
+        self.cprofile = cprofile
+        self.etapas: Dict[str, dict] = {}
+        self._perfis = {}
+        self._atual: Optional[dict] = None
+        self.inicio = time.perf_counter()
+        self._iniciou_tracemalloc = not tracemalloc.is_tracing()
+        if self._iniciou_tracemalloc:
+            tracemalloc.start()
+
+    def ativar(self) -> "PerfilExecucao":
+        """Torna este o perfil do processo (usado por `trecho`)."""
+        global _ATIVO
+        _ATIVO = self
+        return self
+
+    def encerrar(self) -> None:
+        global _ATIVO
+        if _ATIVO is self:
+            _ATIVO = None
+        if self._iniciou_tracemalloc and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    @contextmanager
+    def etapa(self, nome: str):
+        """
+        Mede uma etapa; o registro devolvido aceita contagens extras
+        (ex.: registro["linhas"] = len(df)). Etapas repetidas acumulam.
+        """
+        registro = self.etapas.setdefault(nome, {
+            "segundos": 0.0, "chamadas": 0, "pico_memoria_mb": 0.0, "trechos": {},
+        })
+        anterior = self._atual
+        self._atual = registro
+
+        perfil = None
+        if self.cprofile:
+            import cProfile
+
+            perfil = self._perfis.get(nome) or cProfile.Profile()
+            self._perfis[nome] = perfil
+
+        if tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+        t0 = time.perf_counter()
+        if perfil is not None:
+            perfil.enable()
+        try:
+            yield registro
+        finally:
+            if perfil is not None:
+                perfil.disable()
+            registro["segundos"] += time.perf_counter() - t0
+            registro["chamadas"] += 1
+            if tracemalloc.is_tracing():
+                pico = tracemalloc.get_traced_memory()[1] / MB
+                registro["pico_memoria_mb"] = max(registro["pico_memoria_mb"], pico)
+            registro["rss_mb"] = _rss_mb()
+            self._atual = anterior
+
+    @contextmanager
+    def _trecho(self, nome: str):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            if self._atual is not None:
+                trechos = self._atual["trechos"]
+                trechos[nome] = trechos.get(nome, 0.0) + (time.perf_counter() - t0)
+
+    def mais_lenta(self) -> Optional[str]:
+        if not self.etapas:
+            return None
+        return max(self.etapas, key=lambda e: self.etapas[e]["segundos"])
+
+    def dados(self) -> dict:
+        return {
+            "gerado_em": datetime.now().isoformat(timespec="seconds"),
+            "total_segundos": time.perf_counter() - self.inicio,
+            "rss_pico_mb": _rss_pico_mb(),
+            "etapa_mais_lenta": self.mais_lenta(),
+            "etapas": self.etapas,
+        }
+
+    def salvar(self, caminho_pdf) -> Dict[str, Path]:
+        """Grava o JSON (e o cProfile da etapa mais lenta) ao lado do PDF."""
+        caminhos = caminhos_perfil(caminho_pdf)
+        gravados = {"json": caminhos["json"]}
+        caminhos["json"].write_text(
+            json.dumps(self.dados(), ensure_ascii=False, indent=2), encoding="utf-8"
+        )
+        lenta = self.mais_lenta()
+        if self.cprofile and lenta in self._perfis:
+            self._perfis[lenta].dump_stats(str(caminhos["cprofile"]))
+            gravados["cprofile"] = caminhos["cprofile"]
+        return gravados
+
+    def resumo(self) -> str:
+        linhas = ["Perfil por etapa:"]
+        for nome, r in self.etapas.items():
+            extra = f"  {r['linhas']:>9} linhas" if "linhas" in r else ""
+            linhas.append(
+                f"  {nome:<20} {r['segundos']:8.2f} s  pico {r['pico_memoria_mb']:8.1f} MB{extra}"
+            )
+            for trecho, dt in r["trechos"].items():
+                linhas.append(f"    {trecho:<18} {dt:8.2f} s")
+        rss = _rss_pico_mb()
+        if rss is not None:
+            linhas.append(f"  RSS máximo do processo: {rss:.1f} MB")
+        return "\n".join(linhas)
+
+
+@contextmanager
+def trecho(nome: str):
+    """Mede um trecho dentro da etapa em andamento do perfil ativo (no-op sem perfil)."""
+    if _ATIVO is None:
+        yield
+        return
+    with _ATIVO._trecho(nome):
+        yield
@@ -10,8 +10,10 @@ project_root = Path(__file__).resolve().parent.parent.parent
 if str(project_root) not in sys.path:
     sys.path.insert(0, str(project_root))
 
-from db import load_dataframe
-from .criarPdfRelatorio import criarPdf
+# Módulos pesados (pandas, SQLAlchemy, matplotlib, ReportLab) são importados
+# dentro de main, apenas na etapa que os usa: --ajuda e erros de argumento
+# respondem sem carregá-los.
+from .orcamentoTempo import OrcamentoTempo
 
 FMT = "%Y-%m-%d %H:%M:%S"
 
@@ -24,6 +26,101 @@ def parse_dt(value: Optional[str], *, default: Optional[datetime] = None) -> dat
     raise ValueError("Data inválida: forneça no formato YYYY-MM-DD HH:MM:SS")
 
 
+def parse_horario(value: str) -> tuple:
+    """"6-22" -> (6, 22): horário de operação esperado dos sensores RFID."""
+    try:
+        ini, fim = (int(p) for p in value.split("-"))
+    except ValueError:
+        raise ValueError(f"horário inválido: {value!r} (use HH-HH, ex: 6-22)") from None
+    if not 0 <= ini < fim <= 24:
+        raise ValueError(f"horário inválido: {value!r} (início antes do fim, entre 0 e 24)")
+    return ini, fim
+
+
+# opções que o serviço de relatórios não recebe (do pedido só vão obra, período e --prazo)
+OPCOES_LOCAIS = (
+    "otimizar", "detalhamento", "janela_duplicatas", "horario_operacao", "sem_cache",
+    "modo", "memoria_max", "streaming_max", "estimativa", "conexoes", "particao",
+)
+
+
+def opcoes_locais_usadas(args, parser) -> list:
+    """Opções de OPCOES_LOCAIS informadas com valor diferente do padrão, como na linha de comando."""
+    return ["--" + nome.replace("_", "-") for nome in OPCOES_LOCAIS
+            if getattr(args, nome) != parser.get_default(nome)]
+
+
+def finalizar_perfil(perfil, caminho_pdf) -> None:
+    """Encerra o perfil (--perfil), mostra o resumo e grava os arquivos ao lado do PDF."""
+    if perfil is None:
+        return
+    perfil.encerrar()
+    print(perfil.resumo())
+    for arquivo in perfil.salvar(caminho_pdf).values():
+        print(f"Perfil gravado em: {arquivo.resolve()}")
+
+
+def carregar_viagens_colapsadas(args, obra, data_inicio, data_final, modo):
+    """Lê as viagens no modo escolhido, sem as leituras repetidas do RFID; devolve (dados, colapsador)."""
+    from .leiturasDuplicadas import ColapsadorLeituras
+    from .modoExecucao import carregar_viagens
+
+    colapsador = ColapsadorLeituras(args.janela_duplicatas)
+    df = carregar_viagens(
+        obra, data_inicio, data_final, modo,
+        memoria_max_mb=args.memoria_max, conexoes=args.conexoes, particao=args.particao,
+        colapsador=colapsador,
+    )
+    return df, colapsador
+
+
+def resumo_colapso(colapsador, modo: str) -> str:
+    if modo == "agregado" and colapsador.ativo:
+        return "Leituras repetidas: não colapsadas no modo agregado (as viagens são somadas no banco)"
+    return colapsador.resumo()
+
+
+def exportar_dados(args, obra, data_inicio, data_final, nome_obra, orcamento, perfil) -> int:
+    """Modo --exportar: uma leitura dos dados, todos os formatos pedidos, nada renderizado."""
+    from .exportacaoDados import dependencias_faltando
+
+    faltando = dependencias_faltando(args.exportar)
+    if faltando:
+        print("Erro: " + "; ".join(faltando))
+        return 1
+
+    base = args.out or "producaoPrimaria"
+    with orcamento.etapa("consulta", rotulo="estimativa_linhas") as registro:
+        from .modoExecucao import escolher_modo, estimar_linhas, linhas_carregadas
+
+        estimativa = estimar_linhas(obra, data_inicio, data_final, metodo=args.estimativa)
+        modo, motivo = escolher_modo(
+            estimativa, args.memoria_max, args.streaming_max, forcado=args.modo,
+        )
+        registro.update(linhas=estimativa, modo=modo)
+    print(f"Estimativa ({args.estimativa}): {estimativa} viagens -> modo {modo} ({motivo})")
+
+    with orcamento.etapa("consulta", rotulo="consulta_viagens") as registro:
+        df, colapsador = carregar_viagens_colapsadas(args, obra, data_inicio, data_final, modo)
+        registro.update(linhas=linhas_carregadas(df), modo=modo, conexoes=args.conexoes,
+                        removidas=colapsador.removidas)
+    print(resumo_colapso(colapsador, modo))
+
+    print(f"Exportação: {nome_obra} | Período: {data_inicio.strftime(FMT)} a {data_final.strftime(FMT)}")
+
+    with orcamento.etapa("agregados"):
+        from .exportacaoDados import exportar, tabelas_exportacao
+
+        tabelas = tabelas_exportacao(df, obra, nome_obra, data_inicio, data_final)
+    with orcamento.etapa("exportacao"):
+        gravados = exportar(tabelas, base, args.exportar)
+    for arquivo in gravados:
+        print(f"Dados exportados em: {arquivo.resolve()}")
+    print(orcamento.resumo())
+    finalizar_perfil(perfil, Path(base).with_suffix(".pdf"))
+    return 0
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Gerar relatório de produção primária",
@@ -31,9 +128,109 @@ def main():
     )
     parser.add_argument("--ini", help='Data inicial (ex: "2025-08-01 00:00:00")')
     parser.add_argument("--fim", help='Data final (ex: "2025-08-28 23:59:59")')
-    parser.add_argument("--obra", type=int, help="Código da obra (ex: 41)")
+    parser.add_argument(
+        "--obra", type=int, nargs="+", action="extend",
+        help="Código da obra; várias obras geram um relatório por obra (ex: 41 42)",
+    )
     parser.add_argument("--ajuda", action="store_true", help="Mostrar exemplos de uso")
     parser.add_argument("--out", help='Caminho para o arquivo de saída (ex: "relatorio.pdf")')
+    parser.add_argument(
+        "--prazo", type=float,
+        help="Tempo máximo de geração em segundos; seções são simplificadas para cumpri-lo (ex: 30)",
+    )
+    parser.add_argument(
+        "--periodos",
+        help='Meses AAAA-MM, em lista ou intervalo, um relatório por mês (ex: "2025-07:2025-09,2025-12")',
+    )
+    parser.add_argument(
+        "--modelo-saida",
+        help='Modelo do nome dos arquivos no modo lote; campos {obra}, {nome_obra}, {periodo}, {ini}, {fim} '
+             '(ex: "relatorio_{obra}_{periodo}.pdf")',
+    )
+    parser.add_argument("--processos", type=int, help="Processos de renderização no modo lote (padrão: nº de CPUs)")
+    parser.add_argument(
+        "--servidor",
+        help='URL do serviço de relatórios; se indisponível, gera localmente (ex: "http://127.0.0.1:8765")',
+    )
+    parser.add_argument(
+        "--modo", choices=("auto", "memoria", "streaming", "agregado"), default="auto",
+        help="Execução: em memória, em blocos (streaming) ou agregada no banco; auto escolhe pela estimativa",
+    )
+    parser.add_argument(
+        "--memoria-max", type=float, default=1024,
+        help="Memória (MB) disponível para o modo em memória; acima disso usa streaming",
+    )
+    parser.add_argument(
+        "--streaming-max", type=int, default=5_000_000,
+        help="Linhas acima das quais o modo auto agrega no banco em vez de transferir as viagens",
+    )
+    parser.add_argument(
+        "--estimativa", choices=("count", "explain"), default="count",
+        help="Como estimar o tamanho do resultado: COUNT no intervalo ou EXPLAIN do otimizador",
+    )
+    parser.add_argument(
+        "--conexoes", type=int, default=1,
+        help="Conexões para ler as viagens em paralelo, particionando o período (ex: 4)",
+    )
+    parser.add_argument(
+        "--particao", choices=("dia", "semana"), default="dia",
+        help="Tamanho das partições da leitura paralela",
+    )
+    parser.add_argument(
+        "--janela-duplicatas", type=float, default=60.0,
+        help="Segundos em que leituras repetidas do mesmo caminhão pelo RFID contam como uma viagem (0 desliga)",
+    )
+    parser.add_argument(
+        "--comparar", choices=("anterior", "ano"),
+        help="Mostra nos cards e tabelas a variação em relação ao período anterior "
+             "(mês anterior para meses inteiros) ou ao mesmo período do ano anterior",
+    )
+    parser.add_argument(
+        "--horario-operacao", default="6-22",
+        help="Horário de operação esperado dos sensores RFID (HH-HH); a seção de disponibilidade "
+             "mostra as janelas sem leitura dentro dele",
+    )
+    parser.add_argument(
+        "--detalhamento", nargs="+", choices=("caminhoes", "motoristas"), default=[],
+        help="Acrescenta páginas com a curva diária de cada caminhão e/ou motorista",
+    )
+    parser.add_argument(
+        "--rascunho", action="store_true",
+        help="Prévia de uma página (indicadores, gráfico diário compacto e maiores caminhões/motoristas)",
+    )
+    parser.add_argument(
+        "--acompanhar", action="store_true",
+        help="Mantém o relatório atualizado: busca só as viagens novas a cada --intervalo e regrava o PDF",
+    )
+    parser.add_argument(
+        "--intervalo", type=float, default=60.0,
+        help="Segundos entre as consultas do modo --acompanhar",
+    )
+    parser.add_argument(
+        "--otimizar", action="store_true",
+        help="PDF menor para arquivo/e-mail: imagens reduzidas e com paleta, streams comprimidos",
+    )
+    parser.add_argument(
+        "--exportar", nargs="+", choices=("csv", "parquet", "xlsx"),
+        help="Em vez do PDF, grava os agregados (diária, caminhões, motoristas e indicadores) "
+             "nos formatos pedidos, com --out como base dos nomes",
+    )
+    parser.add_argument(
+        "--forcar", action="store_true",
+        help="Refaz o PDF mesmo que os dados e as opções não tenham mudado desde a última geração",
+    )
+    parser.add_argument(
+        "--sem-cache", action="store_true",
+        help="Refaz todos os gráficos, tabelas e indicadores sem usar as peças gravadas em .cache/pecas",
+    )
+    parser.add_argument(
+        "--perfil", action="store_true",
+        help="Mede tempo, memória e linhas por etapa e grava um JSON ao lado do PDF",
+    )
+    parser.add_argument(
+        "--perfil-cprofile", action="store_true",
+        help="Com --perfil, grava também o cProfile da etapa mais lenta (.perfil.prof)",
+    )
     args = parser.parse_args()
 
     if args.ajuda:
@@ -42,13 +239,95 @@ def main():
         print('--fim: Data final (ex: "2025-09-30 23:59:59")')
         print("--obra: Código da obra (ex: 41)")
         print("--out: Caminho para o arquivo de saída (ex: \"relatorio.pdf\")")
+        print("--prazo: Tempo máximo de geração em segundos (ex: 30)")
+        print('--periodos: Meses AAAA-MM, em lista ou intervalo (ex: "2025-07:2025-09,2025-12")')
+        print('--modelo-saida: Nome dos arquivos no modo lote (ex: "relatorio_{obra}_{periodo}.pdf")')
+        print("--processos: Processos de renderização no modo lote (ex: 4)")
+        print('--servidor: URL do serviço de relatórios; gera o relatório padrão, só com --prazo '
+              '(ex: "http://127.0.0.1:8765")')
+        print("--modo: auto, memoria, streaming ou agregado (ex: streaming)")
+        print("--memoria-max: Memória em MB para o modo em memória (ex: 2048)")
+        print("--streaming-max: Linhas acima das quais o modo auto agrega no banco (ex: 5000000)")
+        print("--estimativa: count ou explain (ex: explain)")
+        print("--conexoes: Conexões para leitura paralela por partição de tempo (ex: 4)")
+        print("--particao: dia ou semana, tamanho das partições da leitura paralela (ex: semana)")
+        print("--janela-duplicatas: Segundos para colapsar leituras repetidas do RFID; 0 desliga (ex: 30)")
+        print("--comparar: Variação em relação ao período anterior ou ao mesmo período do ano anterior (ex: ano)")
+        print("--horario-operacao: Horário esperado de leitura dos sensores RFID (ex: 5-23)")
+        print("--detalhamento: Curva diária por caminhão e/ou motorista (ex: caminhoes motoristas)")
+        print("--rascunho: Prévia rápida de uma página a partir dos agregados")
+        print("--acompanhar: Atualiza o PDF com as viagens novas até Ctrl+C (ex: --acompanhar --intervalo 120)")
+        print("--intervalo: Segundos entre as consultas do modo --acompanhar (ex: 120)")
+        print("--otimizar: Gera um PDF menor e mostra o tamanho antes e depois")
+        print("--exportar: Grava os agregados em csv, parquet e/ou xlsx sem gerar o PDF (ex: csv xlsx)")
+        print("--forcar: Refaz o PDF mesmo sem mudanças nos dados (por padrão ele é reaproveitado)")
+        print("--sem-cache: Não reaproveita gráficos e blocos de tabela de gerações anteriores")
+        print("--perfil: Grava o perfil de tempo/memória por etapa em <saida>.perfil.json")
+        print("--perfil-cprofile: Com --perfil, grava o cProfile da etapa mais lenta em <saida>.perfil.prof")
         print(
             'Exemplo: python -m relatorios.producaoPrimaria.producaoPrimariaContadorAutomatico --ini "2025-09-01 00:00:00" --fim "2025-09-30 23:59:59" --obra 41 --out "./relatorio_producao.pdf"'
         )
-        return
+        print(
+            'Exemplo (lote): python -m relatorios.producaoPrimaria.producaoPrimariaContadorAutomatico --obra 41 42 --periodos "2025-07:2025-09" --modelo-saida "relatorio_{obra}_{periodo}.pdf"'
+        )
+        return 0
 
     if args.obra is None:
         parser.error("o argumento --obra é obrigatório (use --ajuda para exemplos)")
+    if args.prazo is not None and args.prazo <= 0:
+        parser.error("o argumento --prazo deve ser positivo")
+    if args.processos is not None and args.processos < 1:
+        parser.error("o argumento --processos deve ser positivo")
+    if args.memoria_max <= 0:
+        parser.error("o argumento --memoria-max deve ser positivo")
+    if args.streaming_max < 1:
+        parser.error("o argumento --streaming-max deve ser positivo")
+    if args.conexoes < 1:
+        parser.error("o argumento --conexoes deve ser positivo")
+    if args.perfil_cprofile and not args.perfil:
+        parser.error("--perfil-cprofile exige --perfil")
+    if args.periodos and (args.ini or args.fim):
+        parser.error("use --periodos ou --ini/--fim, não ambos")
+
+    obras = list(dict.fromkeys(args.obra))
+    lote = len(obras) > 1 or bool(args.periodos) or bool(args.modelo_saida)
+    if lote and args.out:
+        parser.error("no modo lote use --modelo-saida em vez de --out")
+    if args.servidor and args.perfil:
+        parser.error("--perfil mede a geração local; não use com --servidor")
+    if lote and args.servidor:
+        parser.error("--servidor atende apenas um relatório por vez")
+    if args.servidor and opcoes_locais_usadas(args, parser):
+        parser.error(f"--servidor gera o relatório padrão e não recebe "
+                     f"{', '.join(opcoes_locais_usadas(args, parser))}; gere localmente para usá-las")
+    if args.rascunho and (lote or args.servidor):
+        parser.error("--rascunho gera uma prévia local de uma obra e um período")
+    if args.acompanhar and (lote or args.servidor or args.rascunho or args.perfil):
+        parser.error("--acompanhar atualiza um único relatório local; não combina com lote, "
+                     "--servidor, --rascunho ou --perfil")
+    if args.exportar and (lote or args.servidor or args.rascunho or args.acompanhar):
+        parser.error("--exportar grava os dados de uma obra e um período; não combina com lote, "
+                     "--servidor, --rascunho ou --acompanhar")
+    if args.janela_duplicatas < 0:
+        parser.error("o argumento --janela-duplicatas não pode ser negativo")
+    if args.comparar and (lote or args.servidor or args.rascunho or args.acompanhar or args.exportar):
+        parser.error("--comparar compara um único relatório local; não combina com lote, "
+                     "--servidor, --rascunho, --acompanhar ou --exportar")
+    if args.intervalo <= 0:
+        parser.error("o argumento --intervalo deve ser positivo")
+    try:
+        horario_operacao = parse_horario(args.horario_operacao)
+    except ValueError as e:
+        parser.error(f"--horario-operacao: {e}")
+
+    perfil = None
+    if args.perfil and not lote:
+        from .perfilExecucao import PerfilExecucao
+
+        perfil = PerfilExecucao(cprofile=args.perfil_cprofile).ativar()
+
+    # o prazo conta a partir daqui (inclui as consultas ao banco)
+    orcamento = OrcamentoTempo(args.prazo, perfil=perfil)
 
     # Defaults para mês corrente
     now = datetime.now()
@@ -59,44 +338,198 @@ def main():
     data_inicio = parse_dt(args.ini, default=start_default)
     data_final = parse_dt(args.fim, default=end_default)
 
+    if lote:
+        from .loteRelatorios import (
+            MODELO_SAIDA_PADRAO, arquivos_saida, campos_modelo, gerar_lote, imprimir_resumo,
+            interpretar_periodos, nomes_obras, rotulo_periodo,
+        )
+
+        if args.periodos:
+            try:
+                periodos = interpretar_periodos(args.periodos)
+            except ValueError as e:
+                parser.error(str(e))
+        else:
+            periodos = [(rotulo_periodo(data_inicio, data_final), data_inicio, data_final)]
+
+        # arquivo repetido entre (obra, período): recusa antes de ler as viagens
+        modelo_saida = args.modelo_saida or MODELO_SAIDA_PADRAO
+        nomes = nomes_obras(obras) if "nome_obra" in campos_modelo(modelo_saida) else None
+        try:
+            arquivos_saida(modelo_saida, obras, periodos, nomes or {})
+        except ValueError as e:
+            parser.error(str(e))
+
+        resultados = gerar_lote(
+            obras, periodos,
+            modelo_saida=modelo_saida,
+            processos=args.processos,
+            prazo=args.prazo,
+            perfil=args.perfil,
+            detalhamento=tuple(args.detalhamento),
+            perfil_cprofile=args.perfil_cprofile,
+            forcar=args.forcar,
+            otimizar=args.otimizar,
+            janela_duplicatas=args.janela_duplicatas,
+            nomes=nomes,
+            horario_operacao=horario_operacao,
+        )
+        return imprimir_resumo(resultados)
+
+    obra = obras[0]
+
+    if args.servidor:
+        from .servidorRelatorios import baixar_relatorio
+
+        destino = args.out or "producaoPrimaria.pdf"
+        try:
+            baixar_relatorio(args.servidor, destino, obra, data_inicio, data_final, prazo=args.prazo)
+        except ConnectionError as e:
+            print(f"Serviço de relatórios indisponível ({e}); gerando localmente.")
+        except RuntimeError as e:
+            print(f"Erro: {e}")
+            return 1
+        else:
+            print(f"Relatório gerado em: {Path(destino).resolve()} (via {args.servidor})")
+            return 0
+
     # Nome da obra
-    df_nome_obra = load_dataframe(
-        "SELECT desc_obra FROM ossj_cad_obra WHERE id = :obra",
-        params={"obra": args.obra},
-    )
-    nome_obra = df_nome_obra["desc_obra"].iloc[0] if not df_nome_obra.empty else f"Obra {args.obra}"
-
-    query_sql = """
-                SELECT cp.`time`,
-                       v.prefixo_veiculo,
-                       f.nome,
-                       cp.volume_descarregado,
-                       o.desc_obra
-                FROM ossj_contador_primario AS cp
-                         JOIN ossj_veiculo_sensor_rfid AS v
-                              ON cp.user_id_device = v.user_id_sensor
-                         JOIN ossj_sensor_rfid AS sr
-                              ON sr.device_id = cp.device_id
-                         JOIN ossj_cad_obra AS o
-                              ON o.id = sr.local_instalacao
-                         LEFT JOIN ossj_motoristas_rocha AS mr
-                                   ON mr.id = cp.motorista
-                         LEFT JOIN ossj_cad_func AS f
-                                   ON f.id = mr.id_motorista
-                WHERE cp.codigo_planta = :obra
-                  AND cp.`time` BETWEEN :ini AND :fim
-                ORDER BY cp.`time` \
-                """
-
-    df = load_dataframe(
-        query_sql,
-        params={"ini": data_inicio, "fim": data_final, "obra": args.obra},
+    with orcamento.etapa("consulta", rotulo="consulta_nome_obra") as registro:
+        from db import load_dataframe
+        from .consultas import QUERY_NOME_OBRA
+
+        df_nome_obra = load_dataframe(QUERY_NOME_OBRA, params={"obra": obra})
+        registro["linhas"] = len(df_nome_obra)
+    nome_obra = df_nome_obra["desc_obra"].iloc[0] if not df_nome_obra.empty else f"Obra {obra}"
+
+    if args.acompanhar:
+        from .acompanhamentoRelatorio import acompanhar
+
+        destino = args.out or "producaoPrimaria.pdf"
+        print(f"Acompanhando: {nome_obra} | Período: {data_inicio.strftime(FMT)} a {data_final.strftime(FMT)} "
+              f"| a cada {args.intervalo:g} s (Ctrl+C para encerrar)")
+        acompanhar(
+            obra, data_inicio, data_final, nome_obra, destino,
+            intervalo=args.intervalo, detalhamento=tuple(args.detalhamento), prazo=args.prazo,
+            janela_duplicatas=args.janela_duplicatas,
+        )
+        return 0
+
+    if args.exportar:
+        return exportar_dados(args, obra, data_inicio, data_final, nome_obra, orcamento, perfil)
+
+    if args.rascunho:
+        with orcamento.etapa("consulta", rotulo="agregados") as registro:
+            from .cacheAgregados import cubo_agregado
+
+            cubo, origem = cubo_agregado(obra, data_inicio, data_final)
+            registro.update(linhas=len(cubo), origem=origem)
+        with orcamento.etapa("rascunho"):
+            from .rascunhoRelatorio import build_rascunho
+
+            destino = args.out or "producaoPrimaria_rascunho.pdf"
+            print(build_rascunho(cubo, data_inicio, data_final, nome_obra, destino, origem=origem))
+        print(orcamento.resumo())
+        finalizar_perfil(perfil, destino)
+        return 0
+
+    destino = args.out or "producaoPrimaria.pdf"
+    with orcamento.etapa("consulta", rotulo="impressao_digital") as registro:
+        from .impressaoDigital import (
+            chave_relatorio, impressao_viagens, opcoes_relatorio, pode_reaproveitar, registrar,
+            relatorio_completo,
+        )
+
+        dados = impressao_viagens(obra, data_inicio, data_final)
+        periodo_anterior = impressao_anterior = None
+        if args.comparar:
+            from .comparacaoPeriodo import periodo_comparacao
+
+            # o PDF também muda quando os dados do período de comparação mudam
+            periodo_anterior = periodo_comparacao(data_inicio, data_final, args.comparar)
+            ini_comparacao, fim_comparacao, _ = periodo_anterior
+            impressao_anterior = impressao_viagens(obra, ini_comparacao, fim_comparacao)
+            dados["comparacao"] = dict(
+                impressao_anterior,
+                # o corte de um período em aberto anda com o relógio: muda o rótulo do PDF
+                periodo=[f"{ini_comparacao:%Y-%m-%d %H:%M:%S}", f"{fim_comparacao:%Y-%m-%d %H:%M:%S}"],
+            )
+        registro["linhas"] = dados["linhas"]
+
+    # o modo entra na chave do PDF (o conteúdo muda com ele): é escolhido antes do reaproveitamento
+    with orcamento.etapa("consulta", rotulo="estimativa_linhas") as registro:
+        from .modoExecucao import escolher_modo, estimar_linhas, linhas_carregadas, nota_modo
+
+        # a impressão digital já contou as viagens do intervalo
+        if args.estimativa == "count":
+            estimativa = dados["linhas"]
+        else:
+            estimativa = estimar_linhas(obra, data_inicio, data_final, metodo=args.estimativa)
+        modo, motivo = escolher_modo(
+            estimativa, args.memoria_max, args.streaming_max, forcado=args.modo,
+        )
+        registro.update(linhas=estimativa, modo=modo)
+
+    opcoes = opcoes_relatorio(
+        obra, data_inicio, data_final, nome_obra, tuple(args.detalhamento), args.otimizar,
+        args.janela_duplicatas, args.comparar, horario_operacao, modo,
     )
+    chave = chave_relatorio(dados, opcoes)
+    if not args.forcar and pode_reaproveitar(destino, chave):
+        print(f"Relatório inalterado, reaproveitado: {Path(destino).resolve()} (use --forcar para refazer)")
+        finalizar_perfil(perfil, destino)
+        return 0
+    print(f"Estimativa ({args.estimativa}): {estimativa} viagens -> modo {modo} ({motivo})")
+
+    with orcamento.etapa("consulta", rotulo="consulta_viagens") as registro:
+        df, colapsador = carregar_viagens_colapsadas(args, obra, data_inicio, data_final, modo)
+        registro.update(linhas=linhas_carregadas(df), modo=modo, conexoes=args.conexoes,
+                        removidas=colapsador.removidas)
+    print(resumo_colapso(colapsador, modo))
 
     print(f"Relatório: {nome_obra} | Período: {data_inicio.strftime(FMT)} a {data_final.strftime(FMT)}")
 
-    criarPdf(df, data_inicio, data_final, nome_obra, args.out)
+    comparacao = None
+    if args.comparar:
+        with orcamento.etapa("consulta", rotulo="agregados_comparacao") as registro:
+            from .comparacaoPeriodo import ComparacaoPeriodo
+
+            comparacao = ComparacaoPeriodo.carregar(
+                obra, data_inicio, data_final, args.comparar,
+                periodo=periodo_anterior, impressao=impressao_anterior,
+                # o período anterior segue o colapso do atual (nenhum no modo agregado)
+                janela=colapsador.janela if colapsador.ativo and modo != "agregado" else 0.0,
+            )
+            registro.update(linhas=len(comparacao.fonte), origem=comparacao.origem)
+        print(f"Comparação: {comparacao.rotulo}, agregados do {comparacao.origem}")
+
+    with orcamento.etapa("consulta", rotulo="leituras_sensores") as registro:
+        from .disponibilidadeSensores import DisponibilidadeSensores
+
+        sensores = DisponibilidadeSensores.carregar(obra, data_inicio, data_final, horario_operacao)
+        registro["linhas"] = int(sensores.leituras)
+    print(sensores.resumo())
+
+    with orcamento.etapa("carga_modulos"):
+        from .cacheSecoes import CachePecas
+        from .criarPdfRelatorio import criarPdf
+
+    cache_pecas = None if args.sem_cache else CachePecas()
+    print(criarPdf(
+        df, data_inicio, data_final, nome_obra, destino,
+        orcamento=orcamento, detalhamento=tuple(args.detalhamento), otimizar=args.otimizar,
+        cache_pecas=cache_pecas, comparacao=comparacao, sensores=sensores,
+        nota_modo=nota_modo(modo, colapsador.ativo),
+    ))
+    if cache_pecas is not None:
+        print(cache_pecas.resumo())
+        cache_pecas.podar()
+    if relatorio_completo(orcamento):
+        registrar(destino, chave, dados, opcoes)
+    print(orcamento.resumo())
+    finalizar_perfil(perfil, destino)
+    return 0
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
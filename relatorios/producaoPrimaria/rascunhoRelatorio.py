@@ -0,0 +1,163 @@
+"""
+Prévia rápida (--rascunho) do relatório de produção primária.
+
+Uma página com os indicadores, um gráfico diário compacto e os maiores
+caminhões e motoristas, montada a partir do cubo agregado (cacheAgregados).
+O gráfico é desenhado direto no ReportLab (vetorial), sem matplotlib, e não há
+capa nem tabelas completas: o objetivo é gerar em menos de um segundo.
+"""
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from reportlab.graphics.charts.barcharts import VerticalBarChart
+from reportlab.graphics.shapes import Drawing
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.units import cm
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+from temas.tema_amarelo_dnp import (
+    COR_BACKGROUND_HEADER,
+    COR_FUNDO_SECUNDARIA,
+    COR_GRID,
+    COR_PRIMARIA,
+    COR_TEXTO_SECUNDARIO,
+    FONT_PADRAO,
+    FONT_TABLE_BODY,
+    FONT_TABLE_HEADER,
+    FONTSIZE_CONTENT_TABLE,
+    FONTSIZE_HEADER_TABLE,
+)
+from utils.primeiraLetraMaiuscula import titlecase_pt
+
+from .cardsIndicadores import criar_cards_indicadores, fmt_num_pt
+from .cuboProducao import CuboProducao
+
+TZ_BR = timezone(timedelta(hours=-3))
+TOP_N_RASCUNHO = 10
+
+
+def _estilos():
+    styles = getSampleStyleSheet()
+    for nome in ("Heading1", "Heading2"):
+        styles[nome].fontName = FONT_PADRAO
+        styles[nome].textColor = COR_PRIMARIA
+    styles["Normal"].fontName = FONT_PADRAO
+    styles.add(ParagraphStyle(
+        "Aviso", parent=styles["Normal"], fontName="Helvetica-Oblique",
+        fontSize=8, textColor=COR_TEXTO_SECUNDARIO,
+    ))
+    return styles
+
+
+def _grafico_diario(cubo: CuboProducao, largura: float = 19 * cm, altura: float = 4.5 * cm) -> Drawing:
+    """Barras da produção por dia, vetoriais e sem matplotlib."""
+    diario = cubo.agregar(por=("dia",), medidas=("volume",))
+    dias, volumes = list(diario["dia"]), [float(v) for v in diario["volume"]]
+
+    desenho = Drawing(largura, altura)
+    grafico = VerticalBarChart()
+    grafico.x, grafico.y = 1.2 * cm, 0.6 * cm
+    grafico.width, grafico.height = largura - 1.4 * cm, altura - 0.8 * cm
+    grafico.data = [volumes or [0.0]]
+    grafico.bars[0].fillColor = COR_PRIMARIA
+    grafico.bars[0].strokeColor = None
+    grafico.barSpacing = 0.5
+    grafico.groupSpacing = 1
+
+    # rótulo a cada ~8 dias para não encavalar
+    passo = max(1, len(dias) // 8)
+    grafico.categoryAxis.categoryNames = [
+        d.strftime("%d/%m") if i % passo == 0 else "" for i, d in enumerate(dias)
+    ] or [""]
+    grafico.categoryAxis.labels.fontSize = 6
+    grafico.categoryAxis.labels.fontName = FONT_PADRAO
+    grafico.categoryAxis.tickDown = 0
+    grafico.valueAxis.valueMin = 0
+    grafico.valueAxis.labels.fontSize = 6
+    grafico.valueAxis.labels.fontName = FONT_PADRAO
+    grafico.valueAxis.labelTextFormat = lambda v: fmt_num_pt(v, 0)
+    grafico.valueAxis.gridStrokeColor = COR_GRID
+    grafico.valueAxis.gridStrokeWidth = 0.25
+    grafico.valueAxis.visibleGrid = True
+    desenho.add(grafico)
+    return desenho
+
+
+def _tabela_top(cubo: CuboProducao, dim: str, titulo: str, top_n: int) -> Table:
+    """Maiores produções da dimensão (caminhao/motorista) em uma tabela compacta."""
+    agregado = cubo.agregar_df(por=(dim,), medidas=("volume", "pesagens"))
+    if dim == "motorista":
+        agregado[dim] = agregado[dim].fillna("não definido").astype(str).apply(titlecase_pt)
+    else:
+        agregado[dim] = agregado[dim].fillna("").astype(str)
+    agregado = (
+        agregado.groupby(dim, as_index=False)[["volume", "pesagens"]].sum()
+        .nlargest(top_n, "volume")
+    )
+
+    linhas = [["#", titulo, "Viagens", "Total (t)"]]
+    for i, r in enumerate(agregado.itertuples(index=False), start=1):
+        linhas.append([str(i), getattr(r, dim)[:28], str(int(r.pesagens)), fmt_num_pt(r.volume, 2)])
+
+    tabela = Table(linhas, colWidths=[0.6 * cm, 4.6 * cm, 1.5 * cm, 2.3 * cm], repeatRows=1)
+    tabela.setStyle(TableStyle([
+        ("BACKGROUND", (0, 0), (-1, 0), COR_BACKGROUND_HEADER),
+        ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
+        ("FONTNAME", (0, 0), (-1, 0), FONT_TABLE_HEADER),
+        ("FONTSIZE", (0, 0), (-1, 0), FONTSIZE_HEADER_TABLE),
+        ("FONTNAME", (0, 1), (-1, -1), FONT_TABLE_BODY),
+        ("FONTSIZE", (0, 1), (-1, -1), FONTSIZE_CONTENT_TABLE),
+        ("ROWBACKGROUNDS", (0, 1), (-1, -1), [colors.white, COR_FUNDO_SECUNDARIA]),
+        ("ALIGN", (2, 1), (-1, -1), "RIGHT"),
+        ("LINEBELOW", (0, 0), (-1, -1), 0.25, COR_GRID),
+        ("TOPPADDING", (0, 0), (-1, -1), 2),
+        ("BOTTOMPADDING", (0, 0), (-1, -1), 2),
+    ]))
+    return tabela
+
+
+def build_rascunho(cubo: CuboProducao, dataInicio: datetime, dataFinal: datetime, nome_obra: str,
+                   output_path: str | Path = "producaoPrimaria_rascunho.pdf",
+                   top_n: int = TOP_N_RASCUNHO, origem: str | None = None) -> str:
+    """Monta a prévia em uma página; origem ("cache"/"banco") aparece no rodapé do cabeçalho."""
+    styles = _estilos()
+    agora = datetime.now(TZ_BR).strftime("%d/%m/%Y %H:%M")
+    nota = "Prévia gerada a partir dos agregados"
+    if origem:
+        nota += f" ({origem})"
+    nota += "; o relatório completo traz os gráficos e as tabelas detalhadas."
+
+    story = [
+        Paragraph(f"Prévia de produção primária — {nome_obra}", styles["Heading1"]),
+        Paragraph(f"De {dataInicio:%d/%m/%Y} a {dataFinal:%d/%m/%Y} · gerado em {agora}", styles["Normal"]),
+        Paragraph(nota, styles["Aviso"]),
+        Spacer(1, 0.3 * cm),
+    ]
+    story.extend(criar_cards_indicadores(cubo, styles))
+    story.append(Paragraph("Produção diária", styles["Heading2"]))
+    story.append(_grafico_diario(cubo))
+    story.append(Spacer(1, 0.4 * cm))
+
+    lado_a_lado = Table(
+        [[Paragraph(f"Top {top_n} caminhões", styles["Heading2"]),
+          Paragraph(f"Top {top_n} motoristas", styles["Heading2"])],
+         [_tabela_top(cubo, "caminhao", "Caminhão", top_n),
+          _tabela_top(cubo, "motorista", "Motorista", top_n)]],
+        colWidths=[9.6 * cm, 9.6 * cm], hAlign="LEFT",
+    )
+    lado_a_lado.setStyle(TableStyle([
+        ("VALIGN", (0, 0), (-1, -1), "TOP"),
+        ("LEFTPADDING", (0, 0), (-1, -1), 0),
+    ]))
+    story.append(lado_a_lado)
+
+    M = 1.0 * cm
+    doc = SimpleDocTemplate(
+        str(output_path), pagesize=A4,
+        leftMargin=M, rightMargin=M, topMargin=M, bottomMargin=M,
+        title="Prévia: Produção primária",
+    )
+    doc.build(story)
+    return f"Rascunho gerado em: {Path(output_path).resolve()}"
@@ -0,0 +1,410 @@
+"""
+Relatório consolidado: todas as obras lado a lado num único PDF.
+
+Uma só consulta (as viagens de todas as obras, com as junções e o colapso
+das leituras repetidas do relatório de cada obra, agregadas por obra e dia)
+alimenta tudo: as matrizes obra x dia são montadas com bincount e os
+indicadores de cada obra (total, viagens, participação, média e pico diários,
+produtividade por caminhão·dia, peso médio) saem de operações por linha da
+matriz, sem um pipeline de relatório por obra. Com --janela-duplicatas 0 não
+há colapso e a agregação é feita no banco (QUERY_CONSOLIDADO_OBRAS).
+
+Uso:
+    python -m relatorios.producaoPrimaria.relatorioConsolidado --ini "2025-09-01 00:00:00" --fim "2025-09-30 23:59:59"
+    python -m relatorios.producaoPrimaria.relatorioConsolidado --obra 41 42 --out consolidado.pdf
+"""
+import argparse
+import io
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Adiciona o diretório raiz do projeto ao sys.path (mesmo motivo da CLI principal)
+project_root = Path(__file__).resolve().parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+import numpy as np
+import pandas as pd
+import matplotlib
+matplotlib.use("Agg")  # backend não interativo: nada de sondar GUI ao importar o pyplot
+import matplotlib.pyplot as plt
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import cm
+from reportlab.platypus import (
+    BaseDocTemplate, Frame, Image, NextPageTemplate, PageBreak, PageTemplate, Paragraph, Spacer,
+)
+
+from temas.tema_amarelo_dnp import CORES_VIZ
+
+from .cardsIndicadores import fmt_num_pt
+from .criarPdfRelatorio import DEFAULT_LOGO_PATH_SJ, estilos_relatorio, onpage_capa, onpage_normal
+from .motorTabelas import Coluna, TabelaContinua, criar_tabela, secao_tabela
+from .perfilExecucao import trecho
+
+FMT = "%Y-%m-%d %H:%M:%S"
+
+# obras por tabela diária (uma coluna por obra + dia + total)
+COLUNAS_DIARIAS_MAX = 8
+
+MEDIDAS_CONSOLIDADO = ("volume", "viagens", "pesagens", "caminhoes")
+
+
+# ---------------------------------------------------------------------
+# Dados
+# ---------------------------------------------------------------------
+
+def agregar_obras_dia(df: pd.DataFrame) -> pd.DataFrame:
+    """Viagens (obra, desc_obra, time, user_id_device, volume_descarregado) -> linhas de QUERY_CONSOLIDADO_OBRAS."""
+    dados = pd.DataFrame({
+        "obra": df["obra"],
+        "desc_obra": df["desc_obra"],
+        "dia": pd.to_datetime(df["time"], errors="coerce").dt.date,
+        "volume": pd.to_numeric(df["volume_descarregado"], errors="coerce"),
+        "user_id_device": df["user_id_device"],
+    })
+    return (
+        dados.groupby(["obra", "desc_obra", "dia"], dropna=False, sort=False)
+        .agg(
+            volume=("volume", "sum"), viagens=("volume", "size"), pesagens=("volume", "count"),
+            caminhoes=("user_id_device", "nunique"),
+        )
+        .reset_index()
+    )
+
+
+def carregar_consolidado(ini: datetime, fim: datetime, obras=None, janela: float | None = None):
+    """
+    Produção por (obra, dia) de todas as obras (ou das obras pedidas) e o
+    colapsador usado. As leituras repetidas são colapsadas como no relatório
+    de cada obra (mesmo tag, janela em segundos), para os números baterem;
+    janela 0 agrega direto no banco (colapsador None).
+    """
+    from db import load_dataframe
+    from .consultas import (
+        QUERY_CONSOLIDADO_OBRAS, QUERY_CONSOLIDADO_OBRAS_FILTRO,
+        QUERY_VIAGENS_CONSOLIDADO, QUERY_VIAGENS_CONSOLIDADO_FILTRO,
+    )
+    from .leiturasDuplicadas import JANELA_PADRAO, ColapsadorLeituras
+
+    params = {"ini": ini, "fim": fim}
+    if obras:
+        params["obras"] = list(obras)
+    colapsador = ColapsadorLeituras(JANELA_PADRAO if janela is None else janela)
+    if not colapsador.ativo:
+        consulta = QUERY_CONSOLIDADO_OBRAS_FILTRO if obras else QUERY_CONSOLIDADO_OBRAS
+        return load_dataframe(consulta, params=params), None
+
+    # um colapsador por obra, como em cada relatório; o geral só soma as contagens
+    consulta = QUERY_VIAGENS_CONSOLIDADO_FILTRO if obras else QUERY_VIAGENS_CONSOLIDADO
+    viagens = load_dataframe(consulta, params=params)
+    partes = []
+    for _, grupo in viagens.groupby("obra", sort=False):
+        colapsador_obra = ColapsadorLeituras(colapsador.janela)
+        partes.append(colapsador_obra.aplicar(grupo))
+        colapsador.lidas += colapsador_obra.lidas
+        colapsador.removidas += colapsador_obra.removidas
+    viagens = pd.concat(partes, ignore_index=True) if partes else viagens
+    return agregar_obras_dia(viagens), colapsador
+
+
+def matrizes_obras(df: pd.DataFrame, ini: datetime, fim: datetime):
+    """
+    Matrizes obra x dia de cada medida, cobrindo todos os dias do período.
+    Retorna (obras, nomes, dias, {medida: matriz}).
+    """
+    dias = np.arange(np.datetime64(ini.date()), np.datetime64(fim.date()) + np.timedelta64(1, "D"))
+    if df.empty:
+        vazio = np.zeros((0, len(dias)))
+        return [], [], dias, {m: vazio for m in MEDIDAS_CONSOLIDADO}
+
+    codigos, obras = pd.factorize(df["obra"].astype(int), sort=True)
+    nomes = (
+        pd.Series(df["desc_obra"].to_numpy(), dtype=object).groupby(codigos).first()
+        .reindex(range(len(obras)))
+    )
+    nomes = [str(n) if n is not None and n == n else f"Obra {o}" for n, o in zip(nomes, obras)]
+
+    indice_dia = (pd.to_datetime(df["dia"]).to_numpy(dtype="datetime64[D]") - dias[0]).astype(np.int64)
+    celula = codigos * len(dias) + indice_dia
+    tamanho = len(obras) * len(dias)
+    matrizes = {
+        m: np.bincount(
+            celula, weights=pd.to_numeric(df[m], errors="coerce").fillna(0.0).to_numpy(dtype=np.float64),
+            minlength=tamanho,
+        ).reshape(len(obras), len(dias))
+        for m in MEDIDAS_CONSOLIDADO
+    }
+    return list(obras), nomes, dias, matrizes
+
+
+def indicadores_obras(obras, nomes, dias, matrizes) -> pd.DataFrame:
+    """Indicadores por obra, calculados sobre as linhas das matrizes (ordem: maior produção)."""
+    volume = matrizes["volume"]
+    viagens = matrizes["viagens"]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        total = volume.sum(axis=1)
+        dias_ativos = (viagens > 0).sum(axis=1)
+        caminhao_dias = matrizes["caminhoes"].sum(axis=1)
+        pesagens = matrizes["pesagens"].sum(axis=1)
+        ind = pd.DataFrame({
+            "obra": obras,
+            "nome": nomes,
+            "viagens": viagens.sum(axis=1).astype(np.int64),
+            "volume": total,
+            "participacao": total / total.sum() * 100 if len(total) and total.sum() else np.zeros(len(total)),
+            "dias_ativos": dias_ativos,
+            "media_diaria": np.where(dias_ativos > 0, total / dias_ativos, 0.0),
+            "pico_diario": volume.max(axis=1) if volume.size else np.zeros(len(obras)),
+            "dia_pico": dias[volume.argmax(axis=1)] if volume.size else np.array([], dtype="datetime64[D]"),
+            "produtividade": np.where(caminhao_dias > 0, total / caminhao_dias, 0.0),
+            "peso_medio": np.where(pesagens > 0, total / pesagens, 0.0),
+        })
+    return ind.sort_values("volume", ascending=False, kind="stable").reset_index(drop=True)
+
+
+# ---------------------------------------------------------------------
+# Gráficos
+# ---------------------------------------------------------------------
+
+def _cores(n: int) -> list:
+    return [CORES_VIZ[i % len(CORES_VIZ)] for i in range(n)]
+
+
+def graficoComparativoObras(ind: pd.DataFrame, dpi: int = 110) -> io.BytesIO:
+    """Barras horizontais lado a lado: total produzido e produtividade por caminhão·dia."""
+    ind = ind.iloc[::-1]  # maior produção no topo
+    y = np.arange(len(ind))
+    cores = _cores(len(ind))[::-1]
+
+    fig, (ax_total, ax_prod) = plt.subplots(1, 2, figsize=(11, max(2.5, 0.45 * len(ind) + 1.2)), sharey=True)
+    for ax, coluna, titulo, casas in (
+        (ax_total, "volume", "Total descarregado (t)", 0),
+        (ax_prod, "produtividade", "Produtividade (t/caminhão·dia)", 1),
+    ):
+        valores = ind[coluna].to_numpy(dtype=float)
+        ax.barh(y, valores, color=cores)
+        for yi, v in zip(y, valores):
+            ax.text(v, yi, f" {fmt_num_pt(v, casas)}", va="center", fontsize=8)
+        ax.set_title(titulo, fontsize=11)
+        ax.set_xlim(0, max(float(valores.max()), 1.0) * 1.2)
+        ax.tick_params(labelsize=8)
+        for lado in ("top", "right"):
+            ax.spines[lado].set_visible(False)
+    ax_total.set_yticks(y)
+    ax_total.set_yticklabels([str(n)[:24] for n in ind["nome"]])
+
+    plt.tight_layout()
+    buf = io.BytesIO()
+    with trecho("codificacao_png"):
+        fig.savefig(buf, format="PNG", dpi=dpi)
+    plt.close(fig)
+    buf.seek(0)
+    return buf
+
+
+def graficoCurvasDiariasObras(ind: pd.DataFrame, obras, dias, matrizes, dpi: int = 110) -> io.BytesIO:
+    """Uma curva de produção diária por obra, na ordem e nas cores da tabela."""
+    linha_de = {o: i for i, o in enumerate(obras)}
+    x = np.arange(len(dias))
+    rotulos = pd.to_datetime(dias).strftime("%d/%m")
+    passo = max(1, len(dias) // 15)
+
+    fig, ax = plt.subplots(figsize=(11, 5))
+    for (obra, nome), cor in zip(ind[["obra", "nome"]].itertuples(index=False), _cores(len(ind))):
+        ax.plot(x, matrizes["volume"][linha_de[obra]], "-o", color=cor, linewidth=1.4,
+                markersize=2.5, label=str(nome)[:24])
+    ax.set_xticks(x[::passo])
+    ax.set_xticklabels(rotulos[::passo], rotation=45, ha="right", fontsize=8)
+    ax.set_ylabel("Volume descarregado (t)", fontsize=9)
+    ax.tick_params(axis="y", labelsize=8)
+    ax.grid(axis="y", linewidth=0.3, color="#BBBBBB")
+    ax.set_xlim(-0.5, len(x) - 0.5)
+    ax.set_ylim(0, max(float(matrizes["volume"].max()), 1.0) * 1.15)  # folga para a legenda
+    for lado in ("top", "right"):
+        ax.spines[lado].set_visible(False)
+    ax.legend(fontsize=8, frameon=False, ncol=min(len(ind), 4), loc="upper left")
+
+    plt.tight_layout()
+    buf = io.BytesIO()
+    with trecho("codificacao_png"):
+        fig.savefig(buf, format="PNG", dpi=dpi)
+    plt.close(fig)
+    buf.seek(0)
+    return buf
+
+
+# ---------------------------------------------------------------------
+# Tabelas
+# ---------------------------------------------------------------------
+
+def tabelaComparativaObras(ind: pd.DataFrame, matrizes) -> TabelaContinua:
+    """Uma linha por obra e a linha de total do grupo."""
+    colunas = [Coluna("Obra", 4.4 * cm)] + [
+        Coluna(titulo, largura, "RIGHT") for titulo, largura in (
+            ("Viagens", 1.6 * cm), ("Total (t)", 2.2 * cm), ("Part. (%)", 1.5 * cm),
+            ("Média diária (t)", 2.3 * cm), ("Pico diário (t)", 2.4 * cm),
+            ("t/caminhão·dia", 2.2 * cm), ("Peso médio (t/viagem)", 2.4 * cm),
+        )
+    ]
+    linhas = []
+    for r in ind.itertuples(index=False):
+        pico = f"{fmt_num_pt(r.pico_diario, 0)} ({pd.Timestamp(r.dia_pico):%d/%m})" if r.viagens else "-"
+        linhas.append([
+            str(r.nome)[:28], str(int(r.viagens)), fmt_num_pt(r.volume, 2), fmt_num_pt(r.participacao, 1),
+            fmt_num_pt(r.media_diaria, 2), pico, fmt_num_pt(r.produtividade, 2), fmt_num_pt(r.peso_medio, 2),
+        ])
+
+    # total do grupo: as razões são recalculadas sobre as somas, não médias das obras
+    volume_dia = matrizes["volume"].sum(axis=0)
+    dias_ativos = int((matrizes["viagens"].sum(axis=0) > 0).sum())
+    total = float(ind["volume"].sum())
+    caminhao_dias = float(matrizes["caminhoes"].sum())
+    pesagens = float(matrizes["pesagens"].sum())
+    linhas.append([
+        "Total", str(int(ind["viagens"].sum())), fmt_num_pt(total, 2), fmt_num_pt(100 if total else 0, 1),
+        fmt_num_pt(total / dias_ativos if dias_ativos else 0, 2),
+        fmt_num_pt(volume_dia.max() if volume_dia.size else 0, 0),
+        fmt_num_pt(total / caminhao_dias if caminhao_dias else 0, 2),
+        fmt_num_pt(total / pesagens if pesagens else 0, 2),
+    ])
+    return criar_tabela(colunas, linhas, linha_total=True)
+
+
+def tabelasDiariasObras(ind: pd.DataFrame, obras, dias, matrizes, styles) -> list:
+    """Produção diária (t) com uma coluna por obra; o layout quebra as páginas."""
+    if len(ind) > COLUNAS_DIARIAS_MAX:
+        ind = ind.head(COLUNAS_DIARIAS_MAX)
+        nota = f"Colunas das {COLUNAS_DIARIAS_MAX} obras de maior produção; o total inclui todas."
+    else:
+        nota = None
+    linha_de = {o: i for i, o in enumerate(obras)}
+    volume = matrizes["volume"][[linha_de[o] for o in ind["obra"]]]
+    total_dia = matrizes["volume"].sum(axis=0)
+
+    largura_dia = 2.2 * cm
+    largura = (19 * cm - largura_dia) / (len(ind) + 1)
+    colunas = (
+        [Coluna("Dia", largura_dia)]
+        + [Coluna(str(n)[:14], largura, "RIGHT") for n in ind["nome"]]
+        + [Coluna("Total", largura, "RIGHT")]
+    )
+    corpo = [
+        [f"{pd.Timestamp(d):%d/%m/%Y}"] + [fmt_num_pt(v, 2) for v in volume[:, j]] + [fmt_num_pt(total_dia[j], 2)]
+        for j, d in enumerate(dias)
+    ]
+
+    elementos = secao_tabela(
+        "Produção diária por obra", "Produção diária por obra (continuação)", colunas, corpo, styles,
+    )
+    if nota:
+        elementos.insert(1, Paragraph(nota, styles["Aviso"]))
+    return elementos
+
+
+# ---------------------------------------------------------------------
+# Montagem
+# ---------------------------------------------------------------------
+
+def build_consolidado(df: pd.DataFrame, dataInicio: datetime, dataFinal: datetime,
+                      output_path: str | Path = "producaoConsolidada.pdf",
+                      janela_duplicatas: float = 0.0) -> str:
+    """
+    Monta o PDF comparativo a partir do resultado de carregar_consolidado.
+    janela_duplicatas: janela do colapso aplicado (só para a nota no PDF).
+    """
+    styles = estilos_relatorio()
+    obras, nomes, dias, matrizes = matrizes_obras(df, dataInicio, dataFinal)
+    ind = indicadores_obras(obras, nomes, dias, matrizes)
+
+    M = 1.0 * cm
+    doc = BaseDocTemplate(
+        str(output_path), pagesize=A4,
+        leftMargin=M, rightMargin=M, topMargin=M, bottomMargin=M,
+        title="Relatório Gerencial: Produção consolidada",
+    )
+    doc.addPageTemplates([
+        PageTemplate(id="CAPA", frames=[Frame(M, M, A4[0] - 2 * M, A4[1] - 2 * M)], onPage=onpage_capa),
+        PageTemplate(id="NORMAL", frames=[Frame(M, M, A4[0] - 2 * M, A4[1] - 2 * M)], onPage=onpage_normal),
+    ])
+    doc.capa_ctx = {
+        "dataInicio": dataInicio,
+        "dataFinal": dataFinal,
+        "titulo": "Relatório de Produção Consolidado",
+        "empresa": ", ".join(nomes) if 0 < len(nomes) <= 3 else f"{len(nomes)} obras",
+        "gerado_por": "Sistema OSSJ",
+        "caminho_logo": str(DEFAULT_LOGO_PATH_SJ),
+    }
+
+    story = [NextPageTemplate("NORMAL"), PageBreak()]
+    story.append(Paragraph("Comparativo entre obras", styles["Heading1"]))
+    if janela_duplicatas:
+        story.append(Paragraph(
+            f"Leituras repetidas do mesmo tag em até {janela_duplicatas:g} s contam como uma viagem, "
+            f"como no relatório de cada obra.",
+            styles["Normal"],
+        ))
+        story.append(Spacer(1, 0.3 * cm))
+    else:
+        story.append(Paragraph(
+            "Leituras repetidas do RFID não colapsadas (--janela-duplicatas 0): "
+            "viagens e totais podem diferir do relatório de cada obra.",
+            styles["Aviso"],
+        ))
+    if ind.empty:
+        story.append(Paragraph("Sem registros no período.", styles["Normal"]))
+    else:
+        story.append(tabelaComparativaObras(ind, matrizes))
+        story.append(Spacer(1, 0.6 * cm))
+        story.append(Image(graficoComparativoObras(ind), width=19 * cm,
+                           height=19 * cm * max(2.5, 0.45 * len(ind) + 1.2) / 11))
+        story.append(PageBreak())
+        story.append(Paragraph("Produção diária", styles["Heading2"]))
+        story.append(Image(graficoCurvasDiariasObras(ind, obras, dias, matrizes),
+                           width=19 * cm, height=19 * cm * 5 / 11))
+        story.append(PageBreak())
+        story.extend(tabelasDiariasObras(ind, obras, dias, matrizes, styles))
+
+    doc.build(story)
+    return f"Relatório consolidado gerado em: {Path(output_path).resolve()}"
+
+
+# ---------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------
+
+def main():
+    parser = argparse.ArgumentParser(description="Relatório de produção consolidado (todas as obras)")
+    parser.add_argument("--ini", help='Data inicial (ex: "2025-08-01 00:00:00"); padrão: início do mês')
+    parser.add_argument("--fim", help='Data final (ex: "2025-08-31 23:59:59"); padrão: fim do mês')
+    parser.add_argument("--obra", type=int, nargs="+", action="extend", help="Restringe às obras informadas")
+    parser.add_argument("--out", default="producaoConsolidada.pdf", help="Arquivo de saída")
+    parser.add_argument(
+        "--janela-duplicatas", type=float,
+        help="Segundos em que leituras repetidas do mesmo tag contam como uma viagem (0 desliga; padrão 60)",
+    )
+    args = parser.parse_args()
+
+    agora = datetime.now()
+    inicio_mes = agora.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    fim_mes = (inicio_mes.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(seconds=1)
+    try:
+        ini = datetime.strptime(args.ini, FMT) if args.ini else inicio_mes
+        fim = datetime.strptime(args.fim, FMT) if args.fim else fim_mes
+    except ValueError as e:
+        parser.error(str(e))
+    if fim < ini:
+        parser.error("--fim anterior a --ini")
+    if args.janela_duplicatas is not None and args.janela_duplicatas < 0:
+        parser.error("o argumento --janela-duplicatas não pode ser negativo")
+
+    df, colapsador = carregar_consolidado(ini, fim, args.obra, args.janela_duplicatas)
+    print(f"Consolidado: {df['obra'].nunique() if not df.empty else 0} obra(s), {len(df)} linha(s) obra x dia")
+    if colapsador is not None:
+        print(colapsador.resumo())
+    print(build_consolidado(df, ini, fim, args.out, colapsador.janela if colapsador is not None else 0.0))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
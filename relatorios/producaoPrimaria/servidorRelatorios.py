@@ -0,0 +1,308 @@
+"""
+Serviço HTTP local de relatórios.
+
+Mantém aquecido o que a CLI refaz a cada execução: módulos importados, engine
+com pool de conexões MySQL, nomes das obras e folha de estilos. As consultas
+rodam nas threads do servidor; a renderização (matplotlib/ReportLab, CPU) roda
+num pool de processos já aquecidos. O número de relatórios simultâneos é
+limitado; acima disso o serviço responde 503.
+
+Endpoints:
+    GET /relatorio?obra=41&periodo=2025-09
+    GET /relatorio?obra=41&ini=2025-09-01 00:00:00&fim=2025-09-30 23:59:59[&prazo=30]
+        -> application/pdf
+    GET /saude -> JSON com o estado do serviço
+
+Uso:
+    python -m relatorios.producaoPrimaria.servidorRelatorios --porta 8765 --workers 2
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+# Adiciona o diretório raiz do projeto ao sys.path (mesmo motivo da CLI principal)
+project_root = Path(__file__).resolve().parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+FMT = "%Y-%m-%d %H:%M:%S"
+
+PORTA_PADRAO = 8765
+TTL_OBRAS = 10 * 60          # segundos até recarregar os nomes das obras
+ESPERA_VAGA = 5.0            # segundos que um pedido espera por vaga antes do 503
+TAMANHO_BLOCO = 64 * 1024    # bytes por escrita ao transmitir o PDF
+
+
+# ---------------------------------------------------------------------
+# Pool de renderização
+# ---------------------------------------------------------------------
+
+def _aquecer() -> None:
+    """Inicializador dos processos de renderização: importa tudo uma vez."""
+    from .criarPdfRelatorio import estilos_relatorio
+
+    estilos_relatorio()
+
+
+def _renderizar(df, ini, fim, nome_obra, caminho, prazo, sensores=None) -> str:
+    from .criarPdfRelatorio import criarPdf
+    from .orcamentoTempo import OrcamentoTempo
+
+    criarPdf(df, ini, fim, nome_obra, caminho, orcamento=OrcamentoTempo(prazo), sensores=sensores)
+    return caminho
+
+
+# ---------------------------------------------------------------------
+# Serviço
+# ---------------------------------------------------------------------
+
+class OcupadoError(Exception):
+    """Sem vaga para mais um relatório simultâneo."""
+
+
+class SemDadosError(Exception):
+    """Período sem viagens."""
+
+
+class ServicoRelatorios:
+    """Estado aquecido compartilhado pelas requisições."""
+
+    def __init__(self, workers: int = 1, max_simultaneos: int | None = None):
+        from db import get_engine, load_dataframe
+
+        self._load_dataframe = load_dataframe
+        get_engine()  # cria o pool de conexões já na subida
+
+        self.workers = workers
+        self.max_simultaneos = max_simultaneos or 2 * workers
+        self._vagas = threading.BoundedSemaphore(self.max_simultaneos)
+        self._pool = ProcessPoolExecutor(max_workers=workers, initializer=_aquecer)
+        # força a subida dos processos agora, e não no primeiro pedido
+        for f in [self._pool.submit(_aquecer) for _ in range(workers)]:
+            f.result()
+
+        self._obras = {}
+        self._obras_em = 0.0
+        self._trava_obras = threading.Lock()
+        self._trava_contadores = threading.Lock()
+        self.atendidos = 0
+        self.em_andamento = 0
+
+    def _contar(self, andamento: int = 0, atendidos: int = 0) -> None:
+        with self._trava_contadores:
+            self.em_andamento += andamento
+            self.atendidos += atendidos
+
+    def nome_obra(self, obra: int) -> str:
+        """Nome da obra a partir do cache de dimensões (recarregado a cada TTL_OBRAS)."""
+        with self._trava_obras:
+            if time.time() - self._obras_em > TTL_OBRAS or obra not in self._obras:
+                df = self._load_dataframe("SELECT id, desc_obra FROM ossj_cad_obra")
+                self._obras = dict(zip(df["id"].astype(int), df["desc_obra"]))
+                self._obras_em = time.time()
+            return self._obras.get(obra, f"Obra {obra}")
+
+    def gerar(self, obra: int, ini: datetime, fim: datetime, prazo: float | None = None) -> Path:
+        """Consulta as viagens e renderiza o PDF num arquivo temporário (o chamador apaga)."""
+        from .consultas import QUERY_VIAGENS
+        from .disponibilidadeSensores import DisponibilidadeSensores
+        from .leiturasDuplicadas import colapsar_leituras
+
+        if not self._vagas.acquire(timeout=ESPERA_VAGA):
+            raise OcupadoError("limite de relatórios simultâneos atingido")
+        self._contar(andamento=1)
+        try:
+            nome = self.nome_obra(obra)
+            df = colapsar_leituras(self._load_dataframe(QUERY_VIAGENS, params={"ini": ini, "fim": fim, "obra": obra}))
+            if df.empty:
+                raise SemDadosError("sem viagens no período")
+            sensores = DisponibilidadeSensores.carregar(obra, ini, fim)
+            fd, caminho = tempfile.mkstemp(prefix="relatorio_", suffix=".pdf")
+            os.close(fd)
+            try:
+                self._pool.submit(_renderizar, df, ini, fim, nome, caminho, prazo, sensores).result()
+            except BaseException:
+                os.unlink(caminho)
+                raise
+            self._contar(atendidos=1)
+            return Path(caminho)
+        finally:
+            self._contar(andamento=-1)
+            self._vagas.release()
+
+    def saude(self) -> dict:
+        return {
+            "workers": self.workers,
+            "max_simultaneos": self.max_simultaneos,
+            "em_andamento": self.em_andamento,
+            "atendidos": self.atendidos,
+        }
+
+    def encerrar(self) -> None:
+        self._pool.shutdown(wait=True)
+
+
+def interpretar_pedido(query: dict):
+    """Extrai (obra, ini, fim, prazo) dos parâmetros da URL; ValueError se inválidos."""
+    from .loteRelatorios import interpretar_periodos
+
+    def unico(nome):
+        valores = query.get(nome)
+        return valores[0] if valores else None
+
+    if unico("obra") is None:
+        raise ValueError("parâmetro obra é obrigatório")
+    obra = int(unico("obra"))
+
+    if unico("periodo"):
+        periodos = interpretar_periodos(unico("periodo"))
+        if len(periodos) != 1:
+            raise ValueError("informe um único mês em periodo")
+        _, ini, fim = periodos[0]
+    elif unico("ini") and unico("fim"):
+        ini = datetime.strptime(unico("ini"), FMT)
+        fim = datetime.strptime(unico("fim"), FMT)
+    else:
+        raise ValueError("informe periodo=AAAA-MM ou ini e fim")
+
+    prazo = float(unico("prazo")) if unico("prazo") else None
+    return obra, ini, fim, prazo
+
+
+# ---------------------------------------------------------------------
+# HTTP
+# ---------------------------------------------------------------------
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "RelatoriosOSSJ/1.0"
+
+    def _json(self, status: int, corpo: dict) -> None:
+        dados = json.dumps(corpo, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(dados)))
+        self.end_headers()
+        self.wfile.write(dados)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        servico: ServicoRelatorios = self.server.servico
+
+        if url.path == "/saude":
+            return self._json(200, servico.saude())
+        if url.path != "/relatorio":
+            return self._json(404, {"erro": "rota desconhecida"})
+
+        try:
+            obra, ini, fim, prazo = interpretar_pedido(parse_qs(url.query))
+        except ValueError as e:
+            return self._json(400, {"erro": str(e)})
+
+        try:
+            caminho = servico.gerar(obra, ini, fim, prazo)
+        except OcupadoError as e:
+            return self._json(503, {"erro": str(e)})
+        except SemDadosError as e:
+            return self._json(404, {"erro": str(e)})
+        except Exception as e:
+            return self._json(500, {"erro": repr(e)})
+
+        try:
+            self.send_response(200)
+            self.send_header("Content-Type", "application/pdf")
+            self.send_header("Content-Length", str(caminho.stat().st_size))
+            self.send_header(
+                "Content-Disposition", f'attachment; filename="producaoPrimaria_{obra}_{ini:%Y%m%d}.pdf"'
+            )
+            self.end_headers()
+            with open(caminho, "rb") as f:
+                while bloco := f.read(TAMANHO_BLOCO):
+                    self.wfile.write(bloco)
+        finally:
+            caminho.unlink(missing_ok=True)
+
+    def log_message(self, fmt, *args):
+        sys.stderr.write(f"[{datetime.now():%H:%M:%S}] {self.address_string()} {fmt % args}\n")
+
+
+def servir(host: str = "127.0.0.1", porta: int = PORTA_PADRAO, workers: int = 1,
+           max_simultaneos: int | None = None) -> None:
+    servico = ServicoRelatorios(workers=workers, max_simultaneos=max_simultaneos)
+    httpd = ThreadingHTTPServer((host, porta), _Handler)
+    httpd.daemon_threads = True
+    httpd.servico = servico
+    print(f"Servindo relatórios em http://{host}:{porta} ({workers} worker(s))", flush=True)
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
+        servico.encerrar()
+
+
+# ---------------------------------------------------------------------
+# Cliente (usado pela CLI)
+# ---------------------------------------------------------------------
+
+def baixar_relatorio(url_base: str, destino: str | Path, obra: int, ini: datetime, fim: datetime,
+                     prazo: float | None = None, timeout: float = 600) -> Path:
+    """
+    Pede o relatório ao serviço e grava em `destino`.
+    Levanta ConnectionError se o serviço não estiver acessível.
+    """
+    from urllib.error import HTTPError, URLError
+    from urllib.parse import urlencode
+    from urllib.request import urlopen
+
+    params = {"obra": obra, "ini": ini.strftime(FMT), "fim": fim.strftime(FMT)}
+    if prazo is not None:
+        params["prazo"] = prazo
+    url = f"{url_base.rstrip('/')}/relatorio?{urlencode(params)}"
+
+    destino = Path(destino)
+    temporario = destino.with_name(f".{destino.name}.download")
+    try:
+        with urlopen(url, timeout=timeout) as resp, open(temporario, "wb") as f:
+            while bloco := resp.read(TAMANHO_BLOCO):
+                f.write(bloco)
+    except HTTPError as e:
+        temporario.unlink(missing_ok=True)
+        try:
+            detalhe = json.loads(e.read().decode("utf-8")).get("erro", "")
+        except Exception:
+            detalhe = ""
+        raise RuntimeError(f"serviço respondeu {e.code}: {detalhe}") from None
+    except (URLError, OSError) as e:
+        temporario.unlink(missing_ok=True)
+        raise ConnectionError(str(e)) from None
+    os.replace(temporario, destino)
+    return destino
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serviço HTTP local de relatórios de produção primária")
+    parser.add_argument("--host", default="127.0.0.1", help="Endereço de escuta")
+    parser.add_argument("--porta", type=int, default=PORTA_PADRAO, help="Porta de escuta")
+    parser.add_argument("--workers", type=int, default=1, help="Processos de renderização")
+    parser.add_argument(
+        "--max-simultaneos", type=int,
+        help="Relatórios em andamento ao mesmo tempo (padrão: 2 x workers)",
+    )
+    args = parser.parse_args()
+    if args.workers < 1:
+        parser.error("o argumento --workers deve ser positivo")
+    servir(args.host, args.porta, args.workers, args.max_simultaneos)
+
+
+if __name__ == "__main__":
+    main()
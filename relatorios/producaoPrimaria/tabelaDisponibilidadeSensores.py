@@ -0,0 +1,67 @@
+import pandas as pd
+from reportlab.lib.units import cm
+from reportlab.platypus import Paragraph, Spacer
+
+from .cacheSecoes import CachePecas
+from .disponibilidadeSensores import DisponibilidadeSensores
+from .motorTabelas import Coluna, fmt_inteiro, fmt_num, linhas_em_blocos, secao_tabela
+
+
+def fmt_data_hora(v) -> str:
+  return "-" if pd.isna(v) else pd.Timestamp(v).strftime("%d/%m/%Y %H:%M")
+
+
+# Sensor | Leituras | Última leitura | Janelas | Horas sem leitura | Cobertura
+COLUNAS_SENSOR = (
+  Coluna("Sensor", 3 * cm, "LEFT", "device_id", str),
+  Coluna("Leituras", 2.5 * cm, "RIGHT", "leituras", fmt_inteiro),
+  Coluna("Última leitura", 4 * cm, "RIGHT", "ultima_leitura", fmt_data_hora),
+  Coluna("Janelas", 2.5 * cm, "RIGHT", "janelas", fmt_inteiro),
+  Coluna("Horas sem leitura", 3.5 * cm, "RIGHT", "horas_sem_leitura", fmt_num),
+  Coluna("Cobertura (%)", 3.5 * cm, "RIGHT", "cobertura", lambda v: fmt_num(v, 1)),
+)
+# Sensor | Início | Fim | Horas sem leitura
+COLUNAS_JANELA = (
+  Coluna("Sensor", 3 * cm, "LEFT", "device_id", str),
+  Coluna("Início", 5 * cm, "RIGHT", "inicio", fmt_data_hora),
+  Coluna("Fim", 5 * cm, "RIGHT", "fim", fmt_data_hora),
+  Coluna("Horas sem leitura", 6 * cm, "RIGHT", "horas_sem_leitura", fmt_num),
+)
+
+
+def criarTabelaDisponibilidadeSensores(disponibilidade: DisponibilidadeSensores, styles, max_linhas: int = 38,
+                                       janelas: bool = True, pecas: CachePecas | None = None):
+  """
+  Gera elementos (list) prontos para inserir no doc ReportLab: cobertura de
+  cada sensor RFID no horário de operação e as janelas sem leitura.
+  janelas: False mostra só a tabela por sensor (variante reduzida do prazo).
+  """
+  por_sensor, df_janelas = disponibilidade.calcular()
+  ini, fim = disponibilidade.horario
+  periodo = f"de {disponibilidade.ini:%d/%m/%Y} a {disponibilidade.fim:%d/%m/%Y}"
+  titulo = f"Disponibilidade dos sensores RFID: {periodo}"
+
+  if por_sensor.empty:
+    return [Paragraph(titulo, styles["Heading2"]), Paragraph("Nenhum sensor cadastrado para a obra.", styles["Normal"])]
+
+  nota = Paragraph(
+    f"Horário de operação esperado: {ini:02d}h às {fim:02d}h, todos os dias "
+    f"({fmt_num(disponibilidade.horas_operacao, 0)} h no período). Janela: trecho do horário "
+    f"de operação com {disponibilidade.lacuna:g} min ou mais sem nenhuma leitura do sensor.",
+    styles["Normal"],
+  )
+  sensores = secao_tabela(
+    titulo, f"Disponibilidade dos sensores RFID (continuação): {periodo}",
+    COLUNAS_SENSOR, linhas_em_blocos("tabela_sensores", COLUNAS_SENSOR, por_sensor, max_linhas, pecas), styles,
+  )
+  elementos = sensores[:1] + [nota, Spacer(1, 0.2 * cm)] + sensores[1:]
+  if not janelas:
+    return elementos
+
+  elementos.append(Spacer(1, 0.8 * cm))
+  if df_janelas.empty:
+    return elementos + [Paragraph("Nenhuma janela sem leitura no período.", styles["Normal"])]
+  return elementos + secao_tabela(
+    f"Janelas sem leitura: {periodo}", f"Janelas sem leitura (continuação): {periodo}",
+    COLUNAS_JANELA, linhas_em_blocos("tabela_sensores_janelas", COLUNAS_JANELA, df_janelas, max_linhas, pecas), styles,
+  )
@@ -0,0 +1,62 @@
+import pandas as pd
+from reportlab.lib.units import cm
+from reportlab.platypus import Paragraph, Spacer
+
+from .agregadosRelatorio import distribuicao_carga
+from .cacheSecoes import CachePecas
+from .cuboProducao import CuboProducao, periodo_viagens
+from .esbocoQuantis import PRECISAO_RELATIVA
+from .motorTabelas import Coluna, fmt_inteiro, fmt_num, linhas_em_blocos, secao_tabela
+
+
+def _colunas(titulo: str, campo: str) -> tuple:
+  # Caminhão/Motorista | Pesagens | P10 | P50 | P90
+  return (
+    Coluna(titulo, 7 * cm, "LEFT", campo, str),
+    Coluna("Pesagens", 3 * cm, "RIGHT", "pesagens", fmt_inteiro),
+    Coluna("P10 (t)", 3 * cm, "RIGHT", "p10", fmt_num),
+    Coluna("P50 (t)", 3 * cm, "RIGHT", "p50", fmt_num),
+    Coluna("P90 (t)", 3 * cm, "RIGHT", "p90", fmt_num),
+  )
+
+
+COLUNAS_CAMINHAO = _colunas("Caminhão", "prefixo_veiculo")
+COLUNAS_MOTORISTA = _colunas("Motorista", "nome")
+
+
+def criarTabelaDistribuicaoCarga(dfViagens: pd.DataFrame | CuboProducao, styles, max_linhas: int = 38,
+                                 limite: int | None = None, pecas: CachePecas | None = None):
+  """
+  Gera elementos (list) prontos para inserir no doc ReportLab: P10, P50 e P90
+  do volume descarregado por caminhão e por motorista no período.
+  limite: quando informado, mostra apenas os N caminhões/motoristas com mais pesagens.
+  """
+  titulo = "Distribuição da carga"
+  por_caminhao = distribuicao_carga(dfViagens, "caminhao")
+  if por_caminhao.empty:
+    return [Paragraph(titulo, styles["Heading2"]), Paragraph("Sem pesagens no período.", styles["Normal"])]
+  por_motorista = distribuicao_carga(dfViagens, "motorista")
+
+  if limite is not None:
+    por_caminhao = por_caminhao.head(limite)
+    por_motorista = por_motorista.head(limite)
+
+  # período formatado
+  t_ini, t_fim = periodo_viagens(dfViagens)
+  periodo = f"de {t_ini:%d/%m/%Y} a {t_fim:%d/%m/%Y}"
+  nota = Paragraph(
+    f"Volume descarregado por pesagem. P10, P50 e P90: 10%, 50% e 90% das pesagens ficam até esse valor "
+    f"(estimativa com erro de até {PRECISAO_RELATIVA:.0%}).",
+    styles["Normal"],
+  )
+
+  caminhoes = secao_tabela(
+    f"{titulo} por caminhão: {periodo}", f"{titulo} por caminhão (continuação): {periodo}",
+    COLUNAS_CAMINHAO, linhas_em_blocos("tabela_cargas", COLUNAS_CAMINHAO, por_caminhao, max_linhas, pecas), styles,
+  )
+  motoristas = secao_tabela(
+    f"{titulo} por motorista: {periodo}", f"{titulo} por motorista (continuação): {periodo}",
+    COLUNAS_MOTORISTA,
+    linhas_em_blocos("tabela_cargas_motoristas", COLUNAS_MOTORISTA, por_motorista, max_linhas, pecas), styles,
+  )
+  return caminhoes[:1] + [nota, Spacer(1, 0.2 * cm)] + caminhoes[1:] + [Spacer(1, 0.8 * cm)] + motoristas
@@ -1,131 +1,64 @@
 import pandas as pd
 from reportlab.lib.units import cm
-from reportlab.lib import colors
-from reportlab.platypus import Table, TableStyle, Paragraph, Spacer, PageBreak, Indenter
-from utils.primeiraLetraMaiuscula import titlecase_pt
-
-from temas.tema_amarelo_dnp import (
-  COR_FUNDO, COR_GRID, 
-  COR_FUNDO_SECUNDARIA, 
-  FONTSIZE_HEADER_TABLE, 
-  FONTSIZE_CONTENT_TABLE, 
-  LINE_BELLOW_HEADER, 
-  LINE_BELLOW_HEADER_GRID,
-  FONT_TABLE_HEADER,
-  FONT_TABLE_BODY,
-  COR_BACKGROUND_HEADER,
+from reportlab.platypus import Paragraph
+
+from .agregadosRelatorio import producao_por_caminhao
+from .cacheSecoes import CachePecas
+from .comparacaoPeriodo import ComparacaoPeriodo, fmt_variacao
+from .cuboProducao import CuboProducao, periodo_viagens
+from .motorTabelas import Coluna, fmt_inteiro, fmt_num, linhas_em_blocos, secao_tabela
+
+# Caminhão | Nº Viagens | Total | Peso Médio
+COLUNAS = (
+  Coluna("Caminhão", 6 * cm, "LEFT", "prefixo_veiculo", str),
+  Coluna("N° de Viagens", 4 * cm, "RIGHT", "n_viagens", fmt_inteiro),
+  Coluna("Total (t)", 4.5 * cm, "RIGHT", "total_descarregado", fmt_num),
+  Coluna("Peso Médio (t/viagem)", 4.5 * cm, "RIGHT", "peso_medio", fmt_num),
+)
+# com --comparar: + variação do total em relação ao período de comparação
+COLUNAS_COMPARACAO = (
+  Coluna("Caminhão", 5 * cm, "LEFT", "prefixo_veiculo", str),
+  Coluna("N° de Viagens", 3.5 * cm, "RIGHT", "n_viagens", fmt_inteiro),
+  Coluna("Total (t)", 3.5 * cm, "RIGHT", "total_descarregado", fmt_num),
+  Coluna("Peso Médio (t/viagem)", 4 * cm, "RIGHT", "peso_medio", fmt_num),
+  Coluna("Variação", 3 * cm, "RIGHT", "var_total", fmt_variacao),
 )
 
-def criarTabelaProducaoPorCaminhao(dfViagens: pd.DataFrame, styles, max_linhas: int = 34):
+
+def criarTabelaProducaoPorCaminhao(dfViagens: pd.DataFrame | CuboProducao, styles, max_linhas: int = 34,
+                                   limite: int | None = None, pecas: CachePecas | None = None,
+                                   comparacao: ComparacaoPeriodo | None = None):
   """
   Gera elementos (list) prontos para inserir no doc ReportLab.
   Mostra: Caminhões | Nº Viagens | Total (t) | Peso Médio (t/viagem)
+  Aceita o DataFrame de viagens ou um CuboProducao.
+  limite: quando informado, mostra apenas as N linhas de maior produção.
+  max_linhas: tamanho dos blocos de linhas guardados em `pecas`, que reaproveita
+  as linhas formatadas dos blocos que não mudaram.
+  comparacao: acrescenta a variação do total de cada caminhão em relação ao período de comparação.
   """
-  elementos = []
-  df = dfViagens.copy()
-
-  # Garante as colunas necessarias
-  for col in ("time", "nome", "volume_descarregado", "desc_obra", "prefixo_veiculo"):
-    if col not in df.columns:
-      df[col] = "" if col != "volume_descarregado" else 0.0
-
-  # Converte volume para numerico e preenche NaN com 0.0
-  df["volume_descarregado"] = pd.to_numeric(df["volume_descarregado"], errors="coerce")
-
-  # Preenche nulos textuais
-  for col in ("nome", "desc_obra", "prefixo_veiculo"):
-    if col in df.columns:
-      df[col] = df[col].fillna("").astype(str)
-
-  # Agrupamento por caminhao: nº de viagens, total e media por viagem
-  df_agrupado = (
-    df.groupby("prefixo_veiculo")
-    .agg(
-      n_viagens=("volume_descarregado", "count"),
-      total_descarregado=("volume_descarregado", "sum"),
-      peso_medio=("volume_descarregado", "mean"),
-    )
-    .reset_index()
-  )
+  # agregados por caminhão, já ordenados e arredondados (mesmos valores da exportação de dados)
+  df_agrupado = producao_por_caminhao(dfViagens)
 
   # Se não existirem registros, retorna mensagem simples
   if df_agrupado.empty:
-    elementos.append(Paragraph("Sem registros no período.", styles["Normal"]))
-    return elementos
-
-  # Ordena pelo total e formata numéricos
-  df_agrupado = df_agrupado.sort_values("total_descarregado", ascending=False)
-  df_agrupado["total_descarregado"] = df_agrupado["total_descarregado"].astype(float).round(2)
-  df_agrupado["peso_medio"] = df_agrupado["peso_medio"].fillna(0.0).astype(float).round(2)
+    return [Paragraph("Sem registros no período.", styles["Normal"])]
 
-  # Formatar separador numerico (pt-BR)
-  def fmt_num(v):
-    try:
-      v = float(v)
-    except Exception:
-      v = 0.0
-    s = f"{v:,.2f}"
-    s = s.replace(",", "X").replace(".", ",").replace("X", ".")
-    return s
+  if limite is not None:
+    df_agrupado = df_agrupado.head(limite)
 
-  linhas = []
-  cabeçalho = ["Caminhão", "N° de Viagens", "Total (t)", "Peso Médio (t/viagem)"]
+  colunas = COLUNAS
+  if comparacao is not None:
+    df_agrupado = comparacao.com_variacao_caminhoes(df_agrupado)
+    colunas = COLUNAS_COMPARACAO
 
-  for _, r in df_agrupado.iterrows():
-    linhas.append([
-      str(r["prefixo_veiculo"]),
-      str(int(r["n_viagens"])),
-      fmt_num(r["total_descarregado"]),
-      fmt_num(r["peso_medio"])
-    ])
+  linhas = linhas_em_blocos("tabela_caminhoes", colunas, df_agrupado, max_linhas, pecas)
 
-  # quebra em páginas (chunks) mantendo mesmo estilo visual
-  for i in range(0, len(linhas), max_linhas):
-    chunk = linhas[i:i + max_linhas]
-    data = [cabeçalho] + chunk
+  # período formatado
+  t_ini, t_fim = periodo_viagens(dfViagens)
+  periodo = f"de {t_ini:%d/%m/%Y} a {t_fim:%d/%m/%Y}"
 
-    tbl = Table(data, colWidths=[6 * cm, 4 * cm, 4.5 * cm, 4.5 * cm], repeatRows=1)
-
-    tbl.setStyle(TableStyle([
-      ("FONTNAME", (0, 0), (-1, 0), FONT_TABLE_HEADER),
-      ("FONTSIZE", (0, 0), (-1, 0), FONTSIZE_HEADER_TABLE),
-      ("BACKGROUND", (0, 0), (-1, 0), COR_FUNDO),
-      ("TEXTCOLOR", (0, 0), (-1, 0), COR_BACKGROUND_HEADER),
-
-      ("FONTNAME", (0, 1), (-1, -1), FONT_TABLE_BODY),
-      ("FONTSIZE", (0, 1), (-1, -1), FONTSIZE_CONTENT_TABLE),
-      ("LINEBELOW", (0, 0), (-1, 0), LINE_BELLOW_HEADER, COR_GRID),
-      ("LINEBELOW", (0, 1), (-1, -1), LINE_BELLOW_HEADER_GRID, COR_GRID),
-
-      ("ALIGN", (0, 0), (0, -1), "LEFT"),
-      ("ALIGN", (1, 0), (1, -1), "RIGHT"),
-      ("ALIGN", (2, 0), (2, -1), "RIGHT"),
-      ("ALIGN", (3, 0), (3, -1), "RIGHT"),
-      ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
-
-      ("ROWBACKGROUNDS", (0, 1), (-1, -1), [COR_FUNDO_SECUNDARIA, COR_FUNDO]),
-      ("TOPPADDING", (0, 0), (-1, -1), 2),
-      ("BOTTOMPADDING", (0, 0), (-1, -1), 1),
-      ("GRID", (0, 0), (-1, -1), 0, colors.transparent),
-    ]))
-    
-    # período formatado
-    ini = df["time"].min().strftime("%d/%m/%Y")
-    fim = df["time"].max().strftime("%d/%m/%Y")
-
-    # Cabeçalho da seção (primeira página vs continuação)
-    if i == 0:
-      elementos.append(Paragraph(f"Produção por caminhão: de {ini} a {fim}", styles["Heading2"]))
-      elementos.append(Spacer(1, 0.2 * cm))
-    else:
-      elementos.append(PageBreak())
-      elementos.append(Paragraph(f"Produção por caminhão (continuação): de {ini} a {fim}", styles["Heading2"]))
-      elementos.append(Spacer(1, 0.2 * cm))
-
-    # Indenta a tabela como na outra função
-    m = 1.0 * cm
-    elementos.append(Indenter(left=m, right=m))
-    elementos.append(tbl)
-    elementos.append(Indenter(left=-m, right=-m))
-
-  return elementos
+  return secao_tabela(
+    f"Produção por caminhão: {periodo}", f"Produção por caminhão (continuação): {periodo}",
+    colunas, linhas, styles,
+  )
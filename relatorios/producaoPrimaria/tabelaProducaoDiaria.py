@@ -1,168 +1,73 @@
 import pandas as pd
 from reportlab.lib.units import cm
-from reportlab.lib import colors
-from reportlab.platypus import Table, TableStyle, Paragraph, Spacer, PageBreak, Indenter
-from utils.primeiraLetraMaiuscula import titlecase_pt
+from reportlab.platypus import Paragraph
 
-from temas.tema_amarelo_dnp import (
-  COR_FUNDO, COR_GRID, 
-  COR_FUNDO_SECUNDARIA, 
-  FONTSIZE_HEADER_TABLE, 
-  FONTSIZE_CONTENT_TABLE, 
-  LINE_BELLOW_HEADER, 
-  LINE_BELLOW_HEADER_GRID,
-  FONT_TABLE_HEADER,
-  FONT_TABLE_BODY,
-  COR_BACKGROUND_HEADER,
-)
-
-def criarTabelaProducaoDiaria(dfViagens: pd.DataFrame, styles, max_linhas: int = 34):
-  """
-  Gera elementos (list) prontos para inserir no doc ReportLab.
-  Mostra: Data | Caminhões | Nº Viagens | Total (t) | Peso Médio (t/viagem)
-  Melhorias:
-  - converte volume_descarregado para numérico de forma segura
-  - preserva ordem de prefixos (aparecimento) ao juntar
-  - corrige uso de TableStyle (FONTNAME / FONTSIZE) e usa repeatRows
-  - formatação numérica robusta
-  """
-  elementos = []
-  df = dfViagens.copy()
-
-  # Garante colunas necessárias
-  for col in ("time", "nome", "volume_descarregado", "desc_obra", "prefixo_veiculo"):
-    if col not in df.columns:
-      df[col] = "" if col != "volume_descarregado" else 0.0
+from .agregadosRelatorio import producao_diaria
+from .cacheSecoes import CachePecas
+from .comparacaoPeriodo import ComparacaoPeriodo, fmt_variacao
+from .cuboProducao import CuboProducao, periodo_viagens
+from .motorTabelas import Coluna, fmt_inteiro, fmt_num, linhas_em_blocos, secao_tabela
 
-  # Converte a coluna de tempo para datetime (mantém para cálculos)
-  df["time"] = pd.to_datetime(df["time"], errors="coerce")
 
-  # Converte volume para numérico (caso venha como string) e preenche NaN com 0.0
-  df["volume_descarregado"] = pd.to_numeric(df["volume_descarregado"], errors="coerce").fillna(0.0)
+def _fmt_hora(t):
+  return "-" if pd.isna(t) else t.strftime("%H:%M")
 
-  # Preenche nulos textuais
-  for col in ("nome", "desc_obra", "prefixo_veiculo"):
-    if col in df.columns:
-      df[col] = df[col].fillna("").astype(str)
 
-  # Cria coluna 'data' apenas com date para agrupar por dia
-  df["data"] = df["time"].dt.date
-
-  # Função auxiliar para obter prefixos únicos na ordem alfabetica
-  def unique_join_order(series):
-    res = sorted({str(v).strip() for v in series if str(v).strip()}, key=str.lower)
-    return ", ".join(res)
-
-  # Agrupamento por dia: nº de viagens, total e média por viagem
-  df_agrupado = (
-    df.groupby("data", dropna=False)
-    .agg(
-      n_viagens=("volume_descarregado", "count"),
-      total_descarregado=("volume_descarregado", "sum"),
-      peso_medio=("volume_descarregado", "mean"),
-      prefixos=("prefixo_veiculo", lambda s: unique_join_order(s)),
-      hora_primeira_viagem=("time", "min"),
-      hora_ultima_viagem=("time", "max"),
-    )
-    .reset_index()
-  )
-  
+# Data | Caminhões | Nº Viagens | Total | Peso Médio | Primeira viagem | Última viagem
+COLUNAS = (
+  Coluna("Data", 2.5 * cm, "CENTER", "data", lambda d: d.strftime("%d/%m/%Y")),
+  Coluna("Caminhões", 4 * cm, "LEFT", "prefixos", lambda s: s if s else "-"),  # '-' se vazio
+  Coluna("Nº Viagens", 2.5 * cm, "RIGHT", "n_viagens", fmt_inteiro),
+  Coluna("Total (t)", 2 * cm, "RIGHT", "total_descarregado", fmt_num),
+  Coluna("t/Viagen", 2 * cm, "RIGHT", "peso_medio", fmt_num),
+  Coluna("Primeira viagem", 3 * cm, "CENTER", "hora_primeira_viagem", _fmt_hora),
+  Coluna("Última viagem", 3 * cm, "CENTER", "hora_ultima_viagem", _fmt_hora),
+)
+# com --comparar: + variação do total em relação ao dia equivalente do período de comparação
+COLUNAS_COMPARACAO = (
+  Coluna("Data", 2.3 * cm, "CENTER", "data", lambda d: d.strftime("%d/%m/%Y")),
+  Coluna("Caminhões", 3.7 * cm, "LEFT", "prefixos", lambda s: s if s else "-"),
+  Coluna("Nº Viagens", 2 * cm, "RIGHT", "n_viagens", fmt_inteiro),
+  Coluna("Total (t)", 2 * cm, "RIGHT", "total_descarregado", fmt_num),
+  Coluna("Variação", 2 * cm, "RIGHT", "var_total", fmt_variacao),
+  Coluna("t/Viagen", 2 * cm, "RIGHT", "peso_medio", fmt_num),
+  Coluna("Primeira viagem", 2.5 * cm, "CENTER", "hora_primeira_viagem", _fmt_hora),
+  Coluna("Última viagem", 2.5 * cm, "CENTER", "hora_ultima_viagem", _fmt_hora),
+)
 
 
-  # Remove linhas com data NaT (se quiser excluir registros sem data)
-  df_agrupado = df_agrupado[df_agrupado["data"].notna()]
+def criarTabelaProducaoDiaria(dfViagens: pd.DataFrame | CuboProducao, styles, max_linhas: int = 34,
+                              pecas: CachePecas | None = None, comparacao: ComparacaoPeriodo | None = None):
+  """
+  Gera elementos (list) prontos para inserir no doc ReportLab.
+  Mostra: Data | Caminhões | Nº Viagens | Total (t) | Peso Médio (t/viagem)
+  Aceita o DataFrame de viagens ou um CuboProducao.
+  A tabela é uma só: o layout quebra as páginas e repete o cabeçalho.
+  max_linhas: tamanho dos blocos de linhas guardados em `pecas`, que reaproveita
+  as linhas formatadas dos blocos cujos dias não mudaram.
+  comparacao: acrescenta a variação do total de cada dia em relação ao dia
+  equivalente do período de comparação.
+  """
+  # agregados por dia (mesmos valores da exportação de dados)
+  df_agrupado = producao_diaria(dfViagens)
 
   # Se não existirem registros, retorna mensagem simples
   if df_agrupado.empty:
-    elementos.append(Paragraph("Sem registros no período.", styles["Normal"]))
-    return elementos
-
-  # Formatação das colunas para exibição (pt-BR)
-  df_agrupado["data_str"] = df_agrupado["data"].apply(lambda d: d.strftime("%d/%m/%Y"))
-  df_agrupado["total_descarregado"] = df_agrupado["total_descarregado"].astype(float).round(2)
-  df_agrupado["peso_medio"] = df_agrupado["peso_medio"].fillna(0.0).astype(float).round(2)
-  df_agrupado["hora_primeira_viagem"] = df_agrupado["hora_primeira_viagem"].dt.strftime("%H:%M")
-  df_agrupado["hora_ultima_viagem"]  = df_agrupado["hora_ultima_viagem"].dt.strftime("%H:%M")
-
-  def fmt_num(v):
-    try:
-      v = float(v)
-    except Exception:
-      v = 0.0
-    # Formata com separador pt-BR: "1.234,56"
-    s = f"{v:,.2f}" 
-    s = s.replace(",", "X").replace(".", ",").replace("X", ".")
-    return s
-
-  # Monta linhas da tabela
-  linhas = []
-  cabeçalho = ["Data", "Caminhões", "Nº Viagens", "Total (t)", "t/Viagen", "Primeira viagem", "Última viagem"]
-  for _, r in df_agrupado.iterrows():
-    linhas.append([
-      r["data_str"],
-      r["prefixos"] if r["prefixos"] else "-",            # coloca '-' se vazio
-      f"{int(r['n_viagens'])}",
-      fmt_num(r["total_descarregado"]),
-      fmt_num(r["peso_medio"]),
-      r["hora_primeira_viagem"],
-      r["hora_ultima_viagem"],
-    ])
+    return [Paragraph("Sem registros no período.", styles["Normal"])]
 
-  # quebra em páginas (chunks) mantendo mesmo estilo visual
-  for i in range(0, len(linhas), max_linhas):
-    chunk = linhas[i:i + max_linhas]
-    data = [cabeçalho] + chunk
+  colunas = COLUNAS
+  if comparacao is not None:
+    df_agrupado = comparacao.com_variacao_diaria(df_agrupado)
+    colunas = COLUNAS_COMPARACAO
 
-    # colWidths: Data | Caminhões | Nº Viagens | Total | Peso Médio | Primeira viagem | Ultima viagem
-    # repete a primeira linha como cabeçalho usando repeatRows argument
-    tbl = Table(data, colWidths=[2.5 * cm, 4 * cm, 2.5 * cm, 2 * cm, 2 * cm, 3 * cm, 3 * cm], repeatRows=1)
-    tbl.setStyle(TableStyle([
-      # Cabeçalho
-      ("FONTNAME", (0, 0), (-1, 0), FONT_TABLE_HEADER),
-      ("FONTSIZE", (0, 0), (-1, 0), FONTSIZE_HEADER_TABLE),
-      ("BACKGROUND", (0, 0), (-1, 0), COR_FUNDO),
-      ("TEXTCOLOR", (0, 0), (-1, 0), COR_BACKGROUND_HEADER),
-      ("LINEBELOW", (0, 0), (-1, 0), LINE_BELLOW_HEADER, COR_GRID),
-      ("ALIGN", (0, 0), (0, -1), "CENTER"),
+  # só o bloco com dias alterados (em geral o último) é formatado de novo
+  linhas = linhas_em_blocos("tabela_diaria", colunas, df_agrupado, max_linhas, pecas)
 
-      # Tabela completa
-      ("FONTNAME", (0, 1), (-1, -1), FONT_TABLE_BODY),
-      ("FONTSIZE", (0, 1), (-1, -1), FONTSIZE_CONTENT_TABLE),
-      ("LINEBELOW", (0, 1), (-1, -1), LINE_BELLOW_HEADER_GRID, COR_GRID),
-      ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
-      ("ROWBACKGROUNDS", (0, 1), (-1, -1), [COR_FUNDO_SECUNDARIA, COR_FUNDO]),
+  # período formatado
+  t_ini, t_fim = periodo_viagens(dfViagens)
+  periodo = f"de {t_ini:%d/%m/%Y} a {t_fim:%d/%m/%Y}"
 
-      # Formatar colunas
-      ("ALIGN", (2, 0), (2, -1), "RIGHT"),
-      ("ALIGN", (3, 0), (3, -1), "RIGHT"),
-      ("ALIGN", (4, 0), (4, -1), "RIGHT"),
-      ("ALIGN", (5, 0), (5, -1), "CENTER"),
-      ("ALIGN", (6, 0), (6, -1), "CENTER"),
-
-      # Top e bottom
-      ("TOPPADDING", (0, 0), (-1, -1), 2),
-      ("BOTTOMPADDING", (0, 0), (-1, -1), 1),
-
-      ("GRID", (0, 0), (-1, -1), 0, colors.transparent),
-    ]))
-    
-    # período formatado
-    ini = df["time"].min().strftime("%d/%m/%Y")
-    fim = df["time"].max().strftime("%d/%m/%Y")
-
-    # Cabeçalho da seção (primeira página vs continuação)
-    if i == 0:
-      elementos.append(Paragraph(f"Produção Diária: de {ini} a {fim}", styles["Heading2"]))
-      elementos.append(Spacer(1, 0.2 * cm))
-    else:
-      elementos.append(PageBreak())
-      elementos.append(Paragraph(f"Produção Diária (continuação): de {ini} a {fim}", styles["Heading2"]))
-      elementos.append(Spacer(1, 0.2 * cm))
-
-    # Indenta a tabela como na outra função
-    m = 1.0 * cm
-    elementos.append(Indenter(left=m, right=m))
-    elementos.append(tbl)
-    elementos.append(Indenter(left=-m, right=-m))
-
-  return elementos
+  return secao_tabela(
+    f"Produção Diária: {periodo}", f"Produção Diária (continuação): {periodo}",
+    colunas, linhas, styles,
+  )
@@ -1,183 +1,69 @@
 import pandas as pd
 from reportlab.lib.units import cm
-from reportlab.lib import colors
-from reportlab.platypus import Table, TableStyle, Paragraph, Spacer, PageBreak, Indenter
-from utils.primeiraLetraMaiuscula import titlecase_pt
-
-from temas.tema_amarelo_dnp import (
-  COR_FUNDO, COR_GRID, 
-  COR_FUNDO_SECUNDARIA, 
-  FONTSIZE_HEADER_TABLE, 
-  FONTSIZE_CONTENT_TABLE, 
-  LINE_BELLOW_HEADER, 
-  LINE_BELLOW_HEADER_GRID,
-  FONT_TABLE_HEADER,
-  FONT_TABLE_BODY,
-  COR_BACKGROUND_HEADER,
-  TOP_PADDING_TABLE,
-  BOTTOM_PADDING_TABLE,
+from reportlab.platypus import Paragraph
+
+from temas.tema_amarelo_dnp import TOP_PADDING_TABLE, BOTTOM_PADDING_TABLE
+
+from .agregadosRelatorio import producao_por_motorista
+from .cacheSecoes import CachePecas
+from .comparacaoPeriodo import ComparacaoPeriodo, fmt_variacao
+from .cuboProducao import CuboProducao, periodo_viagens
+from .motorTabelas import Coluna, fmt_inteiro, fmt_num, linhas_em_blocos, secao_tabela
+
+# Motorista | Nº Viagens | Total | Peso Médio | Média por dia
+COLUNAS = (
+  Coluna("Motorista", 7 * cm, "LEFT", "nome", str),  # já está em titlecase
+  Coluna("N° de Viagens", 2.5 * cm, "RIGHT", "n_viagens", fmt_inteiro),
+  Coluna("Total (t)", 3 * cm, "RIGHT", "total_descarregado", fmt_num),
+  Coluna("Peso Médio (t/viagem)", 3.5 * cm, "RIGHT", "peso_medio", fmt_num),
+  # Só mostra média por dia quando não for 0 (senão, string vazia)
+  Coluna("Média (t/dia)", 3 * cm, "RIGHT", "media_por_dia", lambda v: fmt_num(v) if v > 0 else ""),
+)
+# com --comparar: + variação do total em relação ao período de comparação
+COLUNAS_COMPARACAO = (
+  Coluna("Motorista", 5.5 * cm, "LEFT", "nome", str),
+  Coluna("N° de Viagens", 2.5 * cm, "RIGHT", "n_viagens", fmt_inteiro),
+  Coluna("Total (t)", 3 * cm, "RIGHT", "total_descarregado", fmt_num),
+  Coluna("Peso Médio (t/viagem)", 3 * cm, "RIGHT", "peso_medio", fmt_num),
+  Coluna("Média (t/dia)", 2.5 * cm, "RIGHT", "media_por_dia", lambda v: fmt_num(v) if v > 0 else ""),
+  Coluna("Variação", 2.5 * cm, "RIGHT", "var_total", fmt_variacao),
 )
 
-def criarTabelaProducaoPorMotorista(dfViagens: pd.DataFrame, styles, max_linhas: int = 34):
+
+def criarTabelaProducaoPorMotorista(dfViagens: pd.DataFrame | CuboProducao, styles, max_linhas: int = 34,
+                                    limite: int | None = None, pecas: CachePecas | None = None,
+                                    comparacao: ComparacaoPeriodo | None = None):
   """
   Gera elementos (list) prontos para inserir no doc ReportLab.
   Mostra: Motorista | Nº Viagens | Total (t) | Peso Médio (t/viagem) | Média (t/dia)
+  Aceita o DataFrame de viagens ou um CuboProducao.
+  limite: quando informado, mostra apenas as N linhas de maior produção.
+  max_linhas: tamanho dos blocos de linhas guardados em `pecas`, que reaproveita
+  as linhas formatadas dos blocos que não mudaram.
+  comparacao: acrescenta a variação do total de cada motorista em relação ao período de comparação.
   """
-  elementos = []
-  df = dfViagens.copy()
-
-  # Garante as colunas necessárias
-  for col in ("time", "nome", "volume_descarregado", "desc_obra", "prefixo_veiculo"):
-    if col not in df.columns:
-      df[col] = "" if col != "volume_descarregado" else 0.0
-
-  # Converte volume para número
-  df["volume_descarregado"] = pd.to_numeric(df["volume_descarregado"], errors="coerce")
-
-  # Converte tempo para datetime (para conseguir extrair dia)
-  df["time"] = pd.to_datetime(df["time"], errors="coerce")
-    
-  df["nome"] = df["nome"].fillna("não definido").astype(str)
-  df["nome"] = df["nome"].replace("", "não definido")
-  df["nome"] = df["nome"].apply(titlecase_pt)
-
-  # Agrupa por motorista (viagens, total e peso médio)
-  df_agrupado = (
-    df.groupby("nome")
-    .agg(
-      n_viagens=("volume_descarregado", "count"),   # se quiser contar TODAS as linhas, use "size"
-      total_descarregado=("volume_descarregado", "sum"),
-      peso_medio=("volume_descarregado", "mean"),
-    )
-    .reset_index()
-  )
-
-  # Calcula quantidade de dias com produção (>0) por motorista
-  df_valid = df[df["volume_descarregado"] > 0].copy()
-  df_valid["dia"] = df_valid["time"].dt.date
-
-  df_dias = (
-    df_valid.groupby("nome")["dia"]
-    .nunique()
-    .reset_index(name="dias_com_producao")
-  )
-
-  # Junta dias_com_producao à tabela agrupada
-  df_agrupado = df_agrupado.merge(df_dias, on="nome", how="left")
-  df_agrupado["dias_com_producao"] = df_agrupado["dias_com_producao"].fillna(0).astype(int)
+  # agregados por motorista, já ordenados e arredondados (mesmos valores da exportação de dados)
+  df_agrupado = producao_por_motorista(dfViagens)
 
   # Se não existirem registros
   if df_agrupado.empty:
-    elementos.append(Paragraph("Sem registros no período.", styles["Normal"]))
-    return elementos
-
-  # Ordena pelo total (maior → menor)
-  df_agrupado = df_agrupado.sort_values("total_descarregado", ascending=False)
-
-  # Formata números e calcula média por dia
-  df_agrupado["total_descarregado"] = df_agrupado["total_descarregado"].astype(float).round(2)
-  df_agrupado["peso_medio"] = df_agrupado["peso_medio"].fillna(0.0).astype(float).round(2)
+    return [Paragraph("Sem registros no período.", styles["Normal"])]
 
-  # média por dia: total / dias_com_producao (quando dias > 0)
-  df_agrupado["media_por_dia"] = 0.0
-  mask_dias = df_agrupado["dias_com_producao"] > 0
-  df_agrupado.loc[mask_dias, "media_por_dia"] = (
-    df_agrupado.loc[mask_dias, "total_descarregado"]
-    / df_agrupado.loc[mask_dias, "dias_com_producao"]
-  )
-  df_agrupado["media_por_dia"] = df_agrupado["media_por_dia"].round(2)
-
-  # Formato pt-BR
-  def fmt_num(v):
-    try:
-      v = float(v)
-    except Exception:
-      v = 0.0
-    s = f"{v:,.2f}"
-    return s.replace(",", "X").replace(".", ",").replace("X", ".")
-
-  # Constrói as linhas
-  linhas = []
-  cabeçalho = [
-    "Motorista",
-    "N° de Viagens",
-    "Total (t)",
-    "Peso Médio (t/viagem)",
-    "Média (t/dia)",
-  ]
-
-  for _, r in df_agrupado.iterrows():
-    # Só mostra média por dia quando não for 0 (senão, string vazia)
-    media_dia_str = fmt_num(r["media_por_dia"]) if r["media_por_dia"] > 0 else ""
-
-    linhas.append([
-      r["nome"],  # já está em titlecase
-      str(int(r["n_viagens"])),
-      fmt_num(r["total_descarregado"]),
-      fmt_num(r["peso_medio"]),
-      media_dia_str,
-    ])
-
-  # Paginar
-  for i in range(0, len(linhas), max_linhas):
-    chunk = linhas[i:i + max_linhas]
-    data = [cabeçalho] + chunk
-
-    tbl = Table(
-      data,
-      colWidths=[7 * cm, 2.5 * cm, 3 * cm, 3.5 * cm, 3 * cm],
-      repeatRows=1
-    )
+  if limite is not None:
+    df_agrupado = df_agrupado.head(limite)
 
-    tbl.setStyle(TableStyle([
-      # Cabeçalho
-      ("FONTNAME", (0, 0), (-1, 0), FONT_TABLE_HEADER),
-      ("FONTSIZE", (0, 0), (-1, 0), FONTSIZE_HEADER_TABLE),
-      ("BACKGROUND", (0, 0), (-1, 0), COR_FUNDO),
-      ("TEXTCOLOR", (0, 0), (-1, 0), COR_BACKGROUND_HEADER),
+  colunas = COLUNAS
+  if comparacao is not None:
+    df_agrupado = comparacao.com_variacao_motoristas(df_agrupado)
+    colunas = COLUNAS_COMPARACAO
 
-      # Corpo
-      ("FONTNAME", (0, 1), (-1, -1), FONT_TABLE_BODY),
-      ("FONTSIZE", (0, 1), (-1, -1), FONTSIZE_CONTENT_TABLE),
+  linhas = linhas_em_blocos("tabela_motoristas", colunas, df_agrupado, max_linhas, pecas)
 
-      # Linhas
-      ("LINEBELOW", (0, 0), (-1, 0), LINE_BELLOW_HEADER, COR_GRID),
-      ("LINEBELOW", (0, 1), (-1, -1), LINE_BELLOW_HEADER_GRID, COR_GRID),
+  # período formatado
+  t_ini, t_fim = periodo_viagens(dfViagens)
+  periodo = f"de {t_ini:%d/%m/%Y} a {t_fim:%d/%m/%Y}"
 
-      # Alinhamentos
-      ("ALIGN", (0, 0), (0, -1), "LEFT"),
-      ("ALIGN", (2, 0), (2, -1), "RIGHT"),
-      ("ALIGN", (3, 0), (3, -1), "RIGHT"),
-      ("ALIGN", (4, 0), (4, -1), "RIGHT"),
-      ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
-
-      # Zebra
-      ("ROWBACKGROUNDS", (0, 1), (-1, -1), [COR_FUNDO_SECUNDARIA, COR_FUNDO]),
-
-      # Espaçamentos
-      ("TOPPADDING", (0, 0), (-1, -1), TOP_PADDING_TABLE),
-      ("BOTTOMPADDING", (0, 0), (-1, -1), BOTTOM_PADDING_TABLE),
-
-      # Remove grid
-      ("GRID", (0, 0), (-1, -1), 0, colors.transparent),
-    ]))
-    
-    # período formatado
-    ini = df["time"].min().strftime("%d/%m/%Y")
-    fim = df["time"].max().strftime("%d/%m/%Y")
-
-    # Cabeçalho
-    if i == 0:
-      elementos.append(Paragraph(f"Produção por motorista: de {ini} a {fim}", styles["Heading2"]))
-      elementos.append(Spacer(1, 0.2 * cm))
-    else:
-      elementos.append(PageBreak())
-      elementos.append(Paragraph(f"Produção por motorista (continuação): de {ini} a {fim}", styles["Heading2"]))
-      elementos.append(Spacer(1, 0.2 * cm))
-
-    m = 1.0 * cm
-    elementos.append(Indenter(left=m, right=m))
-    elementos.append(tbl)
-    elementos.append(Indenter(left=-m, right=-m))
-
-  return elementos
+  return secao_tabela(
+    f"Produção por motorista: {periodo}", f"Produção por motorista (continuação): {periodo}",
+    colunas, linhas, styles, padding=(TOP_PADDING_TABLE, BOTTOM_PADDING_TABLE),
+  )
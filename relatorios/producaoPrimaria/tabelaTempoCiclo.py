@@ -0,0 +1,85 @@
+import pandas as pd
+from reportlab.lib.units import cm
+from reportlab.platypus import Paragraph, Spacer
+
+from .agregadosRelatorio import LIMIAR_PARADA_MIN, tempos_ciclo
+from .cacheSecoes import CachePecas
+from .cuboProducao import CuboProducao, periodo_viagens
+from .motorTabelas import Coluna, fmt_inteiro, fmt_num, linhas_em_blocos, secao_tabela
+
+
+def fmt_minutos(v) -> str:
+  # caminhão sem ciclo abaixo do limiar: não há mediana
+  return "-" if pd.isna(v) else fmt_num(v, 1)
+
+
+# Caminhão | Ciclos | Mediana | P90 | Paradas | Tempo parado
+COLUNAS_CAMINHAO = (
+  Coluna("Caminhão", 5 * cm, "LEFT", "prefixo_veiculo", str),
+  Coluna("Ciclos", 2.5 * cm, "RIGHT", "ciclos", fmt_inteiro),
+  Coluna("Mediana (min)", 3 * cm, "RIGHT", "mediana_min", fmt_minutos),
+  Coluna("P90 (min)", 3 * cm, "RIGHT", "p90_min", fmt_minutos),
+  Coluna("Paradas", 2.5 * cm, "RIGHT", "paradas", fmt_inteiro),
+  Coluna("Tempo parado (h)", 3 * cm, "RIGHT", "tempo_parado_h", fmt_num),
+)
+# Data | Caminhões | Ciclos | Mediana | P90 | Paradas | Tempo parado
+COLUNAS_DIA = (
+  Coluna("Data", 3 * cm, "LEFT", "data", lambda d: d.strftime("%d/%m/%Y")),
+  Coluna("Caminhões", 2.5 * cm, "RIGHT", "caminhoes", fmt_inteiro),
+  Coluna("Ciclos", 2.5 * cm, "RIGHT", "ciclos", fmt_inteiro),
+  Coluna("Mediana (min)", 2.75 * cm, "RIGHT", "mediana_min", fmt_minutos),
+  Coluna("P90 (min)", 2.75 * cm, "RIGHT", "p90_min", fmt_minutos),
+  Coluna("Paradas", 2.5 * cm, "RIGHT", "paradas", fmt_inteiro),
+  Coluna("Tempo parado (h)", 3 * cm, "RIGHT", "tempo_parado_h", fmt_num),
+)
+
+
+def criarTabelaTempoCiclo(dfViagens: pd.DataFrame | CuboProducao, styles, max_linhas: int = 38,
+                          limite: int | None = None, pecas: CachePecas | None = None,
+                          limiar: float = LIMIAR_PARADA_MIN):
+  """
+  Gera elementos (list) prontos para inserir no doc ReportLab: tempo de ciclo
+  (intervalo entre viagens consecutivas do mesmo caminhão no mesmo dia) por
+  caminhão no período e da frota por dia.
+  Intervalos acima de `limiar` minutos são paradas: contados à parte e fora
+  da mediana e do p90.
+  limite: quando informado, mostra apenas os N caminhões de maior mediana.
+  Com um CuboProducao (modos streaming/agregado) os instantes das viagens não
+  existem e a seção traz só um aviso.
+  """
+  titulo = "Tempo de ciclo dos caminhões"
+  tempos = tempos_ciclo(dfViagens, limiar)
+  if tempos is None:
+    return [
+      Paragraph(titulo, styles["Heading2"]),
+      Paragraph(
+        "Tempo de ciclo indisponível: exige as viagens individuais (--modo memoria).",
+        styles["Normal"],
+      ),
+    ]
+
+  por_caminhao, por_dia = tempos
+  if por_caminhao.empty:
+    return [Paragraph(titulo, styles["Heading2"]), Paragraph("Sem ciclos no período.", styles["Normal"])]
+
+  if limite is not None:
+    por_caminhao = por_caminhao.head(limite)
+
+  # período formatado
+  t_ini, t_fim = periodo_viagens(dfViagens)
+  periodo = f"de {t_ini:%d/%m/%Y} a {t_fim:%d/%m/%Y}"
+  nota = Paragraph(
+    f"Ciclo: intervalo entre viagens consecutivas do mesmo caminhão no mesmo dia. "
+    f"Intervalos acima de {limiar:g} min contam como paradas e ficam fora da mediana e do P90.",
+    styles["Normal"],
+  )
+
+  caminhoes = secao_tabela(
+    f"{titulo}: {periodo}", f"{titulo} (continuação): {periodo}",
+    COLUNAS_CAMINHAO, linhas_em_blocos("tabela_ciclos", COLUNAS_CAMINHAO, por_caminhao, max_linhas, pecas), styles,
+  )
+  dias = secao_tabela(
+    f"Tempo de ciclo por dia: {periodo}", f"Tempo de ciclo por dia (continuação): {periodo}",
+    COLUNAS_DIA, linhas_em_blocos("tabela_ciclos_dia", COLUNAS_DIA, por_dia, max_linhas, pecas), styles,
+  )
+  return caminhoes[:1] + [nota, Spacer(1, 0.2 * cm)] + caminhoes[1:] + [Spacer(1, 0.8 * cm)] + dias
@@ -0,0 +1,76 @@
+"""
+Verificação do tempo de inicialização da CLI.
+
+Executa a CLI em subprocessos com `python -X importtime` para os casos que não
+devem tocar no banco nem renderizar nada (--ajuda e erros de argumento) e falha
+quando algum módulo pesado é importado ou quando o tempo total passa do limite.
+
+Uso:
+    python -m relatorios.producaoPrimaria.verificarImportacao [--limite 0.5]
+"""
+import argparse
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+MODULO_CLI = "relatorios.producaoPrimaria.producaoPrimariaContadorAutomatico"
+
+# pacotes que não podem ser carregados antes da etapa que os usa
+MODULOS_PESADOS = ("pandas", "numpy", "sqlalchemy", "pymysql", "matplotlib", "reportlab", "dotenv")
+
+# (descrição, argumentos, código de saída esperado)
+CASOS = (
+    ("--ajuda", ["--ajuda"], 0),
+    ("sem --obra", [], 2),
+    ("--obra inválida", ["--obra", "abc"], 2),
+    ("--prazo inválido", ["--obra", "41", "--prazo", "0"], 2),
+    ("--modo inválido", ["--obra", "41", "--modo", "disco"], 2),
+    ("--servidor+otimizar", ["--obra", "41", "--servidor", "http://127.0.0.1:8765", "--otimizar"], 2),
+)
+
+
+def medir(argumentos):
+    """Roda a CLI e devolve (segundos, código de saída, módulos importados)."""
+    cmd = [sys.executable, "-X", "importtime", "-m", MODULO_CLI, *argumentos]
+    t0 = time.perf_counter()
+    proc = subprocess.run(cmd, cwd=PROJECT_ROOT, capture_output=True, text=True)
+    dt = time.perf_counter() - t0
+
+    importados = set()
+    for linha in proc.stderr.splitlines():
+        if not linha.startswith("import time:") or "|" not in linha:
+            continue
+        nome = linha.rsplit("|", 1)[1].strip()
+        importados.add(nome.split(".")[0])
+    return dt, proc.returncode, importados
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verifica o tempo de inicialização da CLI de relatórios")
+    parser.add_argument("--limite", type=float, default=0.5, help="Tempo máximo por caso, em segundos")
+    args = parser.parse_args()
+
+    falhas = 0
+    for descricao, argumentos, esperado in CASOS:
+        dt, codigo, importados = medir(argumentos)
+        pesados = sorted(m for m in MODULOS_PESADOS if m in importados)
+
+        problemas = []
+        if codigo != esperado:
+            problemas.append(f"código de saída {codigo} (esperado {esperado})")
+        if pesados:
+            problemas.append("importou " + ", ".join(pesados))
+        if dt > args.limite:
+            problemas.append(f"passou do limite de {args.limite:.2f} s")
+
+        situacao = "OK" if not problemas else "FALHA: " + "; ".join(problemas)
+        print(f"{descricao:<20} {dt:6.3f} s  {situacao}")
+        falhas += bool(problemas)
+
+    sys.exit(1 if falhas else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+import tempfile
+import time
+import unittest
+from datetime import datetime
+from pathlib import Path
+
+from relatorios.producaoPrimaria.filaRelatorios import (
+    ESPERA_BASE, MAX_TENTATIVAS, adicionar_job, concluir_job, conectar, falhar_job, reservar_job,
+)
+
+INI, FIM = datetime(2025, 7, 1), datetime(2025, 7, 31, 23, 59, 59)
+
+
+class TentativasFila(unittest.TestCase):
+    def setUp(self):
+        self.pasta = tempfile.TemporaryDirectory()
+        self.con = conectar(Path(self.pasta.name) / "fila.sqlite")
+
+    def tearDown(self):
+        self.con.close()
+        self.pasta.cleanup()
+
+    def test_tentativas_e_espera(self):
+        job_id, _ = adicionar_job(self.con, 41, INI, FIM, "r.pdf")
+        execucoes, esperas = 0, []
+        while True:
+            job = reservar_job(self.con)
+            self.assertIsNotNone(job)
+            execucoes += 1
+            self.assertEqual(job["tentativas"], execucoes)
+            antes = time.time()
+            falhar_job(self.con, job, "erro")
+            linha = self.con.execute("SELECT estado, proxima_em FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if linha["estado"] == "falhou":
+                break
+            esperas.append(linha["proxima_em"] - antes)
+            # libera o job já, sem esperar o reagendamento
+            self.con.execute("UPDATE jobs SET proxima_em = 0 WHERE id = ?", (job_id,))
+
+        self.assertEqual(execucoes, MAX_TENTATIVAS)
+        esperado = [ESPERA_BASE * 2 ** i for i in range(MAX_TENTATIVAS - 1)]
+        for espera, valor in zip(esperas, esperado, strict=True):
+            self.assertAlmostEqual(espera, valor, delta=1.0)
+        self.assertIsNone(reservar_job(self.con))
+
+
+class FusaoFila(unittest.TestCase):
+    def setUp(self):
+        self.pasta = tempfile.TemporaryDirectory()
+        self.con = conectar(Path(self.pasta.name) / "fila.sqlite")
+
+    def tearDown(self):
+        self.con.close()
+        self.pasta.cleanup()
+
+    def test_concluido_volta_para_a_fila(self):
+        job_id, _ = adicionar_job(self.con, 41, INI, FIM, "r.pdf", destinatarios=["a@x"])
+        concluir_job(self.con, reservar_job(self.con)["id"])
+        mesmo_id, novo = adicionar_job(self.con, 41, INI, FIM, "r.pdf", destinatarios=["b@x"])
+        self.assertEqual((mesmo_id, novo), (job_id, False))
+        job = reservar_job(self.con)
+        self.assertEqual(job["id"], job_id)
+        self.assertEqual(job["tentativas"], 1)
+        self.assertEqual(job["destinatarios"], '["a@x", "b@x"]')
+
+    def test_outro_arquivo_e_outro_job(self):
+        primeiro, _ = adicionar_job(self.con, 41, INI, FIM, "r.pdf")
+        segundo, novo = adicionar_job(self.con, 41, INI, FIM, "copia/r.pdf")
+        self.assertTrue(novo)
+        self.assertNotEqual(primeiro, segundo)
+        self.assertEqual(adicionar_job(self.con, 41, INI, FIM, "./r.pdf"), (primeiro, False))
+
+
+if __name__ == "__main__":
+    unittest.main()